@@ -3,12 +3,63 @@
 
 import sys
 import os
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from pathlib import Path
+import orjson
 from rich.console import Console
 from edpb_guideline_collector import EDPBGuidelineCollector
 
 console = Console()
 
+PAGE_COUNT = 7  # pages 0-6
+
+def _json_page_summary(summary):
+    """Convert a page summary to its JSON serializable form."""
+    return {
+        'page': summary['page'],
+        'total': summary['total'],
+        'guidelines': summary['guidelines'],
+        'recommendations': summary['recommendations'],
+        'source_types': summary['source_types'],
+        'documents': [
+            {
+                'title': doc['title'],
+                'doc_type': doc.get('doc_type', 'Unknown'),
+                'consultation_url': doc.get('consultation_url'),
+                'final_url': doc.get('final_url'),
+                'direct_pdf_url': doc.get('direct_pdf_url'),
+                'pdf_url': doc['pdf_url'],
+                'source_type': doc.get('source_type', 'unknown'),
+                'file_path': str(doc['file_path'])
+            }
+            for doc in summary['documents']
+        ]
+    }
+
+def write_summary_file(summary_file, envelope, page_summaries):
+    """Write the summary JSON, serializing one page at a time.
+    
+    Only a single page's JSON form is held in memory instead of a full
+    converted copy of every page summary.
+    """
+    def dumps(obj, depth):
+        # orjson never emits raw newlines inside strings, so re-indenting is safe
+        return orjson.dumps(obj, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS).replace(b'\n', b'\n' + b'  ' * depth)
+    
+    with open(summary_file, 'wb') as f:
+        f.write(b'{\n')
+        for key, value in envelope.items():
+            f.write(b'  ' + orjson.dumps(key) + b': ' + dumps(value, 1) + b',\n')
+        f.write(b'  "page_summaries": [')
+        written = False
+        for summary in page_summaries:
+            f.write(b',\n    ' if written else b'\n    ')
+            f.write(dumps(_json_page_summary(summary), 2))
+            written = True
+        # Same layout as orjson: an empty list stays on one line and there is no trailing newline
+        f.write(b'\n  ]\n}' if written else b']\n}')
+
 def main():
     """Collect all EDPB documents including Article 29 WP documents."""
     
@@ -22,31 +73,77 @@ def main():
     
     all_results = []
     page_summaries = []
+    article29_docs = []
+    totals = Counter()
     
     try:
-        for page_num in range(7):  # pages 0-6
-            console.print(f"\n📄 Processing page {page_num}...")
+        # Pages are independent and network-bound, so fetch them in parallel. Each
+        # page runs DOCUMENT_WORKERS requests at once, so limit the page workers to
+        # what the collector's HTTP connection pool can serve.
+        page_workers = max(1, min(PAGE_COUNT, collector.HTTP_POOL_SIZE // collector.DOCUMENT_WORKERS))
+        console.print(f"\n📄 Processing pages 0-{PAGE_COUNT - 1} ({page_workers} in parallel)...")
+        page_outcomes = {}
+        executor = ThreadPoolExecutor(max_workers=page_workers)
+        try:
+            futures = {
+                executor.submit(collector.collect_guidelines, page_num, False): page_num
+                for page_num in range(PAGE_COUNT)
+            }
+            for future in as_completed(futures):
+                page_num = futures[future]
+                try:
+                    page_outcomes[page_num] = future.result()
+                except Exception as e:
+                    console.print(f"❌ Error processing page {page_num}: {e}")
+                    continue
+                # Record results as soon as a page finishes so an interrupt can save them
+                all_results.extend(page_outcomes[page_num] or [])
+                console.print(f"📄 Page {page_num} collected")
+        except KeyboardInterrupt:
+            # Drop queued pages and let running pages stop before their next document
+            collector.cancel()
+            executor.shutdown(wait=False, cancel_futures=True)
+            raise
+        executor.shutdown()
+        
+        # Summarize in page order so the output stays deterministic
+        all_results = [doc for page_num in range(PAGE_COUNT) for doc in page_outcomes.get(page_num) or []]
+        for page_num in range(PAGE_COUNT):
+            if page_num not in page_outcomes:
+                continue  # Failed pages were already reported above
             
             try:
-                page_results = collector.collect_guidelines(page_num)
+                page_results = page_outcomes[page_num]
                 
                 if page_results:
-                    all_results.extend(page_results)
-                    
-                    guidelines = [r for r in page_results if r.get('doc_type') == 'Guidelines']
-                    recommendations = [r for r in page_results if r.get('doc_type') == 'Recommendations']
-                    
-                    # Count source types including Article 29
-                    direct_count = len([r for r in page_results if r.get('source_type') == 'direct'])
-                    consultation_count = len([r for r in page_results if r.get('source_type') == 'consultation'])
-                    final_count = len([r for r in page_results if r.get('source_type') == 'final'])
-                    article29_count = len([r for r in page_results if r.get('source_type') == 'article29'])
+                    # Count doc types and source types (including Article 29) in one pass
+                    guidelines_count = recommendations_count = 0
+                    direct_count = consultation_count = final_count = article29_count = 0
+                    for r in page_results:
+                        doc_type = r.get('doc_type')
+                        source_type = r.get('source_type')
+                        guidelines_count += doc_type == 'Guidelines'
+                        recommendations_count += doc_type == 'Recommendations'
+                        direct_count += source_type == 'direct'
+                        consultation_count += source_type == 'consultation'
+                        final_count += source_type == 'final'
+                        if source_type == 'article29':
+                            article29_count += 1
+                            article29_docs.append(r)
+                    totals.update(
+                        guidelines=guidelines_count,
+                        recommendations=recommendations_count,
+                        direct=direct_count,
+                        consultation=consultation_count,
+                        final=final_count,
+                        article29=article29_count
+                    )
                     
                     page_summary = {
                         'page': page_num,
                         'total': len(page_results),
-                        'guidelines': len(guidelines),
-                        'recommendations': len(recommendations),
+                        'guidelines': guidelines_count,
+                        'recommendations': recommendations_count,
                         'source_types': {
                             'direct': direct_count,
                             'consultation': consultation_count,
@@ -58,7 +155,7 @@ def main():
                     page_summaries.append(page_summary)
                     
                     console.print(f"✅ Page {page_num}: {len(page_results)} documents")
-                    console.print(f"   📋 {len(guidelines)} Guidelines, 📑 {len(recommendations)} Recommendations")
+                    console.print(f"   📋 {guidelines_count} Guidelines, 📑 {recommendations_count} Recommendations")
                     console.print(f"   🔗 Sources: {direct_count} direct, {consultation_count} consultation, {final_count} final, {article29_count} Article29")
                 else:
                     console.print(f"⚠️  Page {page_num}: No documents found")
@@ -79,17 +176,17 @@ def main():
         console.print(f"\n🎉 FINAL Complete Collection Summary!")
         console.print(f"Total documents downloaded: {len(all_results)}")
         
-        total_guidelines = len([r for r in all_results if r.get('doc_type') == 'Guidelines'])
-        total_recommendations = len([r for r in all_results if r.get('doc_type') == 'Recommendations'])
+        total_guidelines = totals['guidelines']
+        total_recommendations = totals['recommendations']
         
         console.print(f"  📋 Guidelines: {total_guidelines}")
         console.print(f"  📑 Recommendations: {total_recommendations}")
         
         # Enhanced source type breakdown
-        total_direct = len([r for r in all_results if r.get('source_type') == 'direct'])
-        total_consultation = len([r for r in all_results if r.get('source_type') == 'consultation'])
-        total_final = len([r for r in all_results if r.get('source_type') == 'final'])
-        total_article29 = len([r for r in all_results if r.get('source_type') == 'article29'])
+        total_direct = totals['direct']
+        total_consultation = totals['consultation']
+        total_final = totals['final']
+        total_article29 = totals['article29']
         
         console.print(f"\n🔗 Source breakdown:")
         console.print(f"  📎 Direct PDF links: {total_direct}")
@@ -100,7 +197,6 @@ def main():
         # Article 29 document details
         if total_article29 > 0:
             console.print(f"\n🏛️  Article 29 Working Party documents retrieved:")
-            article29_docs = [r for r in all_results if r.get('source_type') == 'article29']
             for doc in article29_docs:
                 console.print(f"    • {doc['title']}")
         
@@ -119,50 +215,24 @@ def main():
             console.print(f"\n💾 All results saved to: {result_file}")
         
         # Save enhanced page summaries
-        import json
         from datetime import datetime
         
-        # Convert to JSON serializable format
-        json_page_summaries = []
-        for summary in page_summaries:
-            json_summary = {
-                'page': summary['page'],
-                'total': summary['total'],
-                'guidelines': summary['guidelines'],
-                'recommendations': summary['recommendations'],
-                'source_types': summary['source_types'],
-                'documents': []
+        now = datetime.now()
+        summary_file = f"edpb_final_complete_summary_{now.strftime('%Y%m%d_%H%M%S')}.json"
+        write_summary_file(summary_file, {
+            'collection_timestamp': now.isoformat(),
+            'collection_version': 'v3_final_with_article29',
+            'total_pages': PAGE_COUNT,
+            'total_documents': len(all_results),
+            'total_guidelines': total_guidelines,
+            'total_recommendations': total_recommendations,
+            'source_breakdown': {
+                'direct': total_direct,
+                'consultation': total_consultation,
+                'final': total_final,
+                'article29': total_article29
             }
-            for doc in summary['documents']:
-                json_summary['documents'].append({
-                    'title': doc['title'],
-                    'doc_type': doc.get('doc_type', 'Unknown'),
-                    'consultation_url': doc.get('consultation_url'),
-                    'final_url': doc.get('final_url'),
-                    'direct_pdf_url': doc.get('direct_pdf_url'),
-                    'pdf_url': doc['pdf_url'],
-                    'source_type': doc.get('source_type', 'unknown'),
-                    'file_path': str(doc['file_path'])
-                })
-            json_page_summaries.append(json_summary)
-        
-        summary_file = f"edpb_final_complete_summary_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
-        with open(summary_file, 'w', encoding='utf-8') as f:
-            json.dump({
-                'collection_timestamp': datetime.now().isoformat(),
-                'collection_version': 'v3_final_with_article29',
-                'total_pages': 7,
-                'total_documents': len(all_results),
-                'total_guidelines': total_guidelines,
-                'total_recommendations': total_recommendations,
-                'source_breakdown': {
-                    'direct': total_direct,
-                    'consultation': total_consultation,
-                    'final': total_final,
-                    'article29': total_article29
-                },
-                'page_summaries': json_page_summaries
-            }, f, indent=2, ensure_ascii=False)
+        }, page_summaries)
         
         console.print(f"📊 Final summary saved to: {summary_file}")
         
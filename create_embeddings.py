@@ -1,10 +1,21 @@
 import os
 import json
+import atexit
+import hashlib
+import sqlite3
+from array import array
 from supabase import create_client
+import psycopg2
+from psycopg2.extras import execute_values
 import requests
+from requests.adapters import HTTPAdapter
 from dotenv import load_dotenv
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Iterable, Iterator, Optional, Set, Tuple
+from itertools import islice
 import time
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 
 # .envファイルから環境変数を読み込む
 load_dotenv()
@@ -16,35 +27,146 @@ SUPABASE_KEY = os.getenv('SUPABASE_ANON_KEY')
 # Supabase クライアントの初期化
 supabase = create_client(SUPABASE_URL, SUPABASE_KEY)
 
+# Postgresへの直接接続URL（設定されている場合、embeddingのINSERTはPostgREST経由ではなく直接行う）
+SUPABASE_DB_URL = os.getenv('SUPABASE_DB_URL')
+_db_conn = None
+
 # Jina AI の設定
 JINA_API_KEY = os.getenv('JINA_API_KEY')
 EMBEDDING_API_URL = "https://api.jina.ai/v1/embeddings"
-
-def get_embedding(text: str, max_retries: int = 3, retry_delay: int = 5) -> List[float]:
-    """Jina AI APIを使用してテキストのembeddingを取得"""
-    headers = {
-        "Authorization": f"Bearer {JINA_API_KEY}",
-        "Content-Type": "application/json"
-    }
-    
-    data = {
-        "model": "jina-embeddings-v3",
-        "task": "retrieval.passage",
-        "late_chunking": False,
-        "dimensions": "256",
-        "embedding_type": "float",
-        "input": [text]
-    }
+# リクエストごとに変わらないヘッダーとペイロード
+_EMBEDDING_HEADERS = {
+    "Authorization": f"Bearer {JINA_API_KEY}",
+    "Content-Type": "application/json"
+}
+_EMBEDDING_BASE_PAYLOAD = {
+    "model": "jina-embeddings-v3",
+    "task": "retrieval.passage",
+    "late_chunking": False,
+    "dimensions": "256",
+    "embedding_type": "float"
+}
+# 1リクエストでまとめて送る入力テキスト数
+EMBEDDING_BATCH_SIZE = 32
+# 1つのprocess_*内で同時に実行するJina APIリクエスト数
+# （process_allで7種別が並列に動くため、7×この値がセッションのpool_maxsize以下になるようにする）
+EMBEDDING_CONCURRENCY = 4
+# embeddingsテーブルへ1回でINSERTする行数
+EMBEDDING_INSERT_BATCH_SIZE = 100
+# 既存embeddingの存在チェックで1回に問い合わせるID数
+EXISTENCE_CHECK_BATCH_SIZE = 200
+# 入力テキストごとのembeddingを保存するローカルキャッシュ
+EMBEDDING_CACHE_PATH = os.getenv('EMBEDDING_CACHE_PATH', 'embed_cache.sqlite')
+# Jina APIへの1分あたりの最大リクエスト数（契約プランのRPMに合わせて環境変数で調整）
+JINA_REQUESTS_PER_MINUTE = int(os.getenv('JINA_REQUESTS_PER_MINUTE', '120'))
+# Jina APIリクエストのタイムアウト秒数（接続, 読み取り）
+EMBEDDING_REQUEST_TIMEOUT = (10, 120)
+# get_embeddingsでリトライする一時的なエラーのステータスコード（429/503はRetry-Afterに従って待機）
+_RETRY_STATUS_CODES = frozenset({429, 502, 503, 504})
+
+# INSERT待ちのembedding行（各process_*が並列に追加するためロックで保護）
+_pending_embeddings: List[Dict[str, Any]] = []
+_pending_lock = threading.Lock()
+
+class RateLimiter:
+    """直近period秒間の呼び出し回数をmax_calls以下に抑えるレートリミッター（スレッドセーフ）"""
+
+    def __init__(self, max_calls: int, period: float = 60.0):
+        self.max_calls = max_calls
+        self.period = period
+        self._calls = deque()
+        self._lock = threading.Lock()
+
+    def acquire(self) -> None:
+        """呼び出し枠が空くまで待機してから1回分を消費"""
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                while self._calls and now - self._calls[0] >= self.period:
+                    self._calls.popleft()
+                if len(self._calls) < self.max_calls:
+                    self._calls.append(now)
+                    return
+                wait = self.period - (now - self._calls[0])
+            time.sleep(wait)
+
+_rate_limiter = RateLimiter(JINA_REQUESTS_PER_MINUTE)
+
+class EmbeddingCache:
+    """入力テキストのハッシュをキーにembeddingを保存するローカルSQLiteキャッシュ（スレッドセーフ）
+
+    キーにはモデル名と次元数も含めるため、設定を変えた場合は別エントリになる。
+    ベクトルはfloat32のバイト列として保存する。
+    """
+
+    def __init__(self, path: str):
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS embedding_cache (hash BLOB PRIMARY KEY, vec BLOB NOT NULL)"
+        )
+        self._conn.commit()
+        self._lock = threading.Lock()
+        self._key_prefix = f"{_EMBEDDING_BASE_PAYLOAD['model']}:{_EMBEDDING_BASE_PAYLOAD['dimensions']}:".encode('utf-8')
+
+    def _hash(self, text: str) -> bytes:
+        return hashlib.blake2b(self._key_prefix + text.encode('utf-8'), digest_size=16).digest()
+
+    def get_many(self, texts: List[str]) -> Dict[str, List[float]]:
+        """キャッシュ済みのテキストについて text -> embedding を返す"""
+        found = {}
+        with self._lock:
+            for text in texts:
+                row = self._conn.execute(
+                    "SELECT vec FROM embedding_cache WHERE hash = ?", (self._hash(text),)
+                ).fetchone()
+                if row:
+                    found[text] = array('f', row[0]).tolist()
+        return found
+
+    def put_many(self, items: Iterable[Tuple[str, List[float]]]) -> None:
+        """text, embedding の組をキャッシュに保存"""
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR IGNORE INTO embedding_cache (hash, vec) VALUES (?, ?)",
+                [(self._hash(text), array('f', embedding).tobytes()) for text, embedding in items]
+            )
+            self._conn.commit()
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+_embedding_cache = EmbeddingCache(EMBEDDING_CACHE_PATH)
+atexit.register(_embedding_cache.close)
+
+# Jina AI へのコネクションを使い回すためのセッション（keep-alive）
+# リトライはget_embeddingsだけで行い、再送も毎回レートリミッターを通す
+_session = requests.Session()
+_session.mount("https://", HTTPAdapter(pool_connections=1, pool_maxsize=32))
+atexit.register(_session.close)
+
+def _retry_after(response: requests.Response, default: float) -> float:
+    """Retry-Afterヘッダー（秒数）があればその値、なければdefaultを返す"""
+    retry_after = response.headers.get('Retry-After', '')
+    return int(retry_after) if retry_after.isdigit() else default
+
+def get_embeddings(texts: List[str], max_retries: int = 3, retry_delay: int = 5) -> List[List[float]]:
+    """Jina AI APIを使用して複数テキストのembeddingを1リクエストで取得（入力順で返す）"""
+    data = {**_EMBEDDING_BASE_PAYLOAD, "input": texts}
     
     for attempt in range(max_retries):
         try:
-            response = requests.post(EMBEDDING_API_URL, headers=headers, json=data)
+            _rate_limiter.acquire()
+            response = _session.post(EMBEDDING_API_URL, headers=_EMBEDDING_HEADERS, json=data,
+                                     timeout=EMBEDDING_REQUEST_TIMEOUT)
             if response.status_code == 200:
-                return response.json()["data"][0]["embedding"]
-            elif response.status_code == 502:  # Bad Gateway
+                items = sorted(response.json()["data"], key=lambda item: item["index"])
+                return [item["embedding"] for item in items]
+            elif response.status_code in _RETRY_STATUS_CODES:  # レート制限・ゲートウェイエラー
                 if attempt < max_retries - 1:  # まだリトライ可能
-                    print(f"Bad Gateway error, retrying in {retry_delay} seconds... (attempt {attempt + 1}/{max_retries})")
-                    time.sleep(retry_delay)
+                    delay = _retry_after(response, retry_delay)
+                    print(f"Status {response.status_code}, retrying in {delay} seconds... (attempt {attempt + 1}/{max_retries})")
+                    time.sleep(delay)
                     continue
             raise Exception(f"Error getting embedding (status code {response.status_code}): {response.text}")
         except Exception as e:
@@ -55,68 +177,185 @@ def get_embedding(text: str, max_retries: int = 3, retry_delay: int = 5) -> List
                 continue
             raise e  # 最後の試行でもエラーの場合は例外を投げる
 
+def get_embedding(text: str, max_retries: int = 3, retry_delay: int = 5) -> List[float]:
+    """Jina AI APIを使用してテキストのembeddingを取得"""
+    return get_embeddings([text], max_retries, retry_delay)[0]
+
+def _iter_batches(items: Iterable, size: int = EMBEDDING_BATCH_SIZE) -> Iterator[List]:
+    """itemsをsize件ずつのリストに分割"""
+    iterator = iter(items)
+    while True:
+        batch = list(islice(iterator, size))
+        if not batch:
+            return
+        yield batch
+
+def _embed_batch(texts: List[str]) -> List[List[float]]:
+    """1バッチ分のembeddingを取得（ワーカースレッドで実行）
+
+    キャッシュにあるテキストはAPIに送らず、新たに取得した分はキャッシュに追加する。
+    """
+    embeddings = _embedding_cache.get_many(texts)
+    missing = [text for text in texts if text not in embeddings]
+    if missing:
+        fetched = list(zip(missing, get_embeddings(missing)))
+        _embedding_cache.put_many(fetched)
+        embeddings.update(fetched)
+    return [embeddings[text] for text in texts]
+
+def embed_and_save(pending: List[Tuple[str, str, str, str]], regulation_id: str) -> None:
+    """(source_type, source_id, content_type, input_text) のリストをバッチでembeddingして保存
+
+    同一のinput_textは1回だけembeddingする。バッチごとのAPIリクエストは
+    EMBEDDING_CONCURRENCY本まで並列に実行し、保存は入力順に行う。
+    """
+    items_by_text: Dict[str, List[Tuple[str, str, str, str]]] = {}
+    for item in pending:
+        items_by_text.setdefault(item[3], []).append(item)
+
+    batches = list(_iter_batches(items_by_text))
+    if not batches:
+        return
+    with ThreadPoolExecutor(max_workers=EMBEDDING_CONCURRENCY) as executor:
+        for batch, embeddings in zip(batches, executor.map(_embed_batch, batches)):
+            for text, embedding in zip(batch, embeddings):
+                for source_type, source_id, content_type, input_text in items_by_text[text]:
+                    save_embedding(source_type, source_id, regulation_id, content_type,
+                                 input_text, embedding)
+    flush_embeddings(force=True)
+
+def to_vector_literal(embedding: List[float]) -> str:
+    """embeddingをpgvectorのテキスト表現（'[0.1,0.2,...]'）に変換
+
+    JSONの浮動小数点配列より短く、PostgREST経由・直接接続のどちらでも
+    vector列にそのまま渡せる。
+    """
+    return '[' + ','.join(f'{value:.6g}' for value in embedding) + ']'
+
 def save_embedding(source_type: str, source_id: str, regulation_id: str, 
                   content_type: str, input_text: str, embedding: List[float]) -> None:
-    """embeddingをデータベースに保存"""
-    try:
-        supabase.table('embeddings').insert({
-            'source_type': source_type,
-            'source_id': source_id,
-            'regulation_id': regulation_id,
-            'language_code': 'en',
-            'is_original': True,
-            'content_type': content_type,
-            'input_text': input_text,
-            'embedding': embedding,
-            'model_name': 'jina-embeddings-v3',
-            'model_version': 'base'
-        }).execute()
-        print(f"Saved embedding for {source_type} {source_id}")
-    except Exception as e:
-        print(f"Error saving embedding for {source_type} {source_id}: {e}")
-        raise e
-
-def check_existing_embedding(source_type: str, source_id: str, content_type: str = None) -> bool:
-    """既存のembeddingの存在チェック"""
-    query = supabase.table('embeddings')\
-        .select('id')\
-        .eq('source_type', source_type)\
-        .eq('source_id', source_id)
-    
-    if content_type:
-        query = query.eq('content_type', content_type)
+    """embeddingを保存キューに追加（EMBEDDING_INSERT_BATCH_SIZE件ごとにまとめてINSERT）"""
+    row = {
+        'source_type': source_type,
+        'source_id': source_id,
+        'regulation_id': regulation_id,
+        'language_code': 'en',
+        'is_original': True,
+        'content_type': content_type,
+        'input_text': input_text,
+        'embedding': to_vector_literal(embedding),
+        'model_name': 'jina-embeddings-v3',
+        'model_version': 'base'
+    }
+    with _pending_lock:
+        _pending_embeddings.append(row)
+    flush_embeddings()
+
+EMBEDDING_COLUMNS = (
+    'source_type', 'source_id', 'regulation_id', 'language_code', 'is_original',
+    'content_type', 'input_text', 'embedding', 'model_name', 'model_version'
+)
+
+def _get_db_connection():
+    """Postgresへの直接接続を取得（初回と切断後のみ接続）"""
+    global _db_conn
+    if _db_conn is None or _db_conn.closed:
+        _db_conn = psycopg2.connect(SUPABASE_DB_URL)
+    return _db_conn
+
+def _close_db_connection() -> None:
+    """直接接続が開いていれば閉じる"""
+    if _db_conn is not None and not _db_conn.closed:
+        _db_conn.close()
+
+atexit.register(_close_db_connection)
+
+def _insert_embeddings_direct(rows: List[Dict[str, Any]]) -> None:
+    """複数行INSERTでembeddingをPostgresに直接保存"""
+    conn = _get_db_connection()
+    with conn:
+        with conn.cursor() as cur:
+            execute_values(
+                cur,
+                f"INSERT INTO embeddings ({', '.join(EMBEDDING_COLUMNS)}) VALUES %s "
+                "ON CONFLICT DO NOTHING",
+                [tuple(row[column] for column in EMBEDDING_COLUMNS) for row in rows],
+                page_size=EMBEDDING_INSERT_BATCH_SIZE
+            )
+
+def flush_embeddings(force: bool = False) -> None:
+    """保存キューのembeddingを1回のINSERTでデータベースに保存
     
-    result = query.execute()
-    return bool(result.data)
-
-def get_context_info(article_data: Dict) -> str:
-    """記事のコンテキスト情報（chapter, section, title）を取得"""
-    try:
-        # Chapter情報の取得
-        chapter = supabase.table('chapters')\
-            .select('chapter_number, title')\
-            .eq('id', article_data['chapter_id'])\
-            .single()\
+    INSERTが失敗した行はキューに残し、次回のflushで再度保存を試みる。
+    """
+    # 直接接続は共有しているため、INSERTもロック内で直列に行う
+    with _pending_lock:
+        if not _pending_embeddings:
+            return
+        if not force and len(_pending_embeddings) < EMBEDDING_INSERT_BATCH_SIZE:
+            return
+        rows = list(_pending_embeddings)
+        try:
+            if SUPABASE_DB_URL:
+                _insert_embeddings_direct(rows)
+            else:
+                supabase.table('embeddings').insert(rows).execute()
+            # コミットが済んでからキューから取り除く
+            _pending_embeddings.clear()
+            print(f"Saved {len(rows)} embeddings")
+        except Exception as e:
+            print(f"Error saving {len(rows)} embeddings: {e}")
+            raise e
+
+def get_existing_embeddings(source_type: str, source_ids: List[str]) -> Dict[str, Set[str]]:
+    """既存のembeddingを一括取得し、source_id -> content_typeの集合 を返す"""
+    existing: Dict[str, Set[str]] = {}
+    # URLが長くなりすぎないよう、IN句は一定件数ごとに分割して問い合わせる
+    for id_batch in _iter_batches(source_ids, EXISTENCE_CHECK_BATCH_SIZE):
+        result = supabase.table('embeddings')\
+            .select('source_id, content_type')\
+            .eq('source_type', source_type)\
+            .in_('source_id', id_batch)\
             .execute()
-        
-        chapter_info = f"Chapter {chapter.data['chapter_number']}: {chapter.data['title']}"
-        
-        # Section情報の取得（存在する場合）
-        section_info = ""
-        if article_data['section_id']:
-            section = supabase.table('sections')\
-                .select('section_number, title')\
-                .eq('id', article_data['section_id'])\
-                .single()\
-                .execute()
-            if section.data:
-                section_info = f"\nSection {section.data['section_number']}: {section.data['title']}"
-        
-        return f"{chapter_info}{section_info}"
-    except Exception as e:
-        print(f"Error getting context info: {e}")
+        for row in result.data:
+            existing.setdefault(row['source_id'], set()).add(row['content_type'])
+    return existing
+
+def load_context_labels(regulation_id: str) -> Tuple[Dict[str, str], Dict[str, str]]:
+    """regulation配下のchapter/sectionの見出し文字列をIDごとに一括取得"""
+    chapters = supabase.table('chapters')\
+        .select('id, chapter_number, title')\
+        .eq('regulation_id', regulation_id)\
+        .execute()
+    chapter_labels = {
+        chapter['id']: f"Chapter {chapter['chapter_number']}: {chapter['title']}"
+        for chapter in chapters.data
+    }
+
+    sections = supabase.table('sections')\
+        .select('id, section_number, title, chapters!inner(regulation_id)')\
+        .eq('chapters.regulation_id', regulation_id)\
+        .execute()
+    section_labels = {
+        section['id']: f"Section {section['section_number']}: {section['title']}"
+        for section in sections.data
+    }
+    return chapter_labels, section_labels
+
+def get_context_info(article_data: Dict, chapter_labels: Dict[str, str],
+                     section_labels: Dict[str, str]) -> str:
+    """記事のコンテキスト情報（chapter, section）を取得"""
+    chapter_info = chapter_labels.get(article_data['chapter_id'])
+    if not chapter_info:
         return ""
 
+    # Section情報（存在する場合）
+    section_info = ""
+    if article_data['section_id'] in section_labels:
+        section_info = f"\n{section_labels[article_data['section_id']]}"
+
+    return f"{chapter_info}{section_info}"
+
 def process_chapters(regulation_id: str, max_records: int = None):
     """Chaptersのembeddingを生成"""
     try:
@@ -129,13 +368,13 @@ def process_chapters(regulation_id: str, max_records: int = None):
             
         chapters = query.execute()
         
+        existing = get_existing_embeddings('chapter', [chapter['id'] for chapter in chapters.data])
+        pending = []
         for chapter in chapters.data:
-            if not check_existing_embedding('chapter', chapter['id']):
+            if chapter['id'] not in existing:
                 content = f"Chapter {chapter['chapter_number']}: {chapter['title']}"
-                embedding = get_embedding(content)
-                save_embedding('chapter', chapter['id'], regulation_id, 'full_text', 
-                             content, embedding)
-                time.sleep(0.5)     
+                pending.append(('chapter', chapter['id'], 'full_text', content))
+        embed_and_save(pending, regulation_id)
     except Exception as e:
         print(f"Error processing chapter embeddings: {e}")
         raise e
@@ -153,14 +392,14 @@ def process_sections(regulation_id: str, max_records: int = None):
             
         sections = query.execute()      
         
+        existing = get_existing_embeddings('section', [section['id'] for section in sections.data])
+        pending = []
         for section in sections.data:
-            if not check_existing_embedding('section', section['id']):
+            if section['id'] not in existing:
                 chapter_info = f"Chapter {section['chapters']['chapter_number']}: {section['chapters']['title']}"   
                 content = f"{chapter_info}\nSection {section['section_number']}: {section['title']}"
-                embedding = get_embedding(content)
-                save_embedding('section', section['id'], regulation_id, 'full_text', 
-                             content, embedding)
-                time.sleep(0.5)
+                pending.append(('section', section['id'], 'full_text', content))
+        embed_and_save(pending, regulation_id)
     except Exception as e:
         print(f"Error processing section embeddings: {e}")
         raise e
@@ -177,19 +416,13 @@ def process_recitals(regulation_id: str, max_records: int = None):
             
         recitals = query.execute()
         
+        existing = get_existing_embeddings('recital', [recital['id'] for recital in recitals.data])
+        pending = []
         for recital in recitals.data:
-            if not check_existing_embedding('recital', recital['id']):
+            if recital['id'] not in existing:
                 content = f"Recital {recital['recital_number']}: {recital['text']}"
-                embedding = get_embedding(content)
-                save_embedding(
-                    source_type='recital', 
-                    source_id=recital['id'], 
-                    regulation_id=regulation_id, 
-                    content_type='full_text', 
-                    input_text=content, 
-                    embedding=embedding
-                )
-                time.sleep(0.5)
+                pending.append(('recital', recital['id'], 'full_text', content))
+        embed_and_save(pending, regulation_id)
     except Exception as e:
         print(f"Error processing recital embeddings: {e}")
         raise e
@@ -197,40 +430,24 @@ def process_recitals(regulation_id: str, max_records: int = None):
 def process_paragraphs(regulation_id: str, max_records: int = None):
     """Paragraphsのembeddingを生成"""
     try:
-        # regulation_idに紐づくarticlesのIDを取得
-        articles = supabase.table('articles')\
-            .select('id')\
-            .eq('regulation_id', regulation_id)\
-            .execute()
-        
-        article_ids = [article['id'] for article in articles.data]
-        
-        # 該当するarticlesに属するparagraphsを取得      
+        # 該当するregulationのarticlesに属するparagraphsを記事番号と合わせて取得
         query = supabase.table('paragraphs')\
-            .select('id, paragraph_number, content_full, article_id')\
-            .in_('article_id', article_ids)
+            .select('id, paragraph_number, content_full, article_id, articles!inner(article_number, regulation_id)')\
+            .eq('articles.regulation_id', regulation_id)
         
         if max_records:
             query = query.limit(max_records)
 
         paragraphs = query.execute()
         
+        existing = get_existing_embeddings('paragraph', [paragraph['id'] for paragraph in paragraphs.data])
+        pending = []
         for paragraph in paragraphs.data:
-            if not check_existing_embedding('paragraph', paragraph['id']):
-                # 記事番号の取得
-                article = supabase.table('articles')\
-                    .select('article_number')\
-                    .eq('id', paragraph['article_id'])\
-                    .single()\
-                    .execute()
-                
+            if paragraph['id'] not in existing:
                 # シンプルなコンテンツの作成
-                full_content = f"Article {article.data['article_number']}, Paragraph {paragraph['paragraph_number']}\n\n{paragraph['content_full']}"
-                
-                embedding = get_embedding(full_content)
-                save_embedding('paragraph', paragraph['id'], regulation_id, 'full_text', 
-                             full_content, embedding)
-                time.sleep(0.5)
+                full_content = f"Article {paragraph['articles']['article_number']}, Paragraph {paragraph['paragraph_number']}\n\n{paragraph['content_full']}"
+                pending.append(('paragraph', paragraph['id'], 'full_text', full_content))
+        embed_and_save(pending, regulation_id)
     except Exception as e:
         print(f"Error processing paragraph embeddings: {e}")
         raise e
@@ -251,13 +468,13 @@ def process_definition_subparagraphs(regulation_id: str, max_records: int = None
         # paragraph_elementsから該当するsubparagraphを取得
         elements = query.execute()
         
+        existing = get_existing_embeddings('subparagraph', [element['id'] for element in elements.data])
+        pending = []
         for element in elements.data:
-            if not check_existing_embedding('subparagraph', element['id']):
+            if element['id'] not in existing:
                 content = f"Definition {element['element_id']}: {element['content']}"
-                embedding = get_embedding(content)
-                save_embedding('definition', element['id'], regulation_id, 'full_text', 
-                             content, embedding)
-                time.sleep(0.5)
+                pending.append(('definition', element['id'], 'full_text', content))
+        embed_and_save(pending, regulation_id)
     except Exception as e:
         print(f"Error processing definition subparagraphs: {e}")
         raise e
@@ -274,25 +491,25 @@ def process_articles(regulation_id: str, max_records: int = None):
             
         articles = query.execute()
         
+        # chapter/sectionの見出しは記事間で共通なので最初にまとめて取得
+        chapter_labels, section_labels = load_context_labels(regulation_id)
+        existing = get_existing_embeddings('article', [article['id'] for article in articles.data])
+        pending = []
         for article in articles.data:
+            existing_types = existing.get(article['id'], set())
             # コンテキスト情報の取得
-            context_info = get_context_info(article)
+            context_info = get_context_info(article, chapter_labels, section_labels)
             
             # title_only embedding
-            if not check_existing_embedding('article', article['id'], 'title_only'):
+            if 'title_only' not in existing_types:
                 title_content = f"{context_info}\nArticle {article['article_number']}: {article['title']}"
-                title_embedding = get_embedding(title_content)
-                save_embedding('article', article['id'], regulation_id, 'title_only', 
-                             title_content, title_embedding)
-                time.sleep(0.5)
+                pending.append(('article', article['id'], 'title_only', title_content))
             
             # full_text embedding
-            if not check_existing_embedding('article', article['id'], 'full_text'):
+            if 'full_text' not in existing_types:
                 full_content = f"{context_info}\nArticle {article['article_number']}: {article['title']}\n\n{article['content_full']}"
-                full_embedding = get_embedding(full_content)
-                save_embedding('article', article['id'], regulation_id, 'full_text', 
-                             full_content, full_embedding)
-                time.sleep(0.5)
+                pending.append(('article', article['id'], 'full_text', full_content))
+        embed_and_save(pending, regulation_id)
     except Exception as e:
         print(f"Error processing article embeddings: {e}")
         raise e
@@ -309,18 +526,49 @@ def process_annexes(regulation_id: str, max_records: int = None):
             
         annexes = query.execute()
         
+        existing = get_existing_embeddings('annex', [annex['id'] for annex in annexes.data])
+        pending = []
         for annex in annexes.data:
-            if not check_existing_embedding('annex', annex['id']):
+            if annex['id'] not in existing:
                 # contentはJSONBなので、文字列に変換
                 content = json.dumps(annex['content'])
-                embedding = get_embedding(content)
-                save_embedding('annex', annex['id'], regulation_id, 'full_text', 
-                             content, embedding)
-                time.sleep(0.5)
+                pending.append(('annex', annex['id'], 'full_text', content))
+        embed_and_save(pending, regulation_id)
     except Exception as e:
         print(f"Error processing annex embeddings: {e}")
         raise e
 
+PROCESSORS = {
+    'chapters': process_chapters,
+    'sections': process_sections,
+    'recitals': process_recitals,
+    'paragraphs': process_paragraphs,
+    'definition subparagraphs': process_definition_subparagraphs,
+    'articles': process_articles,
+    'annexes': process_annexes,
+}
+
+def process_all(regulation_id: str, limits: Dict[str, Optional[int]]) -> None:
+    """全種別のembedding生成を並列に実行
+
+    Jina APIのリクエスト数はモジュール共通のレートリミッターで制限される。
+    いずれかが失敗した場合は、全種別の終了を待ってから最初の例外を送出する。
+    """
+    with ThreadPoolExecutor(max_workers=len(PROCESSORS)) as executor:
+        futures = {}
+        for name, processor in PROCESSORS.items():
+            print(f"\nProcessing {name}...")
+            futures[name] = executor.submit(processor, regulation_id, limits.get(name))
+
+    errors = []
+    for name, future in futures.items():
+        error = future.exception()
+        if error:
+            print(f"Error processing {name}: {error}")
+            errors.append(error)
+    if errors:
+        raise errors[0]
+
 def main():
     """メイン処理"""
     try:
@@ -372,32 +620,23 @@ def main():
         annexes_limit_str = input("How many annexes to process? (empty=all): ")
         annexes_limit = int(annexes_limit_str) if annexes_limit_str else None
 
-        # 各種embeddingの生成（limit制限なし）
-        print(f"\nProcessing chapters...")
-        process_chapters(regulation_id, chapters_limit)
-
-        print(f"\nProcessing sections...")
-        process_sections(regulation_id, sections_limit)
-
-        print(f"\nProcessing recitals...")
-        process_recitals(regulation_id, recitals_limit)
-
-        print(f"\nProcessing paragraphs...")
-        process_paragraphs(regulation_id, paragraphs_limit)
-
-        print(f"\nProcessing definition subparagraphs...")
-        process_definition_subparagraphs(regulation_id, definition_subparagraphs_limit) 
-
-        print(f"\nProcessing articles...")
-        process_articles(regulation_id, articles_limit)
-
-        print(f"\nProcessing annexes...")
-        process_annexes(regulation_id, annexes_limit)
+        # 各種embeddingの生成（対象テーブルが独立しているため並列に実行）
+        process_all(regulation_id, {
+            'chapters': chapters_limit,
+            'sections': sections_limit,
+            'recitals': recitals_limit,
+            'paragraphs': paragraphs_limit,
+            'definition subparagraphs': definition_subparagraphs_limit,
+            'articles': articles_limit,
+            'annexes': annexes_limit,
+        })
 
         print("\nAll processing completed successfully")
     except Exception as e:
         print(f"Error: {e}")
         raise e
+    finally:
+        flush_embeddings(force=True)
 
 if __name__ == "__main__":
     main() 
\ No newline at end of file
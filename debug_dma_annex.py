@@ -3,135 +3,208 @@
 Debug script to test DMA annex extraction
 """
 
+import hashlib
+import sys
+import time
+from pathlib import Path
 import requests
-from bs4 import BeautifulSoup
+from lxml import etree, html as lxml_html
 import re
 
-def main():
-    # Fetch DMA HTML
-    url = "https://eur-lex.europa.eu/legal-content/EN/TXT/HTML/?uri=CELEX:32022R1925"
+# Annex header patterns, compiled once at import
+_ANNEX_RE = re.compile(r'ANNEX\s+([IVXLC]+|[A-Z])')
+
+def _has_class(cls):
+    """XPath predicate for an exact class token match."""
+    return f"contains(concat(' ', normalize-space(@class), ' '), ' {cls} ')"
+
+_UPPERCASE = "translate(string(.), 'abcdefghijklmnopqrstuvwxyz', 'ABCDEFGHIJKLMNOPQRSTUVWXYZ')"
+
+# Any element carrying one of the annex header classes (diagnostic union)
+_ANNEX_CLASS_XPATH = etree.XPath(
+    f"//*[{_has_class('oj-doc-ti-annex')} or {_has_class('oj-ti-annex')} or {_has_class('oj-doc-ti')}]"
+)
+# <p> annex headers whose text contains ANNEX (current algorithm)
+_ANNEX_HEADER_XPATH = etree.XPath(
+    f"//p[{_has_class('oj-doc-ti-annex')} or {_has_class('oj-ti-annex')} or {_has_class('oj-doc-ti')}]"
+    f"[contains({_UPPERCASE}, 'ANNEX')]"
+)
+_ANNEX_CONTAINER_XPATH = etree.XPath("//div[contains(@id, 'anx_')]")
+_CONTAINER_TITLE_XPATH = etree.XPath(f".//p[{_has_class('oj-doc-ti')}]")
+_CONTAINER_SECTION_XPATH = etree.XPath(f".//p[{_has_class('oj-ti-grseq-1')}]")
+_HIDDEN_XPATH = etree.XPath("//*[contains(@style, 'display:none')]")
+
+# Classes that mark a <p> as an annex header
+ANNEX_HEADER_CLASSES = frozenset({'oj-doc-ti-annex', 'oj-ti-annex', 'oj-doc-ti'})
+
+CACHE_DIR = Path(".cache")
+CACHE_TTL_SECONDS = 24 * 60 * 60
+
+def fetch_html(url):
+    """Fetch a page, reusing a copy cached on disk for up to a day."""
+    cache_file = CACHE_DIR / f"{hashlib.sha1(url.encode()).hexdigest()}.html"
+    if cache_file.exists() and time.time() - cache_file.stat().st_mtime < CACHE_TTL_SECONDS:
+        print(f"Using cached HTML: {cache_file}")
+        return cache_file.read_bytes()
     
-    print("Fetching DMA HTML...")
     response = requests.get(url, headers={
         'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
     })
     response.raise_for_status()
     
-    soup = BeautifulSoup(response.text, 'html.parser')
-    print(f"HTML fetched successfully, length: {len(response.text)} characters")
-    
-    # Test different selectors for annex headers
-    selectors_to_test = [
-        'p.oj-doc-ti-annex',
-        'p.oj-ti-annex', 
-        'p.oj-doc-ti',
-        '.oj-doc-ti',
-        '.oj-ti-annex',
-        '.oj-doc-ti-annex'
-    ]
-    
-    print("\n=== Testing CSS Selectors ===")
-    for selector in selectors_to_test:
-        elements = soup.select(selector)
-        print(f"\nSelector '{selector}': Found {len(elements)} elements")
+    CACHE_DIR.mkdir(exist_ok=True)
+    cache_file.write_bytes(response.content)
+    return response.content
+
+def _classes(elem):
+    """Class tokens of an lxml element."""
+    return elem.get('class', '').split()
+
+def main():
+    # Fetch DMA HTML
+    url = "https://eur-lex.europa.eu/legal-content/EN/TXT/HTML/?uri=CELEX:32022R1925"
+    
+    print("Fetching DMA HTML...")
+    html = fetch_html(url)
+    
+    tree = lxml_html.fromstring(html)
+    print(f"HTML fetched successfully, length: {len(html)} bytes")
+    
+    # Buffer the report and write it once instead of printing line by line
+    report_lines = []
+    emit = report_lines.append
+    
+    try:
+        # text_content() walks every descendant, so compute each element's text once.
+        # Unhiding the display:none spans below keeps text_content() output the same,
+        # so cached entries stay valid. Keys are the elements themselves, which keeps
+        # lxml's proxy objects alive and their identity stable.
+        text_cache = {}
+    
+        def text_of(elem):
+            """Return (stripped text, uppercased text) for an element, memoized."""
+            if elem not in text_cache:
+                text = elem.text_content().strip()
+                text_cache[elem] = (text, text.upper())
+            return text_cache[elem]
+    
+        # Test different selectors for annex headers
+        selectors_to_test = [
+            'p.oj-doc-ti-annex',
+            'p.oj-ti-annex', 
+            'p.oj-doc-ti',
+            '.oj-doc-ti',
+            '.oj-ti-annex',
+            '.oj-doc-ti-annex'
+        ]
+    
+        # Evaluate the compiled class union once, then bucket the matches
+        # per selector ('tag.class' or '.class') by inspecting each element
+        selector_parts = [selector.split('.', 1) for selector in selectors_to_test]
+        matches_by_selector = {selector: [] for selector in selectors_to_test}
+        for elem in _ANNEX_CLASS_XPATH(tree):
+            classes = _classes(elem)
+            for selector, (tag, cls) in zip(selectors_to_test, selector_parts):
+                if cls in classes and (not tag or elem.tag == tag):
+                    matches_by_selector[selector].append(elem)
+    
+        emit("\n=== Testing CSS Selectors ===")
+        for selector in selectors_to_test:
+            elements = matches_by_selector[selector]
+            emit(f"\nSelector '{selector}': Found {len(elements)} elements")
         
-        for i, elem in enumerate(elements):
-            text = elem.get_text().strip()
-            if 'ANNEX' in text.upper():
-                print(f"  [{i}] MATCH: {text}")
-                print(f"      ID: {elem.get('id', 'None')}")
-                print(f"      Classes: {elem.get('class', [])}")
-                print(f"      Parent: {elem.parent.name if elem.parent else 'None'}")
-                if elem.parent:
-                    print(f"      Parent ID: {elem.parent.get('id', 'None')}")
-                    print(f"      Parent Classes: {elem.parent.get('class', [])}")
-            else:
-                print(f"  [{i}] No match: {text[:50]}...")
-    
-    # Test for text containing "ANNEX"
-    print("\n=== Searching for 'ANNEX' text ===")
-    all_p_tags = soup.find_all('p')
-    annex_elements = []
-    
-    for p in all_p_tags:
-        text = p.get_text().strip()
-        if 'ANNEX' in text.upper():
-            annex_elements.append(p)
-            print(f"Found ANNEX text: '{text}'")
-            print(f"  Classes: {p.get('class', [])}")
-            print(f"  ID: {p.get('id', 'None')}")
-            print(f"  Parent: {p.parent.name if p.parent else 'None'}")
-            if p.parent:
-                print(f"  Parent ID: {p.parent.get('id', 'None')}")
-                print(f"  Parent Classes: {p.parent.get('class', [])}")
-            print()
-    
-    # Look for div containers with annex IDs
-    print("\n=== Looking for annex containers ===")
-    annex_containers = soup.find_all('div', id=re.compile(r'anx_'))
-    print(f"Found {len(annex_containers)} annex containers")
-    
-    for container in annex_containers:
-        print(f"Container ID: {container.get('id')}")
-        print(f"Container classes: {container.get('class', [])}")
+            for i, elem in enumerate(elements):
+                text, upper_text = text_of(elem)
+                if 'ANNEX' in upper_text:
+                    parent = elem.getparent()
+                    emit(f"  [{i}] MATCH: {text}")
+                    emit(f"      ID: {elem.get('id', 'None')}")
+                    emit(f"      Classes: {_classes(elem)}")
+                    emit(f"      Parent: {parent.tag if parent is not None else 'None'}")
+                    if parent is not None:
+                        emit(f"      Parent ID: {parent.get('id', 'None')}")
+                        emit(f"      Parent Classes: {_classes(parent)}")
+                else:
+                    emit(f"  [{i}] No match: {text[:50]}...")
+    
+        # Test for text containing "ANNEX"
+        emit("\n=== Searching for 'ANNEX' text ===")
+        annex_elements = []
+    
+        for p in tree.iter('p'):
+            text, upper_text = text_of(p)
+            if 'ANNEX' in upper_text:
+                annex_elements.append(p)
+                parent = p.getparent()
+                emit(f"Found ANNEX text: '{text}'")
+                emit(f"  Classes: {_classes(p)}")
+                emit(f"  ID: {p.get('id', 'None')}")
+                emit(f"  Parent: {parent.tag if parent is not None else 'None'}")
+                if parent is not None:
+                    emit(f"  Parent ID: {parent.get('id', 'None')}")
+                    emit(f"  Parent Classes: {_classes(parent)}")
+                emit("")
+    
+        # Look for div containers with annex IDs
+        emit("\n=== Looking for annex containers ===")
+        annex_containers = _ANNEX_CONTAINER_XPATH(tree)
+        emit(f"Found {len(annex_containers)} annex containers")
+    
+        for container in annex_containers:
+            emit(f"Container ID: {container.get('id')}")
+            emit(f"Container classes: {_classes(container)}")
         
-        # Look for title elements within
-        title_elements = container.find_all('p', class_='oj-doc-ti')
-        for title in title_elements:
-            print(f"  Title: '{title.get_text().strip()}'")
+            # Look for title elements within
+            for title in _CONTAINER_TITLE_XPATH(container):
+                emit(f"  Title: '{text_of(title)[0]}'")
         
-        # Look for section headers
-        section_headers = container.find_all('p', class_='oj-ti-grseq-1')
-        for header in section_headers:
-            print(f"  Section: '{header.get_text().strip()}'")
-        print()
-    
-    # Test the current algorithm from the code
-    print("\n=== Testing Current Algorithm ===")
-    # Step 1: Un-truncate hidden text
-    for span in soup.select('[style*="display:none"]'):
-        span.replace_with(span.get_text())
-    
-    # Step 2: Find annex headers
-    header_q = 'p.oj-doc-ti-annex, p.oj-ti-annex, p.oj-doc-ti'
-    headers = []
-    
-    for header in soup.select(header_q):
-        text = header.get_text().strip()
-        if 'ANNEX' in text.upper():
-            headers.append(header)
-    
-    print(f"Current algorithm found {len(headers)} annex headers")
-    
-    for i, header in enumerate(headers):
-        text = header.get_text().strip()
-        print(f"Header {i+1}: '{text}'")
+            # Look for section headers
+            for header in _CONTAINER_SECTION_XPATH(container):
+                emit(f"  Section: '{text_of(header)[0]}'")
+            emit("")
+    
+        # Test the current algorithm from the code
+        emit("\n=== Testing Current Algorithm ===")
+        # Step 1: Un-truncate hidden text
+        for span in _HIDDEN_XPATH(tree):
+            span.drop_tag()
+    
+        # Step 2: Find annex headers (class and ANNEX text filters run inside the XPath)
+        headers = _ANNEX_HEADER_XPATH(tree)
+    
+        emit(f"Current algorithm found {len(headers)} annex headers")
+    
+        for i, header in enumerate(headers):
+            text = text_of(header)[0]
+            emit(f"Header {i+1}: '{text}'")
         
-        # Try to extract annex ID
-        annex_match = re.search(r'ANNEX\s+([IVXLC]+|[A-Z])', text)
-        if annex_match:
-            annex_id = annex_match.group(1)
-            print(f"  Annex ID: {annex_id}")
-        else:
-            print(f"  No annex ID found in: {text}")
+            # Try to extract annex ID
+            annex_match = _ANNEX_RE.search(text)
+            if annex_match:
+                annex_id = annex_match.group(1)
+                emit(f"  Annex ID: {annex_id}")
+            else:
+                emit(f"  No annex ID found in: {text}")
         
-        # Look for content after this header
-        current = header.next_sibling
-        content_count = 0
-        while current and content_count < 5:  # Just look at first few siblings
-            if current.name and current.name in ['p', 'div', 'table', 'ul', 'ol']:
-                # Check if this is another annex header
-                if (current.name == 'p' and 
-                    any(cls in current.get('class', []) for cls in ['oj-doc-ti-annex', 'oj-ti-annex', 'oj-doc-ti']) and
-                    'ANNEX' in current.get_text().upper()):
-                    print(f"  Found next annex header, stopping")
+            # Look for content after this header (element siblings only)
+            content_count = 0
+            for sibling in header.itersiblings():
+                if content_count >= 5:  # Just look at first few siblings
                     break
+                if sibling.tag in ['p', 'div', 'table', 'ul', 'ol']:
+                    # Check if this is another annex header
+                    if (sibling.tag == 'p' and 
+                        not ANNEX_HEADER_CLASSES.isdisjoint(_classes(sibling)) and
+                        'ANNEX' in text_of(sibling)[1]):
+                        emit(f"  Found next annex header, stopping")
+                        break
                 
-                content_text = current.get_text().strip()[:100]
-                print(f"  Content {content_count}: {current.name} - {content_text}...")
-                content_count += 1
-            current = current.next_sibling
-        print()
+                    content_text = sibling.text_content().strip()[:100]
+                    emit(f"  Content {content_count}: {sibling.tag} - {content_text}...")
+                    content_count += 1
+            emit("")
+    finally:
+        sys.stdout.write("\n".join(report_lines) + "\n")
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
@@ -13,15 +13,12 @@ EDPBガイドラインPDFの処理用CLIツール
 import click
 import os
 import sys
+from contextlib import closing
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from pathlib import Path
 from dotenv import load_dotenv
-from edpb_processor import EDPBProcessor
 import logging
 from rich.console import Console
-from rich.progress import Progress, SpinnerColumn, TextColumn
-from rich.table import Table
-from rich.panel import Panel
-from rich import print as rprint
 
 # 環境変数読み込み
 load_dotenv()
@@ -40,6 +37,17 @@ def setup_logging(verbose: bool = False):
         ]
     )
 
+def open_readonly_connection(db_path: str):
+    """参照系コマンド用のSQLite接続を開く（読み取り専用・mmap有効）"""
+    import sqlite3
+    
+    conn = sqlite3.connect(db_path, isolation_level=None)
+    conn.row_factory = sqlite3.Row
+    conn.execute("PRAGMA query_only = 1")
+    conn.execute("PRAGMA cache_size = -20000")
+    conn.execute("PRAGMA mmap_size = 268435456")
+    return conn
+
 @click.group()
 @click.option('--verbose', '-v', is_flag=True, help='詳細ログ出力を有効にする')
 @click.pass_context
@@ -54,9 +62,16 @@ def cli(ctx, verbose):
 @click.option('--db-path', default='eu_hierarchical.db', help='データベースファイルパス')
 @click.option('--chunk-size', default=1000, help='チャンクサイズ')
 @click.option('--chunk-overlap', default=100, help='チャンクオーバーラップ')
+@click.option('--embed-batch-size', default=64, show_default=True, type=click.IntRange(1, 100),
+              help='1回の埋め込みAPI呼び出しで送るチャンク数（最大100）')
+@click.option('--embed-concurrency', default=4, show_default=True, help='同時に送る埋め込みAPIリクエスト数')
 @click.pass_context
-def process_single(ctx, pdf_path: Path, db_path: str, chunk_size: int, chunk_overlap: int):
+def process_single(ctx, pdf_path: Path, db_path: str, chunk_size: int, chunk_overlap: int, embed_batch_size: int,
+                   embed_concurrency: int):
     """単一PDFファイルを処理する"""
+    from edpb_processor import EDPBProcessor
+    from rich.progress import Progress, SpinnerColumn, TextColumn
+    
     gemini_api_key = os.getenv('GEMINI_API_KEY')
     if not gemini_api_key:
         console.print("[red]Error: GEMINI_API_KEY environment variable not set[/red]")
@@ -67,10 +82,12 @@ def process_single(ctx, pdf_path: Path, db_path: str, chunk_size: int, chunk_ove
             gemini_api_key=gemini_api_key,
             db_path=db_path,
             chunk_size=chunk_size,
-            chunk_overlap=chunk_overlap
+            chunk_overlap=chunk_overlap,
+            embed_batch_size=embed_batch_size,
+            embed_concurrency=embed_concurrency
         )
         
-        with Progress(
+        with closing(processor), Progress(
             SpinnerColumn(),
             TextColumn("[progress.description]{task.description}"),
             console=console
@@ -94,65 +111,87 @@ def process_single(ctx, pdf_path: Path, db_path: str, chunk_size: int, chunk_ove
 @click.option('--db-path', default='eu_hierarchical.db', help='データベースファイルパス')
 @click.option('--chunk-size', default=1000, help='チャンクサイズ')
 @click.option('--chunk-overlap', default=100, help='チャンクオーバーラップ')
+@click.option('--embed-batch-size', default=64, show_default=True, type=click.IntRange(1, 100),
+              help='1回の埋め込みAPI呼び出しで送るチャンク数（最大100）')
+@click.option('--embed-concurrency', default=4, show_default=True, help='PDFごとに同時に送る埋め込みAPIリクエスト数')
 @click.option('--continue-on-error', is_flag=True, help='エラー時も処理を継続する')
+@click.option('--workers', default=4, show_default=True, help='並列処理するPDFの数')
 @click.pass_context
-def process_batch(ctx, directory_path: Path, db_path: str, chunk_size: int, chunk_overlap: int, continue_on_error: bool):
+def process_batch(ctx, directory_path: Path, db_path: str, chunk_size: int, chunk_overlap: int,
+                  embed_batch_size: int, embed_concurrency: int, continue_on_error: bool, workers: int):
     """ディレクトリ内のすべてのPDFファイルをバッチ処理する"""
+    from edpb_processor import EDPBProcessor
+    from rich.progress import Progress
+    
     gemini_api_key = os.getenv('GEMINI_API_KEY')
     if not gemini_api_key:
         console.print("[red]Error: GEMINI_API_KEY environment variable not set[/red]")
         sys.exit(1)
     
     try:
-        processor = EDPBProcessor(
-            gemini_api_key=gemini_api_key,
-            db_path=db_path,
-            chunk_size=chunk_size,
-            chunk_overlap=chunk_overlap
-        )
-        
         # PDFファイル一覧取得
-        pdf_files = list(directory_path.glob("*.pdf"))
+        with os.scandir(directory_path) as entries:
+            pdf_files = sorted(
+                Path(entry.path) for entry in entries
+                if entry.is_file() and entry.name.lower().endswith('.pdf')
+            )
         if not pdf_files:
             console.print(f"[yellow]No PDF files found in {directory_path}[/yellow]")
             return
         
         console.print(f"[blue]Found {len(pdf_files)} PDF files to process[/blue]")
         
+        # 処理の大半はGemini APIの待ち時間なのでスレッドで並列化する。
+        # process_directoryと同じく1つのEDPBProcessorを全スレッドで共有する
+        # （DB接続はプールから借りるのでスレッド安全で、スキーマ初期化も1回で済む）
+        processor = EDPBProcessor(
+            gemini_api_key=gemini_api_key,
+            db_path=db_path,
+            chunk_size=chunk_size,
+            chunk_overlap=chunk_overlap,
+            embed_batch_size=embed_batch_size,
+            embed_concurrency=embed_concurrency
+        )
+        
         # バッチ処理実行
-        with Progress(console=console) as progress:
+        with closing(processor), Progress(console=console) as progress:
             main_task = progress.add_task("Processing PDFs...", total=len(pdf_files))
             
             results = {"success": 0, "failed": 0, "total": len(pdf_files)}
             failed_files = []
             
-            for pdf_file in pdf_files:
-                progress.update(main_task, description=f"Processing {pdf_file.name}")
+            with ThreadPoolExecutor(max_workers=max(1, workers)) as executor:
+                futures = {executor.submit(processor.process_pdf, pdf_file): pdf_file for pdf_file in pdf_files}
                 
-                try:
-                    success = processor.process_pdf(pdf_file)
+                for future in as_completed(futures):
+                    pdf_file = futures[future]
+                    error = None
+                    try:
+                        success = future.result()
+                    except Exception as e:
+                        success = False
+                        error = e
+                    
                     if success:
                         results["success"] += 1
                         console.print(f"[green]✓ {pdf_file.name}[/green]")
                     else:
                         results["failed"] += 1
                         failed_files.append(pdf_file.name)
-                        console.print(f"[red]✗ {pdf_file.name}[/red]")
-                        
-                        if not continue_on_error:
-                            console.print("[red]Processing stopped due to error. Use --continue-on-error to continue.[/red]")
-                            break
-                            
-                except Exception as e:
-                    results["failed"] += 1
-                    failed_files.append(pdf_file.name)
-                    console.print(f"[red]✗ {pdf_file.name}: {str(e)}[/red]")
+                        if error is not None:
+                            console.print(f"[red]✗ {pdf_file.name}: {str(error)}[/red]")
+                        else:
+                            console.print(f"[red]✗ {pdf_file.name}[/red]")
+                    
+                    progress.advance(main_task)
+                    progress.update(main_task, description=f"Processed {pdf_file.name}")
                     
-                    if not continue_on_error:
+                    if not success and not continue_on_error:
                         console.print("[red]Processing stopped due to error. Use --continue-on-error to continue.[/red]")
+                        # 未着手のPDFはキャンセルし、実行中のものだけ完了を待つ
+                        for pending in futures:
+                            pending.cancel()
                         break
-                
-                progress.advance(main_task)
         
         # 結果サマリー表示
         display_results_summary(results, failed_files)
@@ -166,31 +205,43 @@ def process_batch(ctx, directory_path: Path, db_path: str, chunk_size: int, chun
 def status(db_path: str):
     """処理状況を確認する"""
     import sqlite3
+    from rich.table import Table
     
     try:
-        conn = sqlite3.connect(db_path)
-        conn.row_factory = sqlite3.Row
-        
-        # ガイドライン処理状況
-        cursor = conn.execute("""
-            SELECT processing_status, COUNT(*) as count
-            FROM edpb_guidelines
-            GROUP BY processing_status
-            ORDER BY processing_status
-        """)
-        status_counts = dict(cursor.fetchall())
-        
-        # 最近の処理ログ
-        cursor = conn.execute("""
-            SELECT g.filename, l.processing_step, l.status, l.created_at, l.error_message
-            FROM edpb_processing_log l
-            JOIN edpb_guidelines g ON l.guideline_id = g.guideline_id
-            ORDER BY l.created_at DESC
-            LIMIT 10
-        """)
-        recent_logs = cursor.fetchall()
-        
-        conn.close()
+        with closing(open_readonly_connection(db_path)) as conn:
+            # ガイドライン処理状況（section=0）と最近の処理ログ（section=1）を1クエリで取得
+            cursor = conn.execute("""
+                WITH status_counts AS (
+                    SELECT processing_status, COUNT(*) AS count
+                    FROM edpb_guidelines
+                    GROUP BY processing_status
+                ),
+                recent_logs AS (
+                    SELECT g.filename, l.processing_step, l.status, l.created_at, l.error_message
+                    FROM edpb_processing_log l
+                    JOIN edpb_guidelines g ON l.guideline_id = g.guideline_id
+                    ORDER BY l.created_at DESC
+                    LIMIT 10
+                )
+                SELECT * FROM (
+                    SELECT 0 AS section, processing_status AS status, count,
+                           NULL AS filename, NULL AS processing_step, NULL AS created_at, NULL AS error_message
+                    FROM status_counts
+                    UNION ALL
+                    SELECT 1, status, NULL, filename, processing_step, created_at, error_message
+                    FROM recent_logs
+                )
+                ORDER BY section,
+                         CASE WHEN section = 0 THEN status END,
+                         CASE WHEN section = 1 THEN created_at END DESC
+            """)
+            status_counts = {}
+            recent_logs = []
+            for row in cursor:
+                if row['section'] == 0:
+                    status_counts[row['status']] = row['count']
+                else:
+                    recent_logs.append(row)
         
         # 状況表示
         table = Table(title="EDPB Guidelines Processing Status")
@@ -223,19 +274,17 @@ def status(db_path: str):
 def list_guidelines(db_path: str):
     """保存されているガイドライン一覧を表示する"""
     import sqlite3
+    from rich.table import Table
     
     try:
-        conn = sqlite3.connect(db_path)
-        conn.row_factory = sqlite3.Row
-        
-        cursor = conn.execute("""
-            SELECT guideline_id, filename, title, document_type, version, 
-                   adoption_date, processing_status, created_at
-            FROM edpb_guidelines
-            ORDER BY created_at DESC
-        """)
-        guidelines = cursor.fetchall()
-        conn.close()
+        with closing(open_readonly_connection(db_path)) as conn:
+            cursor = conn.execute("""
+                SELECT guideline_id, filename, title, document_type, version, 
+                       adoption_date, processing_status, created_at
+                FROM edpb_guidelines
+                ORDER BY created_at DESC
+            """)
+            guidelines = cursor.fetchall()
         
         if not guidelines:
             console.print("[yellow]No guidelines found in database[/yellow]")
@@ -275,39 +324,35 @@ def list_guidelines(db_path: str):
 def show_detail(guideline_id: int, db_path: str):
     """特定のガイドラインの詳細情報を表示する"""
     import sqlite3
+    from rich.panel import Panel
+    from rich.table import Table
     
     try:
-        conn = sqlite3.connect(db_path)
-        conn.row_factory = sqlite3.Row
-        
-        # ガイドライン基本情報
-        cursor = conn.execute("""
-            SELECT * FROM edpb_guidelines WHERE guideline_id = ?
-        """, (guideline_id,))
-        guideline = cursor.fetchone()
-        
-        if not guideline:
-            console.print(f"[red]Guideline ID {guideline_id} not found[/red]")
-            return
-        
-        # チャンク情報
-        cursor = conn.execute("""
-            SELECT COUNT(*) as chunk_count, 
-                   SUM(CASE WHEN embedding_status = 'completed' THEN 1 ELSE 0 END) as completed_chunks
-            FROM edpb_chunks WHERE guideline_id = ?
-        """, (guideline_id,))
-        chunk_info = cursor.fetchone()
-        
-        # 処理ログ
-        cursor = conn.execute("""
-            SELECT processing_step, status, processing_time_seconds, created_at, error_message
-            FROM edpb_processing_log 
-            WHERE guideline_id = ?
-            ORDER BY created_at
-        """, (guideline_id,))
-        logs = cursor.fetchall()
-        
-        conn.close()
+        with closing(open_readonly_connection(db_path)) as conn:
+            # ガイドライン基本情報とチャンク集計
+            cursor = conn.execute("""
+                SELECT g.*,
+                       (SELECT COUNT(*) FROM edpb_chunks c
+                        WHERE c.guideline_id = g.guideline_id) AS chunk_count,
+                       (SELECT SUM(CASE WHEN c.embedding_status = 'completed' THEN 1 ELSE 0 END) FROM edpb_chunks c
+                        WHERE c.guideline_id = g.guideline_id) AS completed_chunks
+                FROM edpb_guidelines g
+                WHERE g.guideline_id = ?
+            """, (guideline_id,))
+            guideline = cursor.fetchone()
+        
+            if not guideline:
+                console.print(f"[red]Guideline ID {guideline_id} not found[/red]")
+                return
+        
+            # 処理ログ
+            cursor = conn.execute("""
+                SELECT processing_step, status, processing_time_seconds, created_at, error_message
+                FROM edpb_processing_log 
+                WHERE guideline_id = ?
+                ORDER BY created_at
+            """, (guideline_id,))
+            logs = cursor.fetchall()
         
         # 詳細表示
         panel_content = f"""
@@ -319,7 +364,7 @@ def show_detail(guideline_id: int, db_path: str):
 [bold blue]Page Count:[/bold blue] {guideline['page_count']}
 [bold blue]File Size:[/bold blue] {guideline['file_size_bytes']:,} bytes
 [bold blue]Processing Status:[/bold blue] {guideline['processing_status']}
-[bold blue]Chunks:[/bold blue] {chunk_info['completed_chunks']}/{chunk_info['chunk_count']} completed
+[bold blue]Chunks:[/bold blue] {guideline['completed_chunks']}/{guideline['chunk_count']} completed
 [bold blue]Created:[/bold blue] {guideline['created_at']}
 [bold blue]Updated:[/bold blue] {guideline['updated_at']}
         """
@@ -367,6 +412,8 @@ def show_detail(guideline_id: int, db_path: str):
 
 def display_results_summary(results: dict, failed_files: list):
     """処理結果サマリーを表示"""
+    from rich.table import Table
+    
     total = results['total']
     success = results['success']
     failed = results['failed']
@@ -377,9 +424,11 @@ def display_results_summary(results: dict, failed_files: list):
     table.add_column("Count", style="magenta", justify="right")
     table.add_column("Percentage", style="yellow", justify="right")
     
-    table.add_row("[green]Success[/green]", str(success), f"{success/total*100:.1f}%")
-    table.add_row("[red]Failed[/red]", str(failed), f"{failed/total*100:.1f}%")
-    table.add_row("[blue]Total[/blue]", str(total), "100.0%")
+    # 対象0件でもゼロ除算しないよう、割合の係数を一度だけ計算する
+    inv = 100.0 / total if total else 0.0
+    table.add_row("[green]Success[/green]", str(success), f"{success*inv:.1f}%")
+    table.add_row("[red]Failed[/red]", str(failed), f"{failed*inv:.1f}%")
+    table.add_row("[blue]Total[/blue]", str(total), f"{total*inv:.1f}%")
     
     console.print(table)
     
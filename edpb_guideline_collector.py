@@ -1,10 +1,18 @@
 """EDPB GDPR Guideline Collector"""
 
 import requests
-from bs4 import BeautifulSoup
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from bs4 import BeautifulSoup, SoupStrainer
+from lxml import etree, html as lxml_html
 import os
+import shutil
 from pathlib import Path
 import re
+import threading
+from dataclasses import dataclass
+from typing import Optional
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from urllib.parse import urljoin, urlparse
 from rich.console import Console
 from rich.progress import Progress, SpinnerColumn, TextColumn
@@ -12,53 +20,170 @@ import click
 import json
 from datetime import datetime
 
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
 console = Console()
 
+def _has_class(cls):
+    """XPath predicate for an exact class token match."""
+    return f"contains(concat(' ', normalize-space(@class), ' '), ' {cls} ')"
+
+_LOWER_HREF = "translate(@href, 'ABCDEFGHIJKLMNOPQRSTUVWXYZ', 'abcdefghijklmnopqrstuvwxyz')"
+
+# Listing page queries, compiled once at import
+_VIEWS_ROW_XPATH = etree.XPath(f"//div[{_has_class('views-row')}]")
+_WORKTOOLS_LI_XPATH = etree.XPath(f"//li[.//a[contains({_LOWER_HREF}, '/our-work-tools/')]]")
+_NODE_TITLE_XPATH = etree.XPath(f".//h4[{_has_class('node__title')}]")
+_TITLE_SPAN_XPATH = etree.XPath(f".//span[{_has_class('field--name-title')}]")
+_ROW_ANCHOR_XPATH = etree.XPath(".//a[@href != '']")
+_TITLE_CANDIDATE_XPATH = etree.XPath(".//span[@class] | .//div[@class]")
+_HEADING_TAGS = ('h1', 'h2', 'h3', 'h4', 'h5', 'h6')
+
+# Article 29 page queries: every link, and every title candidate in one document-order walk
+_PAGE_ANCHOR_XPATH = etree.XPath("//a[@href]")
+_ARTICLE29_TITLE_CANDIDATE_XPATH = etree.XPath(
+    "//h1 | //h2 | //h3 | //div[@class] | //span[@class] | //strong | //b"
+)
+
+# Class patterns for the fallback row structures
+_NODE_ARTICLE_CLASS_RE = re.compile(r'node.*article', re.IGNORECASE)
+_NODE_CLASS_RE = re.compile(r'node', re.IGNORECASE)
+_ITEM_DOCUMENT_CLASS_RE = re.compile(r'item.*document', re.IGNORECASE)
+_TITLE_NAME_CLASS_RE = re.compile(r'title|name', re.IGNORECASE)
+
+# Link patterns for consultation, final and Article 29 pages
+_LINKS_ONLY = SoupStrainer('a', href=True)  # Consultation/final pages are only searched for <a href>
+_EC_ARTICLE29_RE = re.compile(r'ec\.europa\.eu.*article29', re.IGNORECASE)
+_DOWNLOAD_RE = re.compile(r'download', re.IGNORECASE)
+_SYSTEM_FILES_RE = re.compile(r'/system/files/', re.IGNORECASE)
+_REDIRECT_DOCUMENT_RE = re.compile(r'(redirection|document)', re.IGNORECASE)
+_TITLE_HEADER_CLASS_RE = re.compile(r'title|header', re.IGNORECASE)
+_CHARSET_RE = re.compile(r'charset=["\']?([\w.:-]+)', re.IGNORECASE)
+
+# Article 29 title clean-up
+# Leading "Article 29 Working Party - " and any "(wp242rev.01)" style reference, removed in one pass
+_WP29_CLEANUP_RE = re.compile(r'^Article 29 Working Party[\s\-]*|\(wp\d+.*?\)', re.IGNORECASE)
+_GUIDELINES_ON_RE = re.compile(r'^Guidelines on\s*', re.IGNORECASE)
+_OPINION_PREFIX_RE = re.compile(r'^Opinion\s*', re.IGNORECASE)
+_STRIP_QUOTES = str.maketrans('', '', '"')
+
+DOWNLOAD_CHUNK_SIZE = 128 * 1024  # Bytes copied per read when saving a PDF
+
+# Lowercase keyword sets for substring checks against casefolded text
+_OTHER_GUIDANCE_KEYWORDS = frozenset({
+    'transparency', 'data protection officer', 'dpo', 'dpia',
+    'impact assessment', 'portability', 'guidance', 'automated',
+    'decision-making', 'profiling', 'position paper', 'derogation',
+    'records of processing', 'opinion'
+})
+_WP29_HEADING_KEYWORDS = ('working party', 'guidelines', 'opinion', 'recommendation', 'wp')
+_WP29_CONTAINER_KEYWORDS = ('working party', 'guidelines', 'opinion', 'wp')
+_WP29_STRONG_KEYWORDS = ('working party', 'guidelines', 'opinion')
+_WP29_TITLE_KEYWORDS = ('article 29', 'working party', 'wp', 'guidelines', 'opinion')
+_DOWNLOAD_WORDS = ('download', 'pdf', 'document', 'file')
+
+# Filename sanitizing
+_UNSAFE_FILENAME_CHARS_RE = re.compile(r'[<>:"/\\|?*]')
+_UNDERSCORE_RUN_RE = re.compile(r'_+')
+
+def _text(elem):
+    """Stripped text of an lxml element, joined like BeautifulSoup's get_text(strip=True)."""
+    return ''.join(piece.strip() for piece in elem.itertext())
+
+def _parse_html(content, content_type=None):
+    """Parse a page from its bytes into an lxml document.
+    
+    lxml rejects str input that starts with an XML encoding declaration (old XHTML
+    pages), so pages are parsed as bytes. A charset in the Content-Type header wins,
+    as it did with response.text; otherwise the page's own declaration is used.
+    """
+    parser = None
+    match = _CHARSET_RE.search(content_type or '')
+    if match:
+        try:
+            parser = lxml_html.HTMLParser(encoding=match.group(1))
+        except LookupError:
+            pass  # Unknown charset: fall back to the page's own declaration
+    return lxml_html.document_fromstring(content, parser=parser)
+
+def _elements_with_class(root, tag, pattern):
+    """Elements of the given tag whose class attribute matches pattern."""
+    return [elem for elem in root.iter(tag) if pattern.search(elem.get('class', ''))]
+
+@dataclass(slots=True)
+class DocEntry:
+    """A guideline listing entry and the links found for it."""
+    title: str
+    doc_type: str
+    consultation_url: Optional[str] = None
+    final_url: Optional[str] = None
+    direct_pdf_url: Optional[str] = None
+
 class EDPBGuidelineCollector:
     """Collects GDPR-related guidelines from EDPB website."""
     
     BASE_URL = "https://www.edpb.europa.eu"
     GUIDELINES_URL = "https://www.edpb.europa.eu/our-work-tools/general-guidance/guidelines-recommendations-best-practices_en"
+    DOCUMENT_WORKERS = 8  # Concurrent PDF lookups/downloads per listing page
+    HTTP_POOL_SIZE = 32  # Keep-alive connections per host; concurrent requests beyond this are not pooled
     
-    def __init__(self, download_dir: str = "edpb_guidelines"):
+    def __init__(self, download_dir: str = "edpb_guidelines", force: bool = False):
         self.download_dir = Path(download_dir)
         self.download_dir.mkdir(exist_ok=True)
+        self.force = force  # Re-download PDFs even if an identical file is already on disk
         self.session = requests.Session()
         self.session.headers.update({
             'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
         })
+        # Keep-alive pool sized for concurrent page/document workers, with retries on gateway errors
+        adapter = HTTPAdapter(
+            pool_connections=16,
+            pool_maxsize=self.HTTP_POOL_SIZE,
+            max_retries=Retry(
+                total=3,
+                backoff_factor=0.3,
+                status_forcelist=[502, 503, 504],
+                raise_on_status=False
+            )
+        )
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
         self.downloaded_files = set()  # Track downloaded filenames to avoid duplicates
+        self._downloaded_files_lock = threading.Lock()  # Pages may be collected from several threads
+        self._lookup_cache = {}  # (lookup kind, url) -> result, shared by all pages of a run
+        self._lookup_cache_lock = threading.Lock()
+        self._cancelled = threading.Event()  # Set by cancel() to skip documents not yet started
     
     def fetch_guidelines_page(self, page_num: int = 0):
-        """Fetch the guidelines page HTML content."""
+        """Fetch the guidelines page HTML content as bytes."""
         url = f"{self.GUIDELINES_URL}?page={page_num}"
         console.print(f"Fetching page {page_num}: {url}")
         
         response = self.session.get(url)
         response.raise_for_status()
-        return response.text
+        return response.content
     
     def extract_all_document_links(self, html_content):
         """Extract both public consultation and final/direct download links."""
-        soup = BeautifulSoup(html_content, 'html.parser')
-        documents = []
+        tree = _parse_html(html_content)
+        documents = {}  # title -> entry; the first row with a usable link wins
         
         # Find all views-row divs that contain guideline entries
-        rows = soup.find_all('div', class_='views-row')
+        rows = _VIEWS_ROW_XPATH(tree)
         
         # If no views-row divs found, look for alternative structures
         if not rows:
             # Alternative structure: look for document containers with different classes
-            rows.extend(soup.find_all('div', class_=re.compile(r'node.*article', re.IGNORECASE)))
-            rows.extend(soup.find_all('article', class_=re.compile(r'node', re.IGNORECASE)))
-            rows.extend(soup.find_all('div', class_=re.compile(r'item.*document', re.IGNORECASE)))
+            rows.extend(_elements_with_class(tree, 'div', _NODE_ARTICLE_CLASS_RE))
+            rows.extend(_elements_with_class(tree, 'article', _NODE_CLASS_RE))
+            rows.extend(_elements_with_class(tree, 'div', _ITEM_DOCUMENT_CLASS_RE))
             
-            # Look for list items that may contain documents
-            list_items = soup.find_all('li')
-            for li in list_items:
-                # Check if list item contains document-like content
-                if li.find('a', href=re.compile(r'/our-work-tools/', re.IGNORECASE)):
-                    rows.append(li)
+            # Look for list items that contain document links
+            rows.extend(_WORKTOOLS_LI_XPATH(tree))
         
         for row in rows:
             # Check if this entry is obsolete
@@ -66,40 +191,43 @@ class EDPBGuidelineCollector:
                 console.print(f"⚠️  Skipping obsolete entry", style="yellow")
                 continue
             
+            # Collect the row's links once; title fallback and link
+            # classification below both work from this list
+            anchors = [(a, a.get('href'), a.get('href').lower()) for a in _ROW_ANCHOR_XPATH(row)]
+            
             # Extract title with multiple fallback strategies
             title = None
-            title_elem = row.find('h4', class_='node__title')
-            
-            if title_elem:
-                title_span = title_elem.find('span', class_='field--name-title')
-                if title_span:
-                    title = title_span.get_text(strip=True)
-                else:
-                    title = title_elem.get_text(strip=True)
+            title_elems = _NODE_TITLE_XPATH(row)
+            
+            if title_elems:
+                title_spans = _TITLE_SPAN_XPATH(title_elems[0])
+                title = _text(title_spans[0] if title_spans else title_elems[0])
             else:
                 # Alternative title extraction methods
-                # Try different heading levels
-                for heading_tag in ['h1', 'h2', 'h3', 'h4', 'h5', 'h6']:
-                    title_elem = row.find(heading_tag)
-                    if title_elem:
-                        title = title_elem.get_text(strip=True)
-                        break
+                # Try different heading levels: one walk over all headings, keeping
+                # the first of the highest level ('h1' < 'h2' < ... as strings)
+                title_elem = min(row.iterdescendants(*_HEADING_TAGS), key=lambda h: h.tag, default=None)
+                if title_elem is not None:
+                    title = _text(title_elem)
                 
                 # Try looking for links that might contain titles
                 if not title:
-                    link_elem = row.find('a', href=re.compile(r'/our-work-tools/', re.IGNORECASE))
-                    if link_elem:
-                        title = link_elem.get_text(strip=True)
+                    for a, href, href_lower in anchors:
+                        if '/our-work-tools/' in href_lower:
+                            title = _text(a)
+                            break
                 
                 # Try looking for span or div with title-like content
                 if not title:
-                    for title_elem in row.find_all(['span', 'div'], class_=re.compile(r'title|name', re.IGNORECASE)):
-                        potential_title = title_elem.get_text(strip=True)
+                    for title_elem in _TITLE_CANDIDATE_XPATH(row):
+                        if not _TITLE_NAME_CLASS_RE.search(title_elem.get('class')):
+                            continue
+                        potential_title = _text(title_elem)
                         if len(potential_title) > 10:  # Reasonable title length
                             title = potential_title
                             break
             
-            if not title:
+            if not title or title in documents:
                 continue
             
             doc_type = self._get_document_type(title)
@@ -107,79 +235,51 @@ class EDPBGuidelineCollector:
                 continue
             
             # Look for different types of links
-            document_entry = {
-                'title': title,
-                'doc_type': doc_type,
-                'consultation_url': None,
-                'final_url': None,
-                'direct_pdf_url': None
-            }
-            
-            # 1. Look for Public consultation links
-            consultation_links = []
-            consultation_links.extend(row.find_all('a', string=re.compile(r'Public consultation', re.IGNORECASE)))
-            consultation_links.extend(row.find_all('a', href=re.compile(r'consultation', re.IGNORECASE)))
-            consultation_links.extend(row.find_all('a', href=re.compile(r'/public-consultations/', re.IGNORECASE)))
-            
-            for consultation_link in consultation_links:
-                href = consultation_link.get('href')
-                if href and 'consultation' in href.lower():
-                    document_entry['consultation_url'] = urljoin(self.BASE_URL, href)
-                    break
-            
-            # 2. Look for final/adopted version links
-            final_links = row.find_all('a', href=re.compile(r'/our-work-tools/our-documents/', re.IGNORECASE))
-            for final_link in final_links:
-                href = final_link.get('href')
-                if href:
-                    document_entry['final_url'] = urljoin(self.BASE_URL, href)
+            document_entry = DocEntry(title=title, doc_type=doc_type)
+            
+            # Classify the row's links in a single pass
+            consultation_href = labelled_consultation_href = None
+            first_pdf_href = english_pdf_href = None
+            for a, href, href_lower in anchors:
+                # 1. Public consultation links, preferring ones labelled as such
+                if 'consultation' in href_lower:
+                    if consultation_href is None:
+                        consultation_href = href
+                    if labelled_consultation_href is None and 'public consultation' in _text(a).casefold():
+                        labelled_consultation_href = href
+                
+                # 2. Final/adopted version links
+                if document_entry.final_url is None and '/our-work-tools/our-documents/' in href_lower:
+                    document_entry.final_url = urljoin(self.BASE_URL, href)
+                
+                # 3. Direct PDF download links, prioritizing English
+                if href_lower.endswith('.pdf'):
+                    if first_pdf_href is None:
+                        first_pdf_href = href
+                    if english_pdf_href is None and '_en.pdf' in href_lower:
+                        english_pdf_href = href
+                
+                # Nothing later in the row can change the outcome
+                if labelled_consultation_href and document_entry.final_url and english_pdf_href:
                     break
             
-            # 3. Look for direct PDF download links
-            pdf_links = row.find_all('a', href=re.compile(r'\.pdf$', re.IGNORECASE))
-            for pdf_link in pdf_links:
-                href = pdf_link.get('href')
-                if href and '_en.pdf' in href.lower():  # Prioritize English
-                    document_entry['direct_pdf_url'] = urljoin(self.BASE_URL, href)
-                    break
-            if not document_entry['direct_pdf_url'] and pdf_links:
-                # Fallback to first PDF if no English version found
-                href = pdf_links[0].get('href')
-                if href:
-                    document_entry['direct_pdf_url'] = urljoin(self.BASE_URL, href)
-            
-            # 4. Look for other document patterns (like Transparency, DPO, DPIA)
-            # These may not have traditional Guidelines numbering
-            if not any([document_entry['consultation_url'], document_entry['final_url'], document_entry['direct_pdf_url']]):
-                # Check for simple title-based documents
-                other_links = row.find_all('a', href=re.compile(r'/our-work-tools/our-documents/', re.IGNORECASE))
-                for link in other_links:
-                    href = link.get('href')
-                    link_text = link.get_text(strip=True).lower()
-                    # Look for standalone documents like "Transparency", "Data Protection Officer", etc.
-                    if any(keyword in link_text for keyword in ['transparency', 'data protection officer', 'dpo', 'dpia', 'impact assessment', 'portability']):
-                        document_entry['final_url'] = urljoin(self.BASE_URL, href)
-                        break
+            consultation_href = labelled_consultation_href or consultation_href
+            if consultation_href:
+                document_entry.consultation_url = urljoin(self.BASE_URL, consultation_href)
+            pdf_href = english_pdf_href or first_pdf_href
+            if pdf_href:
+                document_entry.direct_pdf_url = urljoin(self.BASE_URL, pdf_href)
             
             # Only add if we have at least one URL
-            if any([document_entry['consultation_url'], document_entry['final_url'], document_entry['direct_pdf_url']]):
-                documents.append(document_entry)
-        
-        # Remove duplicates based on title
-        seen_titles = set()
-        unique_documents = []
-        for doc in documents:
-            if doc['title'] not in seen_titles:
-                seen_titles.add(doc['title'])
-                unique_documents.append(doc)
-        
-        return unique_documents
+            if document_entry.consultation_url or document_entry.final_url or document_entry.direct_pdf_url:
+                documents[title] = document_entry
+        
+        return list(documents.values())
     
     def _is_obsolete_entry(self, row):
         """Check if a document entry is marked as obsolete."""
-        # Look for "Obsolete" text in the row
-        obsolete_text = row.find(string=re.compile(r'Obsolete', re.IGNORECASE))
-        if obsolete_text:
+        # Look for "Obsolete" text in the row; the space keeps text nodes from running together
+        if 'obsolete' in ' '.join(row.itertext()).casefold():
             return True
         
         # Note: WP (Working Party) documents are important and should be downloaded
@@ -188,235 +288,264 @@ class EDPBGuidelineCollector:
     
     def _get_document_type(self, title):
         """Determine if document is Guidelines or Recommendations."""
-        title_lower = title.lower()
-        if 'guideline' in title_lower:
+        title_folded = title.casefold()
+        if 'guideline' in title_folded:
             return 'Guidelines'
-        elif 'recommendation' in title_lower:
+        elif 'recommendation' in title_folded:
             return 'Recommendations'
         # Include other EDPB document types
-        elif any(keyword in title_lower for keyword in [
-            'transparency', 'data protection officer', 'dpo', 'dpia', 
-            'impact assessment', 'portability', 'guidance', 'automated',
-            'decision-making', 'profiling', 'position paper', 'derogation',
-            'records of processing', 'opinion'
-        ]):
+        elif any(keyword in title_folded for keyword in _OTHER_GUIDANCE_KEYWORDS):
             return 'Guidelines'  # Treat these as Guidelines for categorization
         else:
             return None
     
+    def _cached_lookup(self, kind, url, lookup):
+        """Return lookup(url), reusing the result of an earlier successful identical lookup.
+        
+        Lookups that found nothing (a None result, or a (None, ...) tuple) are not
+        cached, since they may come from a timeout or server error that a later
+        retry would get past.
+        """
+        key = (kind, url)
+        with self._lookup_cache_lock:
+            if key in self._lookup_cache:
+                return self._lookup_cache[key]
+        
+        result = lookup(url)
+        found = result[0] if isinstance(result, tuple) else result
+        if found is not None:
+            with self._lookup_cache_lock:
+                self._lookup_cache[key] = result
+        return result
+    
     def find_pdf_download_link(self, page_url):
-        """Find the PDF download link from a page (EDPB or external)."""
+        """Find the PDF download link from a page (EDPB or external).
+        
+        Returns (pdf_url, article29_title); the title is only set when the PDF
+        was resolved through an Article 29 Working Party page.
+        """
+        return self._cached_lookup('pdf', page_url, self._find_pdf_download_link)
+    
+    def _find_pdf_download_link(self, page_url):
+        """Uncached implementation of find_pdf_download_link."""
         console.print(f"Checking page: {page_url}")
         
         try:
             response = self.session.get(page_url)
             response.raise_for_status()
-            soup = BeautifulSoup(response.text, 'html.parser')
+            soup = BeautifulSoup(response.text, 'lxml', parse_only=_LINKS_ONLY)
             
             # Check if this is an Article 29 external link
             if 'ec.europa.eu' in page_url and 'article29' in page_url:
                 # Look for external links to ec.europa.eu for Article 29 documents
-                external_links = soup.find_all('a', href=re.compile(r'ec\.europa\.eu.*article29', re.IGNORECASE))
+                external_links = soup.find_all('a', href=_EC_ARTICLE29_RE)
                 for link in external_links:
                     href = link.get('href')
                     if href and ('item-detail' in href or 'document.cfm' in href):
                         # This is an Article 29 document link
-                        article29_pdf = self.find_article29_pdf_link(href)
+                        article29_pdf, article29_title = self.find_article29_pdf_link(href)
                         if article29_pdf:
-                            return article29_pdf
+                            return article29_pdf, article29_title
             
             # Check for external links to Article 29 documents
             if 'edpb.europa.eu' in page_url:
-                external_links = soup.find_all('a', href=re.compile(r'ec\.europa\.eu.*article29', re.IGNORECASE))
+                external_links = soup.find_all('a', href=_EC_ARTICLE29_RE)
                 for link in external_links:
                     href = link.get('href')
                     if href:
                         console.print(f"Found Article 29 external link: {href}")
-                        article29_pdf = self.find_article29_pdf_link(href)
+                        article29_pdf, article29_title = self.find_article29_pdf_link(href)
                         if article29_pdf:
-                            return article29_pdf
-            
-            # Look for PDF download links with multiple patterns
-            pdf_links = []
+                            return article29_pdf, article29_title
             
-            # Pattern 1: Direct PDF links
-            pdf_links.extend(soup.find_all('a', href=re.compile(r'\.pdf$', re.IGNORECASE)))
+            # Pattern 1: Direct PDF links; an English one is the answer, so stop here
+            pdf_links = [link for link in soup.find_all('a', href=True) if link['href'].casefold().endswith('.pdf')]
+            for link in pdf_links:
+                href = link['href']
+                if href.casefold().endswith('_en.pdf'):
+                    return urljoin(page_url, href), None
             
             # Pattern 2: Links containing "download" text
-            download_links = soup.find_all('a', string=re.compile(r'download', re.IGNORECASE))
+            download_links = soup.find_all('a', string=_DOWNLOAD_RE)
             for link in download_links:
                 href = link.get('href')
                 if href and '.pdf' in href.lower():
                     pdf_links.append(link)
             
-            # Pattern 3: Links in download sections or with download classes
-            download_sections = soup.find_all(['div', 'section'], class_=re.compile(r'download', re.IGNORECASE))
-            for section in download_sections:
-                pdf_links.extend(section.find_all('a', href=re.compile(r'\.pdf$', re.IGNORECASE)))
-            
-            # Pattern 4: File links (common path patterns)
-            file_links = soup.find_all('a', href=re.compile(r'/system/files/', re.IGNORECASE))
+            # Pattern 3: File links (common path patterns)
+            file_links = soup.find_all('a', href=_SYSTEM_FILES_RE)
             for link in file_links:
                 href = link.get('href')
                 if href and '.pdf' in href.lower():
                     pdf_links.append(link)
             
-            # Pattern 5: Look for simple PDF download links on EDPB pages  
-            # (for documents like Transparency that have direct PDFs)
-            simple_pdf_links = soup.find_all('a', href=re.compile(r'\.pdf$', re.IGNORECASE))
-            for link in simple_pdf_links:
-                href = link.get('href')
-                if href:
-                    pdf_links.append(link)
-            
             # Prioritize English PDF files
             for link in pdf_links:
                 href = link.get('href')
                 if href and '_en.pdf' in href.lower():
-                    return urljoin(page_url, href)
+                    return urljoin(page_url, href), None
             
             # Prioritize links with download-related text
             for link in pdf_links:
                 href = link.get('href')
-                link_text = link.get_text(strip=True).lower()
+                link_text = link.get_text(strip=True).casefold()
                 
-                if any(word in link_text for word in ['download', 'pdf', 'document', 'file']):
-                    return urljoin(page_url, href)
+                if any(word in link_text for word in _DOWNLOAD_WORDS):
+                    return urljoin(page_url, href), None
             
             # If no specific download link found, return the first PDF link
             if pdf_links:
-                return urljoin(page_url, pdf_links[0].get('href'))
+                return urljoin(page_url, pdf_links[0].get('href')), None
                 
         except Exception as e:
             console.print(f"Error accessing page {page_url}: {e}")
             
-        return None
+        return None, None
     
     def find_article29_pdf_link(self, page_url):
-        """Find PDF links from Article 29 Working Party external pages."""
+        """Find the PDF link and document title on an Article 29 Working Party external page.
+        
+        Returns (pdf_url, title); either may be None.
+        """
+        return self._cached_lookup('article29_pdf', page_url, self._find_article29_pdf_link)
+    
+    def _find_article29_pdf_link(self, page_url):
+        """Uncached implementation of find_article29_pdf_link."""
         try:
             response = self.session.get(page_url)
             response.raise_for_status()
-            soup = BeautifulSoup(response.text, 'html.parser')
-            
-            # Pattern 1: Direct PDF links on ec.europa.eu
-            pdf_links = soup.find_all('a', href=re.compile(r'\.pdf$', re.IGNORECASE))
-            
-            for link in pdf_links:
-                href = link.get('href')
-                if href:
-                    # Prioritize English versions
-                    if '_en.pdf' in href.lower():
-                        if not href.startswith('http'):
-                            href = urljoin(page_url, href)
-                        return href
-            
-            # Pattern 2: Redirection/document links
-            redirect_links = soup.find_all('a', href=re.compile(r'(redirection|document)', re.IGNORECASE))
-            for link in redirect_links:
-                href = link.get('href')
-                if href and not href.startswith('http'):
-                    href = urljoin(page_url, href)
-                if href:
-                    return href
+            # Parsed in full: the title lookup needs headings as well as links
+            tree = _parse_html(response.content, response.headers.get('Content-Type'))
             
-            # Pattern 3: Any PDF file reference
-            if pdf_links:
-                href = pdf_links[0].get('href')
-                if href and not href.startswith('http'):
-                    href = urljoin(page_url, href)
-                return href
+            pdf_url = self._article29_pdf_from_tree(tree, page_url)
+            if pdf_url:
+                return pdf_url, self._article29_title_from_tree(tree)
                     
         except Exception as e:
             console.print(f"Error accessing Article 29 page {page_url}: {e}")
             
+        return None, None
+    
+    def _article29_pdf_from_tree(self, tree, page_url):
+        """Pick the PDF (or redirection) link on a parsed Article 29 page."""
+        hrefs = [a.get('href') for a in _PAGE_ANCHOR_XPATH(tree)]
+        
+        # Pattern 1: Direct PDF links on ec.europa.eu
+        pdf_links = [href for href in hrefs if href.casefold().endswith('.pdf')]
+        
+        for href in pdf_links:
+            # Prioritize English versions
+            if href.casefold().endswith('_en.pdf'):
+                if not href.startswith('http'):
+                    href = urljoin(page_url, href)
+                return href
+        
+        # Pattern 2: Redirection/document links
+        for href in hrefs:
+            if href and _REDIRECT_DOCUMENT_RE.search(href):
+                if not href.startswith('http'):
+                    href = urljoin(page_url, href)
+                return href
+        
+        # Pattern 3: Any PDF file reference
+        if pdf_links:
+            href = pdf_links[0]
+            if not href.startswith('http'):
+                href = urljoin(page_url, href)
+            return href
+        
         return None
     
     def get_article29_title(self, page_url):
         """Extract Article 29 Working Party document title from external page."""
+        return self._cached_lookup('article29_title', page_url, self._get_article29_title)
+    
+    def _get_article29_title(self, page_url):
+        """Uncached implementation of get_article29_title."""
         try:
             response = self.session.get(page_url)
             response.raise_for_status()
-            soup = BeautifulSoup(response.text, 'html.parser')
-            
-            # Look for Article 29 specific title patterns
-            # Pattern 1: h1 or h2 tags with document titles
-            for heading_tag in ['h1', 'h2', 'h3']:
-                headings = soup.find_all(heading_tag)
-                for heading in headings:
-                    heading_text = heading.get_text(strip=True)
-                    if any(keyword in heading_text.lower() for keyword in [
-                        'working party', 'guidelines', 'opinion', 'recommendation', 'wp'
-                    ]):
-                        # Simplify Article 29 titles
-                        simplified_title = self._simplify_article29_title(heading_text)
-                        if simplified_title:
-                            return simplified_title
-            
-            # Pattern 2: Look for div or span with document titles
-            title_containers = soup.find_all(['div', 'span'], class_=re.compile(r'title|header', re.IGNORECASE))
-            for container in title_containers:
-                title_text = container.get_text(strip=True)
-                if len(title_text) > 20 and any(keyword in title_text.lower() for keyword in [
-                    'working party', 'guidelines', 'opinion', 'wp'
-                ]):
-                    simplified_title = self._simplify_article29_title(title_text)
-                    if simplified_title:
-                        return simplified_title
-            
-            # Pattern 3: Look for strong/b tags that might contain titles
-            strong_tags = soup.find_all(['strong', 'b'])
-            for strong in strong_tags:
-                strong_text = strong.get_text(strip=True)
-                if len(strong_text) > 20 and any(keyword in strong_text.lower() for keyword in [
-                    'working party', 'guidelines', 'opinion'
-                ]):
-                    simplified_title = self._simplify_article29_title(strong_text)
-                    if simplified_title:
-                        return simplified_title
-                        
+            tree = _parse_html(response.content, response.headers.get('Content-Type'))
+            return self._article29_title_from_tree(tree)
         except Exception as e:
             console.print(f"Error extracting Article 29 title from {page_url}: {e}")
             
         return None
     
+    def _article29_title_from_tree(self, tree):
+        """Find and simplify the document title on a parsed Article 29 page.
+        
+        Candidates are ranked h1, h2, h3 (pattern 1), then div/span with a
+        title/header class (pattern 2), then strong/b (pattern 3). They come from
+        one walk in document order; the first usable title of the best rank wins.
+        """
+        best_rank = 5
+        best_title = None
+        
+        for elem in _ARTICLE29_TITLE_CANDIDATE_XPATH(tree):
+            tag = elem.tag
+            if tag in ('h1', 'h2', 'h3'):
+                rank = int(tag[1]) - 1
+                keywords = _WP29_HEADING_KEYWORDS
+                min_length = 0
+            elif tag in ('div', 'span'):
+                if not _TITLE_HEADER_CLASS_RE.search(elem.get('class')):
+                    continue
+                rank = 3
+                keywords = _WP29_CONTAINER_KEYWORDS
+                min_length = 21
+            else:
+                rank = 4
+                keywords = _WP29_STRONG_KEYWORDS
+                min_length = 21
+            if rank >= best_rank:
+                continue
+            
+            text = _text(elem)
+            if len(text) < min_length:
+                continue
+            text_folded = text.casefold()
+            if not any(keyword in text_folded for keyword in keywords):
+                continue
+            
+            simplified_title = self._simplify_article29_title(text)
+            if simplified_title:
+                best_rank, best_title = rank, simplified_title
+                if rank == 0:
+                    break
+        
+        return best_title
+    
     def _simplify_article29_title(self, title):
         """Simplify Article 29 Working Party document titles."""
         if not title or len(title) < 10:
             return None
             
-        title_lower = title.lower()
+        title_folded = title.casefold()
         
         # Skip if it's not an Article 29/WP document
-        if not any(keyword in title_lower for keyword in [
-            'article 29', 'working party', 'wp', 'guidelines', 'opinion'
-        ]):
+        if not any(keyword in title_folded for keyword in _WP29_TITLE_KEYWORDS):
             return None
         
         # Clean up common patterns and create simplified titles
-        simplified = title.strip()
-        
-        # Remove "Article 29 Working Party - " prefix
-        simplified = re.sub(r'^Article 29 Working Party[\s\-]*', '', simplified, flags=re.IGNORECASE)
+        # Remove "Article 29 Working Party - " prefix and (wp242rev.01) style references
+        simplified = _WP29_CLEANUP_RE.sub('', title.strip())
         
         # Replace "Guidelines on" with "Guidelines on"
-        simplified = re.sub(r'^Guidelines on\s*', 'Guidelines on ', simplified, flags=re.IGNORECASE)
+        simplified = _GUIDELINES_ON_RE.sub('Guidelines on ', simplified)
         
         # Replace "Opinion" with "Opinion on"
-        if simplified.lower().startswith('opinion') and ' on ' not in simplified.lower():
-            simplified = re.sub(r'^Opinion\s*', 'Opinion on ', simplified, flags=re.IGNORECASE)
+        simplified_folded = simplified.casefold()
+        if simplified_folded.startswith('opinion') and ' on ' not in simplified_folded:
+            simplified = _OPINION_PREFIX_RE.sub('Opinion on ', simplified)
         
-        # Clean up quotes and parentheses
-        simplified = re.sub(r'"([^"]*)"', r'\1', simplified)  # Remove quotes around words
-        simplified = re.sub(r'\(([^)]*)\)', r'(\1)', simplified)  # Clean up parentheses
+        # Remove quotes around words
+        simplified = simplified.translate(_STRIP_QUOTES)
         
         # Add WP29 prefix for clarity
-        if not simplified.lower().startswith('wp'):
+        if not simplified.casefold().startswith('wp'):
             simplified = f"WP29 - {simplified}"
         
-        # Clean up WP references
-        simplified = re.sub(r'\(wp\d+.*?\)', '', simplified, flags=re.IGNORECASE)  # Remove (wp242rev.01) style references
-        
         # Limit length to avoid overly long filenames
         if len(simplified) > 80:
             # Try to truncate at a word boundary
@@ -433,46 +562,43 @@ class EDPBGuidelineCollector:
         return simplified
     
     def find_best_pdf_url(self, document_entry):
-        """Find the best PDF URL from various sources."""
+        """Find the best PDF URL from various sources.
+        
+        Returns (pdf_url, source_type, article29_title).
+        """
         # Priority order: direct_pdf_url > consultation PDF > final page PDF (including Article 29)
         
         # 1. Direct PDF URL (highest priority)
-        if document_entry.get('direct_pdf_url'):
-            return document_entry['direct_pdf_url'], 'direct'
+        if document_entry.direct_pdf_url:
+            return document_entry.direct_pdf_url, 'direct', None
         
         # 2. PDF from consultation page
-        if document_entry.get('consultation_url'):
-            pdf_url = self.find_pdf_download_link(document_entry['consultation_url'])
+        if document_entry.consultation_url:
+            pdf_url, article29_title = self.find_pdf_download_link(document_entry.consultation_url)
             if pdf_url:
                 source_type = 'article29' if 'ec.europa.eu' in pdf_url else 'consultation'
-                return pdf_url, source_type
+                return pdf_url, source_type, article29_title
         
         # 3. PDF from final/adopted version page (may include Article 29 external links)
-        if document_entry.get('final_url'):
-            pdf_url = self.find_pdf_download_link(document_entry['final_url'])
+        if document_entry.final_url:
+            pdf_url, article29_title = self.find_pdf_download_link(document_entry.final_url)
             if pdf_url:
                 source_type = 'article29' if 'ec.europa.eu' in pdf_url else 'final'
-                return pdf_url, source_type
+                return pdf_url, source_type, article29_title
         
-        return None, None
+        return None, None, None
     
-    def download_pdf(self, pdf_url, title, source_type=None):
-        """Download PDF file with sanitized title as filename, avoiding duplicates."""
-        if not pdf_url:
-            return None
+    def download_pdf(self, pdf_url, title):
+        """Download PDF file with sanitized title as filename, avoiding duplicates.
         
-        # For Article 29 documents, try to get better title from the source
-        final_title = title
-        if source_type == 'article29' and 'ec.europa.eu' in pdf_url:
-            # Try to extract better title from Article 29 page
-            article29_title = self.get_article29_title(pdf_url)
-            if article29_title:
-                final_title = article29_title
-                console.print(f"📋 Using Article 29 title: {final_title}")
+        Returns (file_path, file_size_bytes), or (None, 0) if nothing was downloaded.
+        """
+        if not pdf_url:
+            return None, 0
         
         # Sanitize filename
-        safe_filename = re.sub(r'[<>:"/\\|?*]', '_', final_title)
-        safe_filename = re.sub(r'_+', '_', safe_filename)
+        safe_filename = _UNSAFE_FILENAME_CHARS_RE.sub('_', title)
+        safe_filename = _UNDERSCORE_RUN_RE.sub('_', safe_filename)
         safe_filename = safe_filename.strip('_')[:100]  # Limit length
         
         if not safe_filename.endswith('.pdf'):
@@ -481,160 +607,268 @@ class EDPBGuidelineCollector:
         # Handle filename duplicates
         original_filename = safe_filename
         counter = 1
-        while safe_filename in self.downloaded_files:
-            # Extract filename without extension
-            name_without_ext = original_filename[:-4] if original_filename.endswith('.pdf') else original_filename
-            safe_filename = f"{name_without_ext} ({counter}).pdf"
-            counter += 1
-        
-        # Add to tracking set
-        self.downloaded_files.add(safe_filename)
+        with self._downloaded_files_lock:
+            while safe_filename in self.downloaded_files:
+                # Extract filename without extension
+                name_without_ext = original_filename[:-4] if original_filename.endswith('.pdf') else original_filename
+                safe_filename = f"{name_without_ext} ({counter}).pdf"
+                counter += 1
+            
+            # Add to tracking set
+            self.downloaded_files.add(safe_filename)
         
         file_path = self.download_dir / safe_filename
         
         try:
-            console.print(f"Downloading: {pdf_url}")
-            response = self.session.get(pdf_url, stream=True)
-            response.raise_for_status()
+            if not self.force and file_path.exists():
+                existing_size = self._unchanged_file_size(pdf_url, file_path)
+                if existing_size is not None:
+                    console.print(f"⏭️  Already downloaded: {file_path}")
+                    return file_path, existing_size
             
-            with open(file_path, 'wb') as f:
-                for chunk in response.iter_content(chunk_size=8192):
-                    f.write(chunk)
+            console.print(f"Downloading: {pdf_url}")
+            # PDFs are already compressed, so ask for them as-is and copy the raw stream in large blocks
+            with self.session.get(pdf_url, stream=True, headers={'Accept-Encoding': 'identity'}) as response:
+                response.raise_for_status()
+                response.raw.decode_content = True
+                
+                with open(file_path, 'wb') as f:
+                    shutil.copyfileobj(response.raw, f, length=DOWNLOAD_CHUNK_SIZE)
+                    file_size = f.tell()  # Bytes written, so no stat() is needed later
             
             console.print(f"✅ Downloaded: {file_path}")
-            return file_path
+            return file_path, file_size
             
         except Exception as e:
             console.print(f"❌ Error downloading {pdf_url}: {e}")
+            return None, 0
+    
+    def _unchanged_file_size(self, pdf_url, file_path):
+        """Return the size of file_path if a HEAD request reports the same Content-Length, else None.
+        
+        A failed HEAD request also returns None, so the caller falls back to a full download.
+        """
+        try:
+            response = self.session.head(pdf_url, allow_redirects=True, headers={'Accept-Encoding': 'identity'})
+        except requests.RequestException as e:
+            console.print(f"⚠️  Could not check {pdf_url} ({e}), downloading again")
+            return None
+        if not response.ok:
             return None
+        content_length = response.headers.get('Content-Length')
+        if content_length is None or not content_length.isdigit():
+            return None
+        file_size = file_path.stat().st_size
+        return file_size if int(content_length) == file_size else None
+    
+    def cancel(self):
+        """Stop a running collection: documents not yet started are skipped.
+        
+        Downloads already in progress finish, so page collections running in
+        other threads return shortly after this is called.
+        """
+        self._cancelled.set()
     
-    def collect_guidelines(self, page_num: int = 0):
-        """Main method to collect all guidelines from a specific page."""
+    def _process_document(self, document):
+        """Resolve and download the PDF for one listing entry; returns its result dict or None."""
+        if self._cancelled.is_set():
+            return None
+        
+        # Find best PDF URL (Article 29 pages also yield a better title)
+        pdf_url, source_type, article29_title = self.find_best_pdf_url(document)
+        
+        if not pdf_url:
+            console.print(f"⚠️  No PDF found for: {document.title}")
+            return None
+        
+        display_title = document.title
+        if article29_title:
+            display_title = article29_title
+            console.print(f"📋 Using Article 29 title: {display_title}")
+        
+        # Download the PDF, named after the improved title for Article 29 docs
+        file_path, file_size = self.download_pdf(pdf_url, display_title)
+        if not file_path:
+            return None
+        
+        return {
+            'title': display_title,  # Use improved title for Article 29 docs
+            'original_title': document.title,  # Keep original for reference
+            'consultation_url': document.consultation_url,
+            'final_url': document.final_url,
+            'direct_pdf_url': document.direct_pdf_url,
+            'pdf_url': pdf_url,
+            'source_type': source_type,
+            'file_path': file_path,
+            'file_size_bytes': file_size,
+            'doc_type': document.doc_type
+        }
+    
+    def collect_guidelines(self, page_num: int = 0, show_progress: bool = True):
+        """Main method to collect all guidelines from a specific page.
+        
+        Pass show_progress=False when collecting several pages concurrently,
+        since only one live progress display can be active at a time.
+        """
         try:
             # Fetch the page
             html_content = self.fetch_guidelines_page(page_num)
+            return self._collect_from_html(page_num, html_content, show_progress)
             
-            # Extract all document links (consultation + final/direct)
-            documents = self.extract_all_document_links(html_content)
-            
-            if not documents:
-                console.print(f"No documents found on page {page_num}")
-                return []
-            
-            # Separate by document type
-            guidelines = [d for d in documents if d.get('doc_type') == 'Guidelines']
-            recommendations = [d for d in documents if d.get('doc_type') == 'Recommendations']
-            
-            console.print(f"Found {len(documents)} documents on page {page_num}")
-            console.print(f"  - Guidelines: {len(guidelines)}")
-            console.print(f"  - Recommendations: {len(recommendations)}")
-            
-            # Show link type statistics
-            consultation_count = len([d for d in documents if d.get('consultation_url')])
-            final_count = len([d for d in documents if d.get('final_url')])
-            direct_pdf_count = len([d for d in documents if d.get('direct_pdf_url')])
-            
-            console.print(f"  - With consultation links: {consultation_count}")
-            console.print(f"  - With final/adopted links: {final_count}")
-            console.print(f"  - With direct PDF links: {direct_pdf_count}")
-            
-            downloaded_files = []
-            
-            with Progress(
-                SpinnerColumn(),
-                TextColumn("[progress.description]{task.description}"),
-                console=console,
-            ) as progress:
-                
-                for i, document in enumerate(documents):
-                    task = progress.add_task(
-                        f"Processing {document.get('doc_type', 'Unknown')}: {document['title'][:40]}...", 
-                        total=None
-                    )
-                    
-                    # Find best PDF URL
-                    pdf_url, source_type = self.find_best_pdf_url(document)
-                    
-                    if pdf_url:
-                        # For Article 29 documents, try to get better title
-                        display_title = document['title']
-                        if source_type == 'article29' and 'ec.europa.eu' in pdf_url:
-                            article29_title = self.get_article29_title(pdf_url)
-                            if article29_title:
-                                display_title = article29_title
-                        
-                        # Download the PDF
-                        file_path = self.download_pdf(pdf_url, document['title'], source_type)
-                        if file_path:
-                            downloaded_files.append({
-                                'title': display_title,  # Use improved title for Article 29 docs
-                                'original_title': document['title'],  # Keep original for reference
-                                'consultation_url': document.get('consultation_url'),
-                                'final_url': document.get('final_url'),
-                                'direct_pdf_url': document.get('direct_pdf_url'),
-                                'pdf_url': pdf_url,
-                                'source_type': source_type,
-                                'file_path': file_path,
-                                'doc_type': document.get('doc_type', 'Unknown')
-                            })
-                    else:
-                        console.print(f"⚠️  No PDF found for: {document['title']}")
-                    
-                    progress.update(task, description="✅ Complete")
+        except Exception as e:
+            console.print(f"❌ Error collecting guidelines: {e}")
+            raise
+    
+    def collect_guideline_pages(self, page_nums, show_progress: bool = True):
+        """Collect several listing pages in order, returning {page_num: downloaded_files}.
+        
+        The next page's HTML is fetched in the background while the current
+        page's PDFs are resolved and downloaded; at most one page is prefetched.
+        """
+        page_nums = list(page_nums)
+        page_results = {}
+        if not page_nums:
+            return page_results
+        
+        try:
+            with ThreadPoolExecutor(max_workers=1) as prefetcher:
+                next_html = prefetcher.submit(self.fetch_guidelines_page, page_nums[0])
+                for i, page_num in enumerate(page_nums):
+                    html_content = next_html.result()
+                    if i + 1 < len(page_nums):
+                        next_html = prefetcher.submit(self.fetch_guidelines_page, page_nums[i + 1])
+                    page_results[page_num] = self._collect_from_html(page_num, html_content, show_progress)
             
-            return downloaded_files
+            return page_results
             
         except Exception as e:
             console.print(f"❌ Error collecting guidelines: {e}")
             raise
     
+    def _collect_from_html(self, page_num, html_content, show_progress):
+        """Extract, resolve and download the documents of one fetched listing page."""
+        # Extract all document links (consultation + final/direct)
+        documents = self.extract_all_document_links(html_content)
+        
+        if not documents:
+            console.print(f"No documents found on page {page_num}")
+            return []
+        
+        # Separate by document type
+        guidelines = [d for d in documents if d.doc_type == 'Guidelines']
+        recommendations = [d for d in documents if d.doc_type == 'Recommendations']
+        
+        console.print(f"Found {len(documents)} documents on page {page_num}")
+        console.print(f"  - Guidelines: {len(guidelines)}")
+        console.print(f"  - Recommendations: {len(recommendations)}")
+        
+        # Show link type statistics
+        consultation_count = len([d for d in documents if d.consultation_url])
+        final_count = len([d for d in documents if d.final_url])
+        direct_pdf_count = len([d for d in documents if d.direct_pdf_url])
+        
+        console.print(f"  - With consultation links: {consultation_count}")
+        console.print(f"  - With final/adopted links: {final_count}")
+        console.print(f"  - With direct PDF links: {direct_pdf_count}")
+        
+        # PDF lookups and downloads are network-bound, so run them in parallel
+        # and update the progress display from this thread as they finish
+        results = [None] * len(documents)
+        
+        with Progress(
+            SpinnerColumn(),
+            TextColumn("[progress.description]{task.description}"),
+            console=console,
+            disable=not show_progress,
+        ) as progress, ThreadPoolExecutor(max_workers=self.DOCUMENT_WORKERS) as executor:
+            
+            futures = {}
+            for i, document in enumerate(documents):
+                task = progress.add_task(
+                    f"Processing {document.doc_type}: {document.title[:40]}...", 
+                    total=None
+                )
+                futures[executor.submit(self._process_document, document)] = (i, task)
+            
+            for future in as_completed(futures):
+                i, task = futures[future]
+                results[i] = future.result()
+                progress.update(task, description="✅ Complete")
+        
+        # Keep listing order regardless of completion order
+        downloaded_files = [r for r in results if r]
+        
+        return downloaded_files
+    
+    @staticmethod
+    def _recorded_file_size(result):
+        """Size recorded at download time; only stat files for results that lack one."""
+        file_size = result.get('file_size_bytes')
+        if file_size is None:
+            file_size = result['file_path'].stat().st_size if result['file_path'].exists() else 0
+        return file_size
+    
     def save_results_to_file(self, results, filename_prefix="edpb_collection_results"):
         """Save collection results to JSON file."""
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        now = datetime.now()
+        timestamp = now.strftime("%Y%m%d_%H%M%S")
         filename = f"{filename_prefix}_{timestamp}.json"
         
         # Prepare data for JSON serialization
         json_data = {
-            'collection_timestamp': datetime.now().isoformat(),
+            'collection_timestamp': now.isoformat(),
             'total_documents': len(results),
             'guidelines_count': len([r for r in results if r.get('doc_type') == 'Guidelines']),
             'recommendations_count': len([r for r in results if r.get('doc_type') == 'Recommendations']),
-            'documents': []
+            'documents': [
+                {
+                    'title': result['title'],
+                    'doc_type': result.get('doc_type', 'Unknown'),
+                    'consultation_url': result.get('consultation_url'),
+                    'final_url': result.get('final_url'),
+                    'direct_pdf_url': result.get('direct_pdf_url'),
+                    'pdf_url': result['pdf_url'],
+                    'source_type': result.get('source_type', 'unknown'),
+                    'file_path': str(result['file_path']),
+                    'file_size_bytes': self._recorded_file_size(result)
+                }
+                for result in results
+            ]
         }
         
-        for result in results:
-            json_data['documents'].append({
-                'title': result['title'],
-                'doc_type': result.get('doc_type', 'Unknown'),
-                'consultation_url': result.get('consultation_url'),
-                'final_url': result.get('final_url'),
-                'direct_pdf_url': result.get('direct_pdf_url'),
-                'pdf_url': result['pdf_url'],
-                'source_type': result.get('source_type', 'unknown'),
-                'file_path': str(result['file_path']),
-                'file_size_bytes': result['file_path'].stat().st_size if result['file_path'].exists() else 0
-            })
-        
-        # Save to file
-        with open(filename, 'w', encoding='utf-8') as f:
-            json.dump(json_data, f, indent=2, ensure_ascii=False)
+        # Save to file; orjson's indented output matches json.dump(indent=2, ensure_ascii=False)
+        if ORJSON_AVAILABLE:
+            Path(filename).write_bytes(orjson.dumps(json_data, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS))
+        else:
+            with open(filename, 'w', encoding='utf-8') as f:
+                json.dump(json_data, f, indent=2, ensure_ascii=False)
         
         console.print(f"📊 Results saved to: {filename}")
         return filename
 
 @click.command()
 @click.option('--page', default=0, help='Page number to scrape (default: 0)')
+@click.option('--to-page', type=int, default=None, help='Also scrape every page up to this one, prefetching the next page while downloading')
 @click.option('--download-dir', default='edpb_guidelines', help='Directory to save PDFs (default: edpb_guidelines)')
-def main(page, download_dir):
+@click.option('--force', is_flag=True, help='Re-download PDFs that already exist with the same size')
+def main(page, to_page, download_dir, force):
     """Collect EDPB GDPR guidelines from public consultations."""
     
-    collector = EDPBGuidelineCollector(download_dir)
+    collector = EDPBGuidelineCollector(download_dir, force=force)
     
-    console.print(f"🔄 Starting EDPB guideline collection for page {page}")
+    if to_page is not None and to_page > page:
+        page_label = f"pages {page}-{to_page}"
+    else:
+        page_label = f"page {page}"
+    console.print(f"🔄 Starting EDPB guideline collection for {page_label}")
     console.print(f"📁 Download directory: {download_dir}")
     
     try:
-        downloaded_files = collector.collect_guidelines(page)
+        if to_page is not None and to_page > page:
+            page_results = collector.collect_guideline_pages(range(page, to_page + 1))
+            downloaded_files = [f for page_files in page_results.values() for f in page_files]
+        else:
+            downloaded_files = collector.collect_guidelines(page)
         
         if downloaded_files:
             # Separate by document type for summary
@@ -651,7 +885,7 @@ def main(page, download_dir):
                 console.print(f"  {doc_type_icon} {file_info['title']}")
                 console.print(f"    📄 {file_info['file_path']}")
         else:
-            console.print(f"\n⚠️  No documents downloaded from page {page}")
+            console.print(f"\n⚠️  No documents downloaded from {page_label}")
             
     except Exception as e:
         console.print(f"\n❌ Error during collection: {e}")
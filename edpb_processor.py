@@ -1,73 +1,198 @@
 import google.generativeai as genai
 import sqlite3
+import hashlib
 import json
 import logging
+import multiprocessing
 import os
+import queue
+import threading
 import time
 from pathlib import Path
-from typing import Dict, List, Optional, Tuple
-import PyPDF2
-import pdfplumber
+from array import array
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+from contextlib import contextmanager
+import numpy as np
+from typing import Dict, Iterator, List, Optional, Tuple
+import pypdfium2 as pdfium
 import re
 from datetime import datetime
-from langchain_text_splitters import RecursiveCharacterTextSplitter
+from collections import deque
 
 # ログ設定
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
+# embed_contentに1回で渡せるテキスト数の上限（batchEmbedContentsの制限）
+MAX_EMBED_BATCH_SIZE = 100
+
+SUMMARY_MODEL = 'gemini-2.5-pro'
+EMBEDDING_MODEL = 'models/text-embedding-004'
+
+# サマリー生成に使う文書先頭の最大文字数（この範囲内の最後の文末で切る）
+SUMMARY_INPUT_CHARS = 8000
+
+# このページ数以上のPDFはページ範囲ごとに別プロセスでテキスト抽出する（プロセス起動のコストに見合う場合のみ）
+PARALLEL_EXTRACTION_MIN_PAGES = 64
+
+# 抽出ワーカーはspawnで起動する。forkだと他スレッドが_PDFIUM_LOCKを保持したまま・PDFium呼び出し中の
+# 状態を子プロセスが引き継ぎ、ワーカーが永久に待つことがある（spawnなら各ワーカーが自分のロックを持つ）
+_EXTRACTION_MP_CONTEXT = multiprocessing.get_context('spawn')
+
+# PDFiumはスレッドセーフではないため、同一プロセス内での呼び出しはロックで直列化する
+# （PDFはパスで開き、PDFiumに必要な部分だけをファイルから読ませる。bytesで渡すと全体がヒープに載る）
+_PDFIUM_LOCK = threading.Lock()
+
+# EDPBDatabaseHandlerが使い回すために保持しておくSQLite接続の最大数
+MAX_IDLE_CONNECTIONS = 8
+
+# サマリー入力の埋め込みがこのコサイン類似度を超える既存サマリーは再利用する（改訂版・再アップロード向け）
+SUMMARY_SIMILARITY_THRESHOLD = 0.97
+
+# サマリー生成の指示（文書テキストはユーザー側の入力として別に渡す）
+SUMMARY_INSTRUCTIONS = """\
+Create a detailed summary of this EDPB/WP29 guideline document. Start with a 2-3 sentence executive summary 
+that provides a high-level overview of the document's significance and main points.
+
+Then, cover the following aspects:
+
+1. Document Overview:
+   - Main purpose and objectives
+   - Target audience
+   - Scope of application
+
+2. Key Topics and Requirements:
+   - List main topics covered (e.g., consent, data processing, security measures)
+   - Key obligations and requirements
+   - Important definitions or concepts introduced
+
+3. Practical Implementation:
+   - Required actions for compliance
+   - Technical and organizational measures
+   - Specific procedures or safeguards
+
+4. Related Areas:
+   - Connection to other GDPR articles or guidelines
+   - Relevant industry sectors or use cases
+   - Cross-border implications if any
+
+Important Guidelines:
+- Include relevant keywords and phrases that users might search for
+- Use clear, specific language
+- Maximum length: 800 words
+- Structure the summary with clear sections
+- Include specific article numbers and references where relevant
+"""
+
+# メタデータ抽出の指示
+METADATA_INSTRUCTIONS = """\
+Extract the following information from this EDPB/WP29 document:
+1. Version
+2. Adoption date (format: YYYY-MM-DD)
+3. Document type (Guidelines/Opinion/Recommendation/Statement/Decision/Letter)
+4. Title (official title of the document)
+5. Working Party number (if WP29 document)
+6. EDPB number (if EDPB document)
+7. Subject matter
+8. Related GDPR articles (comma-separated)
+
+Format your response as JSON:
+{
+    "version": "version or null",
+    "adopted_date": "YYYY-MM-DD or null",
+    "document_type": "type",
+    "title": "title",
+    "working_party_number": "WP number or null",
+    "edpb_number": "EDPB number or null",
+    "subject_matter": "subject",
+    "related_articles": "article numbers or null"
+}
+"""
+
+# 空白の連続（改行を含む）
+_WHITESPACE_RE = re.compile(r'\s+')
+# 文末（. ! ? の後の空白）
+_SENTENCE_END_RE = re.compile(r'[.!?]["\')\]]? ')
+# 空白で区切られた語（token_countの計算用）
+_WORD_RE = re.compile(r'\S+')
+# 空白以外の制御文字（PDFから混入することがある）は削除する
+_CONTROL_CHARS = dict.fromkeys(c for c in (*range(0x20), 0x7f) if not chr(c).isspace())
+
+def normalize_text(text: str) -> str:
+    """テキストの正規化処理（制御文字を除去し、空白を1つのスペースにまとめる）"""
+    return _WHITESPACE_RE.sub(' ', text.translate(_CONTROL_CHARS)).strip()
+
+def truncate_at_boundary(text: str, max_chars: int) -> str:
+    """先頭max_chars文字以内を、できるだけ文末（なければ語の切れ目）で切り出す
+    
+    文の途中で切れないようにし、改訂版などで末尾が少し変わっても同じ入力になりやすくする。
+    """
+    if len(text) <= max_chars:
+        return text
+    head = text[:max_chars + 1]
+    # 後半に文末がなければ語の切れ目で切る（極端に短くならないようにする）
+    min_cut = max_chars // 2
+    sentence_ends = [m.end() for m in _SENTENCE_END_RE.finditer(head, min_cut)]
+    if sentence_ends:
+        return head[:sentence_ends[-1]].rstrip()
+    cut = head.rfind(' ', min_cut)
+    return head[:cut] if cut > 0 else text[:max_chars]
+
+def encode_embedding(embedding: List[float]) -> bytes:
+    """埋め込みをDB保存用のfloat32バイト列に変換（768次元で3072バイト）"""
+    return np.asarray(embedding, dtype=np.float32).tobytes()
+
+def decode_embedding(value) -> np.ndarray:
+    """DBに保存された埋め込みをfloat32配列に戻す（以前のJSON形式にも対応）"""
+    if isinstance(value, str):
+        return np.asarray(json.loads(value), dtype=np.float32)
+    return np.frombuffer(value, dtype=np.float32)
+
+def file_sha256(path: Path, block_size: int = 1024 * 1024) -> str:
+    """ファイル内容のSHA-256（16進）を1MBずつ読みながら計算"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(block_size), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+def _content_hash(text: str) -> bytes:
+    """キャッシュのキーに使うテキストのSHA-256ダイジェスト"""
+    return hashlib.sha256(text.encode('utf-8')).digest()
+
 class GeminiAPIClient:
-    """Gemini API統合クライアント"""
+    """Gemini API統合クライアント
+    
+    cacheにEDPBDatabaseHandlerを渡すと、同じ入力に対するサマリーと埋め込みを
+    SQLiteに保存して再利用し、API呼び出しを省略する。
+    """
     
-    def __init__(self, api_key: str):
+    def __init__(self, api_key: str, cache: Optional['EDPBDatabaseHandler'] = None):
         self.api_key = api_key
+        self.cache = cache
         genai.configure(api_key=api_key)
         
         # モデルの初期化
-        self.text_model = genai.GenerativeModel('gemini-2.5-pro')
+        # 固定の指示はsystem_instructionとして渡し、リクエストごとに変わるのは文書テキストだけにする
+        self.summary_model = genai.GenerativeModel(SUMMARY_MODEL, system_instruction=SUMMARY_INSTRUCTIONS)
+        self.metadata_model = genai.GenerativeModel(SUMMARY_MODEL, system_instruction=METADATA_INSTRUCTIONS)
         self.embedding_model = genai.GenerativeModel('text-embedding-004')
         
     def generate_summary(self, text: str) -> str:
         """Gemini 2.5 Proを使用してサマリーを生成"""
         try:
-            prompt = f"""
-            Create a detailed summary of this EDPB/WP29 guideline document. Start with a 2-3 sentence executive summary 
-            that provides a high-level overview of the document's significance and main points.
-
-            Then, cover the following aspects:
-
-            1. Document Overview:
-               - Main purpose and objectives
-               - Target audience
-               - Scope of application
-
-            2. Key Topics and Requirements:
-               - List main topics covered (e.g., consent, data processing, security measures)
-               - Key obligations and requirements
-               - Important definitions or concepts introduced
-
-            3. Practical Implementation:
-               - Required actions for compliance
-               - Technical and organizational measures
-               - Specific procedures or safeguards
-
-            4. Related Areas:
-               - Connection to other GDPR articles or guidelines
-               - Relevant industry sectors or use cases
-               - Cross-border implications if any
-
-            Important Guidelines:
-            - Include relevant keywords and phrases that users might search for
-            - Use clear, specific language
-            - Maximum length: 800 words
-            - Structure the summary with clear sections
-            - Include specific article numbers and references where relevant
-
-            Document text:
-            {text}
-            """
-            
-            response = self.text_model.generate_content(prompt)
+            prompt = f"Document text:\n{text}"
+            
+            prompt_hash = _content_hash(SUMMARY_INSTRUCTIONS + prompt)
+            if self.cache:
+                cached_summary = self.cache.get_cached_summary(prompt_hash, SUMMARY_MODEL)
+                if cached_summary is not None:
+                    logger.info("Using cached summary")
+                    return cached_summary
+            
+            response = self.summary_model.generate_content(prompt)
+            if self.cache:
+                self.cache.put_cached_summary(prompt_hash, SUMMARY_MODEL, response.text)
             return response.text
             
         except Exception as e:
@@ -77,16 +202,76 @@ class GeminiAPIClient:
     def get_embedding(self, text: str, dimensions: int = 768) -> List[float]:
         """text-embedding-004を使用して埋め込みを生成（768次元）"""
         try:
+            text_hash = _content_hash(text)
+            if self.cache:
+                cached = self.cache.get_cached_embeddings([text_hash], EMBEDDING_MODEL, dimensions)
+                if text_hash in cached:
+                    return cached[text_hash]
+            
             result = genai.embed_content(
-                model="models/text-embedding-004",
+                model=EMBEDDING_MODEL,
                 content=text,
                 output_dimensionality=dimensions
             )
+            if self.cache:
+                self.cache.put_cached_embeddings([(text_hash, result['embedding'])], EMBEDDING_MODEL, dimensions)
             return result['embedding']
             
         except Exception as e:
             logger.error(f"Error generating embedding: {str(e)}")
             raise
+    
+    def get_embeddings_batch(self, texts: List[str], dimensions: int = 768) -> List[List[float]]:
+        """複数テキストの埋め込みを1回のAPI呼び出しでまとめて生成
+        
+        キャッシュ済みのテキストはAPIに送らず、未キャッシュの分だけを1回で取得する。
+        """
+        try:
+            hashes = [_content_hash(text) for text in texts]
+            embeddings = self.cache.get_cached_embeddings(hashes, EMBEDDING_MODEL, dimensions) if self.cache else {}
+            
+            # 同じテキストはバッチ内でも1回だけ送る
+            missing = {}
+            for text_hash, text in zip(hashes, texts):
+                if text_hash not in embeddings:
+                    missing.setdefault(text_hash, text)
+            
+            if missing:
+                result = genai.embed_content(
+                    model=EMBEDDING_MODEL,
+                    content=list(missing.values()),
+                    output_dimensionality=dimensions
+                )
+                fetched = list(zip(missing, result['embedding']))
+                if self.cache:
+                    self.cache.put_cached_embeddings(fetched, EMBEDDING_MODEL, dimensions)
+                embeddings.update(fetched)
+            
+            return [embeddings[text_hash] for text_hash in hashes]
+            
+        except Exception as e:
+            logger.error(f"Error generating batch embedding: {str(e)}")
+            raise
+
+def _extract_pages_text(pdf: pdfium.PdfDocument, start: int, end: int) -> str:
+    """開いたPDFのstart〜end-1ページのテキストを改行区切りで連結（_PDFIUM_LOCKを保持して呼ぶ）"""
+    text = ''
+    for i in range(start, end):
+        page_text = pdf[i].get_textpage().get_text_bounded()
+        if page_text:
+            text += page_text + '\n'
+        logger.debug(f"Page {i+1} extracted text length: {len(page_text)}")
+    return text
+
+def _extract_page_range(args: Tuple[str, int, int]) -> str:
+    """ワーカープロセス用: PDFを開き直して指定ページ範囲のテキストを抽出
+    
+    PDFiumのドキュメントはプロセス間で共有できないため、各ワーカーで開く。
+    spawnで起動したワーカーではモジュールが読み込み直されるので、_PDFIUM_LOCKは親プロセスとは別物になる。
+    """
+    pdf_path, start, end = args
+    with _PDFIUM_LOCK, pdfium.PdfDocument(pdf_path) as pdf:
+        return _extract_pages_text(pdf, start, end)
 
 class EDPBMetadataExtractor:
     """PDFメタデータ抽出クラス"""
@@ -96,88 +281,58 @@ class EDPBMetadataExtractor:
     
     def normalize_text(self, text: str) -> str:
         """テキストの正規化処理"""
-        text = re.sub(r'\s+', ' ', text)
-        text = text.replace('\n', ' ')
-        return text.strip()
+        return normalize_text(text)
     
     def extract_metadata(self, pdf_path: Path) -> Dict:
         """PDFからメタデータを抽出"""
         try:
-            with pdfplumber.open(pdf_path) as pdf:
-                page_count = len(pdf.pages)
-                
-                # 最初の3ページからテキスト抽出
-                text = ''
-                for i in range(min(3, len(pdf.pages))):
-                    text += pdf.pages[i].extract_text() + '\n'
-                
-                normalized_text = self.normalize_text(text)
-                logger.info(f"Extracting metadata from first pages of {pdf_path.name}")
-                
-                # Geminiを使用してメタデータを抽出
-                prompt = f"""
-                Extract the following information from this EDPB/WP29 document:
-                1. Version
-                2. Adoption date (format: YYYY-MM-DD)
-                3. Document type (Guidelines/Opinion/Recommendation/Statement/Decision/Letter)
-                4. Title (official title of the document)
-                5. Working Party number (if WP29 document)
-                6. EDPB number (if EDPB document)
-                7. Subject matter
-                8. Related GDPR articles (comma-separated)
-                
-                Format your response as JSON:
-                {{
-                    "version": "version or null",
-                    "adopted_date": "YYYY-MM-DD or null",
-                    "document_type": "type",
-                    "title": "title",
-                    "working_party_number": "WP number or null",
-                    "edpb_number": "EDPB number or null",
-                    "subject_matter": "subject",
-                    "related_articles": "article numbers or null"
-                }}
-
-                Document text:
-                {normalized_text}
-                """
-                
-                response = self.gemini_client.text_model.generate_content(prompt)
-                logger.debug(f"Raw API response: {response.text}")
-                
-                # JSONパースの改善
-                response_text = response.text.strip()
-                if response_text.startswith('```json'):
-                    response_text = response_text[7:]
-                if response_text.endswith('```'):
-                    response_text = response_text[:-3]
-                response_text = response_text.strip()
-                
-                try:
-                    metadata = json.loads(response_text)
-                except json.JSONDecodeError as e:
-                    logger.error(f"JSON parse error: {e}")
-                    logger.error(f"Response text: {response_text}")
-                    # デフォルト値で処理続行
-                    metadata = {
-                        "version": None,
-                        "adopted_date": None,
-                        "document_type": "Guidelines",
-                        "title": pdf_path.stem,
-                        "working_party_number": None,
-                        "edpb_number": None,
-                        "subject_matter": None,
-                        "related_articles": None
-                    }
-                
-                # ファイル情報を追加
-                metadata['page_count'] = page_count
-                metadata['file_size_bytes'] = pdf_path.stat().st_size
-                metadata['filename'] = pdf_path.name
-                
-                logger.info(f"Extracted metadata: {json.dumps(metadata, indent=2)}")
-                return metadata
-                
+            # 最初の3ページからテキスト抽出（Gemini呼び出し中はPDFを開いたままにしない）
+            with _PDFIUM_LOCK, pdfium.PdfDocument(str(pdf_path)) as pdf:
+                page_count = len(pdf)
+                text = _extract_pages_text(pdf, 0, min(3, page_count))
+            
+            normalized_text = self.normalize_text(text)
+            logger.info(f"Extracting metadata from first pages of {pdf_path.name}")
+            
+            # Geminiを使用してメタデータを抽出
+            prompt = f"Document text:\n{normalized_text}"
+            
+            response = self.gemini_client.metadata_model.generate_content(prompt)
+            logger.debug(f"Raw API response: {response.text}")
+            
+            # JSONパースの改善
+            response_text = response.text.strip()
+            if response_text.startswith('```json'):
+                response_text = response_text[7:]
+            if response_text.endswith('```'):
+                response_text = response_text[:-3]
+            response_text = response_text.strip()
+            
+            try:
+                metadata = json.loads(response_text)
+            except json.JSONDecodeError as e:
+                logger.error(f"JSON parse error: {e}")
+                logger.error(f"Response text: {response_text}")
+                # デフォルト値で処理続行
+                metadata = {
+                    "version": None,
+                    "adopted_date": None,
+                    "document_type": "Guidelines",
+                    "title": pdf_path.stem,
+                    "working_party_number": None,
+                    "edpb_number": None,
+                    "subject_matter": None,
+                    "related_articles": None
+                }
+            
+            # ファイル情報を追加
+            metadata['page_count'] = page_count
+            metadata['file_size_bytes'] = pdf_path.stat().st_size
+            metadata['filename'] = pdf_path.name
+            
+            logger.info(f"Extracted metadata: {json.dumps(metadata, indent=2)}")
+            return metadata
+            
         except Exception as e:
             logger.error(f"Metadata extraction error for {pdf_path}: {str(e)}")
             raise
@@ -187,72 +342,175 @@ class EDPBTextExtractor:
     
     def normalize_text(self, text: str) -> str:
         """テキストの正規化処理"""
-        text = re.sub(r'\s+', ' ', text)
-        text = text.replace('\n', ' ')
-        return text.strip()
+        return normalize_text(text)
+    
+    def extract_head(self, pdf_path: Path, max_chars: int = SUMMARY_INPUT_CHARS) -> str:
+        """正規化後の先頭max_chars文字だけを抽出（必要なページだけを読む）
+        
+        extract_full_text(pdf_path)[:max_chars] と同じ結果になる。
+        """
+        try:
+            normalized_text = ''
+            with _PDFIUM_LOCK, pdfium.PdfDocument(str(pdf_path)) as pdf:
+                text = ''
+                for i in range(len(pdf)):
+                    text += _extract_pages_text(pdf, i, i + 1)
+                    normalized_text = normalize_text(text)
+                    if len(normalized_text) >= max_chars:
+                        break
+            return normalized_text[:max_chars]
+            
+        except Exception as e:
+            logger.error(f"Text extraction error for {pdf_path}: {str(e)}")
+            raise
     
     def extract_full_text(self, pdf_path: Path) -> str:
         """PDFから全文を抽出"""
         try:
-            with pdfplumber.open(pdf_path) as pdf:
-                text = ''
-                for i, page in enumerate(pdf.pages):
-                    page_text = page.extract_text()
-                    if page_text:
-                        text += page_text + '\n'
-                    logger.debug(f"Page {i+1} extracted text length: {len(page_text)}")
-                
-                normalized_text = self.normalize_text(text)
-                logger.info(f"Extracted {len(normalized_text)} characters from {pdf_path.name}")
-                return normalized_text
-                
+            with _PDFIUM_LOCK, pdfium.PdfDocument(str(pdf_path)) as pdf:
+                page_count = len(pdf)
+                if page_count < PARALLEL_EXTRACTION_MIN_PAGES:
+                    text = _extract_pages_text(pdf, 0, page_count)
+            
+            if page_count >= PARALLEL_EXTRACTION_MIN_PAGES:
+                # ページ範囲をCPU数で分割して並列に抽出（mapは入力順に結果を返す）
+                workers = min(os.cpu_count() or 1, page_count)
+                step = -(-page_count // workers)
+                ranges = [(str(pdf_path), start, min(start + step, page_count))
+                          for start in range(0, page_count, step)]
+                with ProcessPoolExecutor(max_workers=len(ranges), mp_context=_EXTRACTION_MP_CONTEXT) as executor:
+                    text = ''.join(executor.map(_extract_page_range, ranges))
+            
+            normalized_text = self.normalize_text(text)
+            logger.info(f"Extracted {len(normalized_text)} characters from {pdf_path.name}")
+            return normalized_text
+            
         except Exception as e:
             logger.error(f"Text extraction error for {pdf_path}: {str(e)}")
             raise
 
+# チャンク分割で試す区切り文字（前から順に、テキスト中に存在する最初のものを使う）
+_SPLIT_SEPARATORS = ("\n\n", "\n", " ", "")
+
+def _merge_splits(splits: List[str], chunk_size: int, chunk_overlap: int) -> List[str]:
+    """分割片をchunk_size以下のチャンクにまとめる（直前のチャンク末尾をchunk_overlapまで重ねる）"""
+    chunks = []
+    current = deque()
+    total = 0
+    for piece in splits:
+        length = len(piece)
+        if total + length > chunk_size and current:
+            chunk = ''.join(current).strip()
+            if chunk:
+                chunks.append(chunk)
+            # 重複分だけ残し、次の分割片が入る長さになるまで先頭から捨てる
+            while total > chunk_overlap or (total + length > chunk_size and total > 0):
+                total -= len(current.popleft())
+        current.append(piece)
+        total += length
+    chunk = ''.join(current).strip()
+    if chunk:
+        chunks.append(chunk)
+    return chunks
+
+def recursive_split(text: str, chunk_size: int, chunk_overlap: int,
+                    separators: Tuple[str, ...] = _SPLIT_SEPARATORS) -> List[str]:
+    """テキストを再帰的に区切り文字で分割し、chunk_size文字以下のチャンクにする
+    
+    LangChainのRecursiveCharacterTextSplitter（keep_separator=True, strip_whitespace=True）と
+    同じ結果になる。区切り文字は固定文字列なので正規表現ではなくstr.splitで分割する。
+    """
+    separator = separators[-1]
+    remaining = ()
+    for i, candidate in enumerate(separators):
+        if candidate == '':
+            separator = candidate
+            break
+        if candidate in text:
+            separator = candidate
+            remaining = separators[i + 1:]
+            break
+    
+    if separator:
+        # 区切り文字は後ろの分割片の先頭に残す
+        parts = text.split(separator)
+        splits = [piece for piece in (parts[0], *(separator + part for part in parts[1:])) if piece]
+    else:
+        splits = list(text)
+    
+    chunks = []
+    small_splits = []
+    for piece in splits:
+        if len(piece) < chunk_size:
+            small_splits.append(piece)
+            continue
+        if small_splits:
+            chunks.extend(_merge_splits(small_splits, chunk_size, chunk_overlap))
+            small_splits = []
+        if remaining:
+            chunks.extend(recursive_split(piece, chunk_size, chunk_overlap, remaining))
+        else:
+            chunks.append(piece)
+    if small_splits:
+        chunks.extend(_merge_splits(small_splits, chunk_size, chunk_overlap))
+    return chunks
+
 class EDPBChunkProcessor:
     """テキストチャンク分割・埋め込み生成クラス"""
     
-    def __init__(self, gemini_client: GeminiAPIClient, chunk_size: int = 1000, chunk_overlap: int = 100):
+    def __init__(self, gemini_client: GeminiAPIClient, chunk_size: int = 1000, chunk_overlap: int = 100,
+                 embed_batch_size: int = 64, embed_concurrency: int = 4):
         self.gemini_client = gemini_client
-        self.text_splitter = RecursiveCharacterTextSplitter(
-            chunk_size=chunk_size,
-            chunk_overlap=chunk_overlap,
-            length_function=len,
-            separators=["\n\n", "\n", " ", ""]
-        )
+        self.embed_batch_size = min(max(1, embed_batch_size), MAX_EMBED_BATCH_SIZE)
+        self.embed_concurrency = max(1, embed_concurrency)  # 同時に送る埋め込みAPIリクエスト数
+        if chunk_size <= 0 or not 0 <= chunk_overlap <= chunk_size:
+            raise ValueError(f"Invalid chunk_size/chunk_overlap: {chunk_size}/{chunk_overlap}")
+        self.chunk_size = chunk_size
+        self.chunk_overlap = chunk_overlap
+    
+    def _embed_batch(self, start: int, batch: List[str], total: int) -> Tuple[List, str]:
+        """1バッチ分の埋め込みを生成し、(embeddings, status) を返す（ワーカースレッドで実行）"""
+        try:
+            embeddings = self.gemini_client.get_embeddings_batch(batch, dimensions=768)
+            logger.info(f"Generated embeddings for chunks {start+1}-{start+len(batch)}/{total}")
+            return embeddings, 'completed'
+        except Exception as e:
+            logger.error(f"Error processing chunks {start}-{start+len(batch)-1}: {str(e)}")
+            return [None] * len(batch), 'failed'
     
     def create_chunks_with_embeddings(self, text: str) -> List[Dict]:
-        """テキストをチャンクに分割し、埋め込みを生成"""
-        chunks = self.text_splitter.split_text(text)
-        chunk_data = []
+        """テキストをチャンクに分割し、埋め込みを生成
         
+        同じ内容のチャンク（ヘッダー・定型文など）は1回だけ埋め込み、結果を各チャンクに割り当てる。
+        バッチごとのAPIリクエストはembed_concurrency本まで並列に送り、結果はチャンク順に並べる。
+        同時リクエスト数の上限がレート制限の役割を果たすため、バッチ間の待機は行わない。
+        """
+        chunks = recursive_split(text, self.chunk_size, self.chunk_overlap)
+        unique_chunks = list(dict.fromkeys(chunks))
+        if len(unique_chunks) < len(chunks):
+            logger.info(f"Embedding {len(unique_chunks)} unique chunks out of {len(chunks)}")
+        
+        starts = range(0, len(unique_chunks), self.embed_batch_size)
+        batches = [unique_chunks[start:start + self.embed_batch_size] for start in starts]
+        with ThreadPoolExecutor(max_workers=self.embed_concurrency) as executor:
+            results = executor.map(self._embed_batch, starts, batches, [len(unique_chunks)] * len(batches))
+        
+        # チャンク内容 -> (embedding, status)
+        embedded = {}
+        for batch, (embeddings, status) in zip(batches, results):
+            for chunk, embedding in zip(batch, embeddings):
+                embedded[chunk] = (embedding, status)
+        
+        chunk_data = []
         for i, chunk in enumerate(chunks):
-            try:
-                embedding = self.gemini_client.get_embedding(chunk, dimensions=768)
-                chunk_info = {
-                    'chunk_index': i,
-                    'content': chunk,
-                    'token_count': len(chunk.split()),
-                    'embedding_vector': embedding,
-                    'embedding_status': 'completed'
-                }
-                chunk_data.append(chunk_info)
-                logger.info(f"Generated embedding for chunk {i+1}/{len(chunks)}")
-                
-                # API制限対応
-                time.sleep(0.1)
-                
-            except Exception as e:
-                logger.error(f"Error processing chunk {i}: {str(e)}")
-                chunk_info = {
-                    'chunk_index': i,
-                    'content': chunk,
-                    'token_count': len(chunk.split()),
-                    'embedding_vector': None,
-                    'embedding_status': 'failed'
-                }
-                chunk_data.append(chunk_info)
+            embedding, status = embedded[chunk]
+            chunk_data.append({
+                'chunk_index': i,
+                'content': chunk,
+                'token_count': sum(1 for _ in _WORD_RE.finditer(chunk)),  # 語のリストを作らずに数える
+                'embedding_vector': embedding,
+                'embedding_status': status
+            })
         
         return chunk_data
 
@@ -261,13 +519,209 @@ class EDPBDatabaseHandler:
     
     def __init__(self, db_path: str):
         self.db_path = db_path
+        self._initialized = False
+        self._init_lock = threading.Lock()  # スレッド間で共有されるため、初期化を1回だけにする
+        # 使い終わった接続を保持して次の操作で使い回す（短命なスレッドが増えても接続数はここで頭打ちになる）
+        self._idle_connections = queue.LifoQueue(maxsize=MAX_IDLE_CONNECTIONS)
+        # summary_semantic_cacheの埋め込み行列 {(model, dims): (行列, idのリスト, 読み込み済みの最大id)}
+        self._semantic_cache = {}
+        self._semantic_cache_lock = threading.Lock()
     
-    def _get_connection(self) -> sqlite3.Connection:
-        """データベース接続を取得"""
-        conn = sqlite3.Connection(self.db_path)
+    def _open_connection(self) -> sqlite3.Connection:
+        """新しいデータベース接続を開く"""
+        # 接続はプールを介して別のスレッドでも使われるためcheck_same_thread=False
+        conn = sqlite3.Connection(self.db_path, timeout=30, check_same_thread=False)
         conn.row_factory = sqlite3.Row
+        if not self._initialized:
+            with self._init_lock:
+                # 同時に開いた別の接続が先に初期化していれば何もしない（ALTER TABLEの重複実行を防ぐ）
+                if not self._initialized:
+                    # journal_modeとテーブルはDBファイルに永続化されるので最初の接続時だけ設定する
+                    conn.execute("PRAGMA journal_mode=WAL")
+                    self._create_cache_tables(conn)
+                    self._add_guideline_columns(conn)
+                    self._create_lookup_indexes(conn)
+                    self._initialized = True
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute("PRAGMA temp_store=MEMORY")
+        conn.execute("PRAGMA cache_size=-65536")
         return conn
     
+    @contextmanager
+    def _get_connection(self) -> Iterator[sqlite3.Connection]:
+        """データベース接続を借りる（空いている接続があれば使い回し、なければ開く）
+        
+        with文はトランザクションの単位（正常終了でコミット、例外でロールバック）で、
+        終了後の接続はプールに戻す。プールが一杯なら閉じる。
+        """
+        try:
+            conn = self._idle_connections.get_nowait()
+        except queue.Empty:
+            conn = self._open_connection()
+        try:
+            with conn:
+                yield conn
+        finally:
+            try:
+                self._idle_connections.put_nowait(conn)
+            except queue.Full:
+                conn.close()
+    
+    def close(self):
+        """プールに残っている接続を閉じる"""
+        while True:
+            try:
+                self._idle_connections.get_nowait().close()
+            except queue.Empty:
+                break
+    
+    def _create_cache_tables(self, conn: sqlite3.Connection):
+        """Gemini API結果のキャッシュテーブルを作成（埋め込みはfloat32のバイト列で保存）"""
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS embedding_cache (
+                content_hash BLOB NOT NULL,
+                model TEXT NOT NULL,
+                dims INTEGER NOT NULL,
+                vector BLOB NOT NULL,
+                PRIMARY KEY (content_hash, model, dims)
+            )
+        """)
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS summary_cache (
+                prompt_hash BLOB NOT NULL,
+                model TEXT NOT NULL,
+                summary TEXT NOT NULL,
+                PRIMARY KEY (prompt_hash, model)
+            )
+        """)
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS summary_semantic_cache (
+                id INTEGER PRIMARY KEY,
+                model TEXT NOT NULL,
+                dims INTEGER NOT NULL,
+                input_embedding BLOB NOT NULL,
+                summary TEXT NOT NULL
+            )
+        """)
+        conn.commit()
+    
+    def _add_guideline_columns(self, conn: sqlite3.Connection):
+        """edpb_guidelinesにPDFのSHA-256と全文ファイルのパスを保存する列を追加（既存DB向け）
+        
+        別のハンドラやプロセスが同じDBを同時に移行しても列が二重に追加されないよう、
+        書き込みロックを取ってから（BEGIN IMMEDIATE）列を読み直して追加する。
+        """
+        with conn:
+            conn.execute("BEGIN IMMEDIATE")
+            columns = {row['name'] for row in conn.execute("PRAGMA table_info(edpb_guidelines)")}
+            if not columns:
+                return  # テーブル未作成
+            if 'content_sha256' not in columns:
+                conn.execute("ALTER TABLE edpb_guidelines ADD COLUMN content_sha256 TEXT")
+            if 'full_text_path' not in columns:
+                conn.execute("ALTER TABLE edpb_guidelines ADD COLUMN full_text_path TEXT")
+            conn.execute("""
+                CREATE INDEX IF NOT EXISTS idx_edpb_guidelines_content_sha256
+                ON edpb_guidelines(content_sha256)
+            """)
+    
+    def _create_lookup_indexes(self, conn: sqlite3.Connection):
+        """guideline_idで参照する子テーブルにインデックスを作成（存在するテーブルのみ）"""
+        tables = {row['name'] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+        for table in ('edpb_chunks', 'edpb_summary_embeddings', 'edpb_processing_log'):
+            if table in tables:
+                conn.execute(f"CREATE INDEX IF NOT EXISTS idx_{table}_guideline_id ON {table}(guideline_id)")
+        conn.commit()
+    
+    def find_completed_guideline(self, content_sha256: str) -> Optional[int]:
+        """同じ内容のPDFが処理済みであればそのguideline_idを返す"""
+        with self._get_connection() as conn:
+            row = conn.execute("""
+                SELECT guideline_id FROM edpb_guidelines
+                WHERE content_sha256 = ? AND processing_status = 'completed'
+                LIMIT 1
+            """, (content_sha256,)).fetchone()
+        return row['guideline_id'] if row else None
+    
+    def get_cached_embeddings(self, content_hashes: List[bytes], model: str, dims: int) -> Dict[bytes, List[float]]:
+        """キャッシュ済みの埋め込みを content_hash -> embedding で返す"""
+        if not content_hashes:
+            return {}
+        placeholders = ','.join('?' * len(content_hashes))
+        with self._get_connection() as conn:
+            rows = conn.execute(f"""
+                SELECT content_hash, vector FROM embedding_cache
+                WHERE model = ? AND dims = ? AND content_hash IN ({placeholders})
+            """, (model, dims, *content_hashes)).fetchall()
+        return {row['content_hash']: array('f', row['vector']).tolist() for row in rows}
+    
+    def put_cached_embeddings(self, items: List[Tuple[bytes, List[float]]], model: str, dims: int):
+        """content_hash, embedding の組をキャッシュに保存"""
+        with self._get_connection() as conn:
+            conn.executemany("""
+                INSERT OR IGNORE INTO embedding_cache (content_hash, model, dims, vector)
+                VALUES (?, ?, ?, ?)
+            """, [(content_hash, model, dims, array('f', embedding).tobytes()) for content_hash, embedding in items])
+            conn.commit()
+    
+    def get_cached_summary(self, prompt_hash: bytes, model: str) -> Optional[str]:
+        """キャッシュ済みのサマリーを取得"""
+        with self._get_connection() as conn:
+            row = conn.execute("""
+                SELECT summary FROM summary_cache WHERE prompt_hash = ? AND model = ?
+            """, (prompt_hash, model)).fetchone()
+        return row['summary'] if row else None
+    
+    def put_cached_summary(self, prompt_hash: bytes, model: str, summary: str):
+        """サマリーをキャッシュに保存"""
+        with self._get_connection() as conn:
+            conn.execute("""
+                INSERT OR IGNORE INTO summary_cache (prompt_hash, model, summary)
+                VALUES (?, ?, ?)
+            """, (prompt_hash, model, summary))
+            conn.commit()
+    
+    def find_similar_summary(self, input_embedding: np.ndarray, model: str,
+                             threshold: float) -> Optional[Tuple[str, float]]:
+        """サマリー入力の埋め込み（正規化済み）に最も近い既存サマリーを探す
+        
+        類似度がthresholdを超えた場合のみ (summary, similarity) を返す。
+        保存時に正規化しているので、類似度は1回の行列ベクトル積で求まる。
+        埋め込み行列はメモリに保持し、前回以降に追加された行だけをDBから読み足す。
+        """
+        dims = len(input_embedding)
+        with self._get_connection() as conn, self._semantic_cache_lock:
+            matrix, ids, last_id = self._semantic_cache.get((model, dims), (np.empty((0, dims), dtype=np.float32), [], 0))
+            rows = conn.execute("""
+                SELECT id, input_embedding FROM summary_semantic_cache
+                WHERE model = ? AND dims = ? AND id > ?
+                ORDER BY id
+            """, (model, dims, last_id)).fetchall()
+            if rows:
+                added = np.frombuffer(b''.join(row['input_embedding'] for row in rows), dtype=np.float32)
+                matrix = np.vstack([matrix, added.reshape(len(rows), dims)])
+                ids = ids + [row['id'] for row in rows]
+                self._semantic_cache[(model, dims)] = (matrix, ids, rows[-1]['id'])
+            if not ids:
+                return None
+            
+            similarities = matrix @ input_embedding
+            best = int(np.argmax(similarities))
+            if similarities[best] <= threshold:
+                return None
+            summary = conn.execute("SELECT summary FROM summary_semantic_cache WHERE id = ?",
+                                   (ids[best],)).fetchone()['summary']
+            return summary, float(similarities[best])
+    
+    def save_summary_semantic_cache(self, input_embedding: np.ndarray, model: str, summary: str):
+        """サマリー入力の埋め込み（正規化済み）とサマリーを保存"""
+        with self._get_connection() as conn:
+            conn.execute("""
+                INSERT INTO summary_semantic_cache (model, dims, input_embedding, summary)
+                VALUES (?, ?, ?, ?)
+            """, (model, len(input_embedding), input_embedding.astype(np.float32).tobytes(), summary))
+            conn.commit()
+    
     def log_processing_step(self, guideline_id: int, step: str, status: str, 
                           error_message: str = None, processing_time: float = None):
         """処理ステップをログに記録"""
@@ -282,64 +736,89 @@ class EDPBDatabaseHandler:
     def save_guideline(self, metadata: Dict) -> int:
         """ガイドライン基本情報を保存"""
         with self._get_connection() as conn:
-            # ファイル名が重複している場合は、ユニークなファイル名を生成
+            # 書き込みロックを先に取得し、空きファイル名の確認から挿入までを他の接続と競合させない
+            conn.execute("BEGIN IMMEDIATE")
             original_filename = metadata['filename']
-            filename = original_filename
-            counter = 1
+            filename = self._unique_filename(conn, original_filename)
+            if filename != original_filename:
+                logger.info(f"Filename modified to avoid duplicate: {original_filename} -> {filename}")
             
-            while True:
-                try:
-                    cursor = conn.execute("""
-                        INSERT INTO edpb_guidelines 
-                        (filename, title, document_type, version, adoption_date, page_count, 
-                         file_size_bytes, working_party_number, edpb_number, subject_matter, 
-                         related_articles, processing_status)
-                        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, 'processing')
-                    """, (
-                        filename,
-                        metadata['title'],
-                        metadata['document_type'],
-                        metadata.get('version'),
-                        metadata.get('adopted_date'),
-                        metadata['page_count'],
-                        metadata['file_size_bytes'],
-                        metadata.get('working_party_number'),
-                        metadata.get('edpb_number'),
-                        metadata.get('subject_matter'),
-                        metadata.get('related_articles')
-                    ))
-                    conn.commit()
-                    
-                    # ファイル名を変更した場合はログ出力
-                    if filename != original_filename:
-                        logger.info(f"Filename modified to avoid duplicate: {original_filename} -> {filename}")
-                    
-                    return cursor.lastrowid
-                    
-                except sqlite3.IntegrityError as e:
-                    if "UNIQUE constraint failed: edpb_guidelines.filename" in str(e):
-                        # ファイル名にカウンターを追加してリトライ
-                        name_parts = original_filename.rsplit('.', 1)
-                        if len(name_parts) == 2:
-                            filename = f"{name_parts[0]}_{counter}.{name_parts[1]}"
-                        else:
-                            filename = f"{original_filename}_{counter}"
-                        counter += 1
-                        logger.info(f"Filename collision detected, trying: {filename}")
-                        continue
-                    else:
-                        raise
-    
-    def update_guideline_content(self, guideline_id: int, summary: str, full_text: str):
-        """ガイドラインのサマリーと全文を更新"""
+            cursor = conn.execute("""
+                INSERT INTO edpb_guidelines 
+                (filename, title, document_type, version, adoption_date, page_count, 
+                 file_size_bytes, working_party_number, edpb_number, subject_matter, 
+                 related_articles, content_sha256, processing_status)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, 'processing')
+            """, (
+                filename,
+                metadata['title'],
+                metadata['document_type'],
+                metadata.get('version'),
+                metadata.get('adopted_date'),
+                metadata['page_count'],
+                metadata['file_size_bytes'],
+                metadata.get('working_party_number'),
+                metadata.get('edpb_number'),
+                metadata.get('subject_matter'),
+                metadata.get('related_articles'),
+                metadata.get('content_sha256')
+            ))
+            conn.commit()
+            return cursor.lastrowid
+    
+    @staticmethod
+    def _unique_filename(conn: sqlite3.Connection, original_filename: str) -> str:
+        """既存と重複しないファイル名を返す（重複時は name_1.pdf, name_2.pdf ... の最初の空き）
+        
+        候補になり得るファイル名をfilenameのUNIQUEインデックスの範囲検索で一度に取得する。
+        """
+        name_parts = original_filename.rsplit('.', 1)
+        prefix = f"{name_parts[0]}_"
+        taken = {row['filename'] for row in conn.execute("""
+            SELECT filename FROM edpb_guidelines
+            WHERE filename = ? OR (filename >= ? AND filename < ?)
+        """, (original_filename, prefix, prefix + '\U0010ffff'))}
+        
+        filename = original_filename
+        counter = 1
+        while filename in taken:
+            if len(name_parts) == 2:
+                filename = f"{name_parts[0]}_{counter}.{name_parts[1]}"
+            else:
+                filename = f"{original_filename}_{counter}"
+            counter += 1
+        return filename
+    
+    def update_guideline_content(self, guideline_id: int, summary: str, full_text: str,
+                                 text_path: Optional[Path]):
+        """ガイドラインのサマリーと全文（またはその保存先）を更新
+        
+        全文はチャンクと二重に持たないようDBには保存せず（full_textはNULL）、text_pathのファイルに置く。
+        パスは別のカレントディレクトリからも読めるよう絶対パスで保存する。
+        ファイルに書けなかった場合（text_pathがNone）はDBのfull_textに全文を保存する。
+        """
+        if text_path is not None:
+            full_text, text_path = None, str(Path(text_path).resolve())
         with self._get_connection() as conn:
             conn.execute("""
                 UPDATE edpb_guidelines 
-                SET summary = ?, full_text = ?, updated_at = CURRENT_TIMESTAMP
+                SET summary = ?, full_text = ?, full_text_path = ?, updated_at = CURRENT_TIMESTAMP
                 WHERE guideline_id = ?
-            """, (summary, full_text, guideline_id))
+            """, (summary, full_text, text_path, guideline_id))
             conn.commit()
     
+    def get_full_text(self, guideline_id: int) -> Optional[str]:
+        """ガイドラインの全文を返す（全文ファイルがなければDBの旧full_text列）"""
+        with self._get_connection() as conn:
+            row = conn.execute("""
+                SELECT full_text, full_text_path FROM edpb_guidelines WHERE guideline_id = ?
+            """, (guideline_id,)).fetchone()
+        if row is None:
+            return None
+        if row['full_text_path'] and Path(row['full_text_path']).is_file():
+            return Path(row['full_text_path']).read_text(encoding='utf-8')
+        return row['full_text']
+    
     def save_summary_embedding(self, guideline_id: int, embedding: List[float]) -> bool:
         """サマリーの埋め込みを保存"""
         try:
@@ -348,7 +827,7 @@ class EDPBDatabaseHandler:
                     INSERT INTO edpb_summary_embeddings 
                     (guideline_id, embedding_vector)
                     VALUES (?, ?)
-                """, (guideline_id, json.dumps(embedding)))
+                """, (guideline_id, encode_embedding(embedding)))
                 conn.commit()
                 return True
         except Exception as e:
@@ -358,21 +837,25 @@ class EDPBDatabaseHandler:
     def save_chunks(self, guideline_id: int, chunks: List[Dict]) -> bool:
         """チャンクを保存"""
         try:
+            rows = [
+                (
+                    guideline_id,
+                    chunk['chunk_index'],
+                    chunk['content'],
+                    chunk['token_count'],
+                    encode_embedding(chunk['embedding_vector']) if chunk['embedding_vector'] else None,
+                    chunk['embedding_status']
+                )
+                for chunk in chunks
+            ]
             with self._get_connection() as conn:
-                for chunk in chunks:
-                    embedding_json = json.dumps(chunk['embedding_vector']) if chunk['embedding_vector'] else None
-                    conn.execute("""
-                        INSERT INTO edpb_chunks 
-                        (guideline_id, chunk_index, content, token_count, embedding_vector, embedding_status)
-                        VALUES (?, ?, ?, ?, ?, ?)
-                    """, (
-                        guideline_id,
-                        chunk['chunk_index'],
-                        chunk['content'],
-                        chunk['token_count'],
-                        embedding_json,
-                        chunk['embedding_status']
-                    ))
+                # 書き込みロックを最初に取得し、全チャンクを1トランザクションで挿入する
+                conn.execute("BEGIN IMMEDIATE")
+                conn.executemany("""
+                    INSERT INTO edpb_chunks 
+                    (guideline_id, chunk_index, content, token_count, embedding_vector, embedding_status)
+                    VALUES (?, ?, ?, ?, ?, ?)
+                """, rows)
                 conn.commit()
                 return True
         except Exception as e:
@@ -402,12 +885,42 @@ class EDPBDatabaseHandler:
 class EDPBProcessor:
     """メインプロセッサクラス - 全体の処理を統合"""
     
-    def __init__(self, gemini_api_key: str, db_path: str, chunk_size: int = 1000, chunk_overlap: int = 100):
-        self.gemini_client = GeminiAPIClient(gemini_api_key)
+    def __init__(self, gemini_api_key: str, db_path: str, chunk_size: int = 1000, chunk_overlap: int = 100,
+                 embed_batch_size: int = 64, embed_concurrency: int = 4):
+        self.db_handler = EDPBDatabaseHandler(db_path)
+        self.gemini_client = GeminiAPIClient(gemini_api_key, cache=self.db_handler)
         self.metadata_extractor = EDPBMetadataExtractor(self.gemini_client)
         self.text_extractor = EDPBTextExtractor()
-        self.chunk_processor = EDPBChunkProcessor(self.gemini_client, chunk_size, chunk_overlap)
-        self.db_handler = EDPBDatabaseHandler(db_path)
+        self.chunk_processor = EDPBChunkProcessor(self.gemini_client, chunk_size, chunk_overlap, embed_batch_size,
+                                                  embed_concurrency)
+    
+    def close(self):
+        """データベース接続を閉じる"""
+        self.db_handler.close()
+    
+    def _summarize_head(self, pdf_path: Path) -> Tuple[str, float]:
+        """文書先頭からサマリーを生成し、(summary, 所要時間) を返す"""
+        step_start = time.time()
+        head = self.text_extractor.extract_head(pdf_path, SUMMARY_INPUT_CHARS + 1)
+        summary = self._generate_summary(truncate_at_boundary(head, SUMMARY_INPUT_CHARS))
+        return summary, time.time() - step_start
+    
+    def _generate_summary(self, text: str) -> str:
+        """サマリーを生成（ほぼ同じ内容の文書のサマリーが既にあれば再利用）"""
+        input_embedding = np.asarray(self.gemini_client.get_embedding(text, dimensions=768), dtype=np.float32)
+        norm = np.linalg.norm(input_embedding)
+        if norm:
+            input_embedding /= norm
+        
+        similar = self.db_handler.find_similar_summary(input_embedding, SUMMARY_MODEL, SUMMARY_SIMILARITY_THRESHOLD)
+        if similar:
+            summary, similarity = similar
+            logger.info(f"Reusing summary of a similar document (cosine similarity {similarity:.4f})")
+            return summary
+        
+        summary = self.gemini_client.generate_summary(text)
+        self.db_handler.save_summary_semantic_cache(input_embedding, SUMMARY_MODEL, summary)
+        return summary
     
     def process_pdf(self, pdf_path: Path) -> bool:
         """単一PDFファイルの完全処理"""
@@ -417,29 +930,46 @@ class EDPBProcessor:
         try:
             logger.info(f"Processing PDF: {pdf_path.name}")
             
+            # 0. 同じ内容のPDFが処理済みなら何もしない（ファイル名が変わっていても検出する）
+            content_sha256 = file_sha256(pdf_path)
+            existing_id = self.db_handler.find_completed_guideline(content_sha256)
+            if existing_id is not None:
+                logger.info(f"Skipping {pdf_path.name}: identical content already processed as guideline {existing_id}")
+                return True
+            
             # 1. メタデータ抽出
             step_start = time.time()
             metadata = self.metadata_extractor.extract_metadata(pdf_path)
+            metadata['content_sha256'] = content_sha256
             step_time = time.time() - step_start
             
             # 2. データベースに基本情報保存
             guideline_id = self.db_handler.save_guideline(metadata)
             self.db_handler.log_processing_step(guideline_id, "metadata_extraction", "completed", processing_time=step_time)
             
-            # 3. 全文抽出
-            step_start = time.time()
-            full_text = self.text_extractor.extract_full_text(pdf_path)
-            step_time = time.time() - step_start
-            self.db_handler.log_processing_step(guideline_id, "text_extraction", "completed", processing_time=step_time)
-            
-            # 4. サマリー生成
-            step_start = time.time()
-            summary = self.gemini_client.generate_summary(full_text[:8000])  # 最初の8000文字でサマリー生成
-            step_time = time.time() - step_start
+            # 3-4. サマリーは先頭ページだけで生成できるので、全文抽出と並行して進める
+            with ThreadPoolExecutor(max_workers=1) as summary_executor:
+                summary_future = summary_executor.submit(self._summarize_head, pdf_path)
+                
+                # 3. 全文抽出（チャンクと二重に持たないよう、全文はDBではなくPDFと同じ場所の.txtに保存）
+                step_start = time.time()
+                full_text = self.text_extractor.extract_full_text(pdf_path)
+                text_path = pdf_path.with_suffix('.txt')
+                try:
+                    text_path.write_text(full_text, encoding='utf-8')
+                except OSError as e:
+                    # 書き込めないディレクトリでも処理は続け、全文はDBに保存する
+                    logger.warning(f"Could not write {text_path}, storing full text in the database: {e}")
+                    text_path = None
+                step_time = time.time() - step_start
+                self.db_handler.log_processing_step(guideline_id, "text_extraction", "completed", processing_time=step_time)
+                
+                # 4. サマリー生成（先頭SUMMARY_INPUT_CHARS文字以内を文末で切ったもの）
+                summary, step_time = summary_future.result()
             self.db_handler.log_processing_step(guideline_id, "summary_generation", "completed", processing_time=step_time)
             
             # 5. ガイドライン内容を更新
-            self.db_handler.update_guideline_content(guideline_id, summary, full_text)
+            self.db_handler.update_guideline_content(guideline_id, summary, full_text, text_path)
             
             # 6. サマリーの埋め込み生成・保存
             step_start = time.time()
@@ -472,19 +1002,25 @@ class EDPBProcessor:
             
             return False
     
-    def process_directory(self, directory_path: Path) -> Dict[str, int]:
-        """ディレクトリ内のすべてのPDFを処理"""
+    def process_directory(self, directory_path: Path, max_workers: int = 4) -> Dict[str, int]:
+        """ディレクトリ内のすべてのPDFを処理（max_workers件まで並列）
+        
+        処理の大半はGemini APIの待ち時間なのでスレッドで並列化する。
+        DB接続は操作ごとにプールから借りて返すため、1つのプロセッサをスレッド間で共有できる。
+        """
         pdf_files = list(directory_path.glob("*.pdf"))
         results = {"success": 0, "failed": 0, "total": len(pdf_files)}
         
         logger.info(f"Found {len(pdf_files)} PDF files to process")
         
-        for pdf_file in pdf_files:
-            if self.process_pdf(pdf_file):
-                results["success"] += 1
-            else:
-                results["failed"] += 1
-            
-            logger.info(f"Progress: {results['success'] + results['failed']}/{results['total']}")
+        with ThreadPoolExecutor(max_workers=max(1, max_workers)) as executor:
+            futures = [executor.submit(self.process_pdf, pdf_file) for pdf_file in pdf_files]
+            for future in as_completed(futures):
+                if future.result():
+                    results["success"] += 1
+                else:
+                    results["failed"] += 1
+                
+                logger.info(f"Progress: {results['success'] + results['failed']}/{results['total']}")
         
         return results
\ No newline at end of file
@@ -1,16 +1,95 @@
 """Amendment history parser for EUR-Lex NOTICE XML files."""
 
-import xml.etree.ElementTree as ET
 import logging
 import re
-from typing import Dict, List, Optional, Tuple, Any
+from functools import lru_cache
+from typing import Dict, Iterator, List, Optional, Tuple, Any
 from datetime import datetime
 
-from sqlmodel import Session, select
+from lxml import etree as LET
+from sqlmodel import Session, func, select
 from .models_hierarchical import Regulation, AmendmentHistory, ConsolidatedVersion
 
 logger = logging.getLogger(__name__)
 
+# ElementTree/lxml expose rdf:resource under its namespace URI, not the prefix
+_RDF_RESOURCE = '{http://www.w3.org/1999/02/22-rdf-syntax-ns#}resource'
+
+_DATE_FORMAT = "%Y-%m-%d"
+_COMPACT_DATE_FORMAT = "%Y%m%d"
+
+# Consolidated version ID, e.g. '01995L0046-20180525'
+_VERSION_RE = re.compile(r'(\d{5}[LR]\d{4}-\d{8})')
+
+
+@lru_cache(maxsize=4096)
+def _consolidated_version_id(uri: str) -> Optional[str]:
+    """Extract consolidated version ID from URI (the same URI recurs across elements)."""
+    match = _VERSION_RE.search(uri)
+    return match.group(1) if match else None
+
+
+def _uri_part_after(uri: str, marker: str) -> Optional[str]:
+    """Part of the URI after the last marker, without any query string; None if marker is absent."""
+    _, found, rest = uri.rpartition(marker)
+    return rest.partition('?')[0] if found else None
+
+
+@lru_cache(maxsize=4096)
+def _uri_identifiers(uri: str) -> Tuple[Optional[str], Optional[str], Optional[str]]:
+    """Split a resource URI into its (CELEX, ELI, OJ) identifiers, None where absent."""
+    oj = uri.rpartition('/')[2] if 'oj/' in uri else None
+    return _uri_part_after(uri, 'celex/'), _uri_part_after(uri, 'eli/'), oj
+
+
+@lru_cache(maxsize=8192)
+def _parse_date(date_str: str) -> Optional[datetime]:
+    """Parse an ISO date string (amendments published together share the same dates)."""
+    try:
+        return datetime.strptime(date_str, _DATE_FORMAT)
+    except ValueError:
+        logger.warning("Failed to parse date: %s", date_str)
+        return None
+
+
+@lru_cache(maxsize=4096)
+def _version_date(version_id: str) -> datetime:
+    """Consolidation date of a version ID (its last 8 digits)."""
+    return datetime.strptime(version_id[-8:], _COMPACT_DATE_FORMAT)
+
+
+def _iter_xml_events(xml_content: str, chunk_size: int = 1 << 16) -> Iterator[Tuple[str, LET._Element]]:
+    """Stream (event, element) pairs for start and end tags, feeding libxml2 in slices.
+    
+    Unlike iterparse over io.StringIO, this does not copy the whole document first.
+    """
+    parser = LET.XMLPullParser(events=('start', 'end'), huge_tree=True, collect_ids=False,
+                               remove_comments=True, remove_pis=True)
+    for offset in range(0, len(xml_content), chunk_size):
+        parser.feed(xml_content[offset:offset + chunk_size])
+        yield from parser.read_events()
+    parser.close()
+    yield from parser.read_events()
+
+
+# Amendment relationship elements and the amendment type they record
+_AMENDMENT_TAGS = {
+    'RESOURCE_LEGAL_AMENDED_BY_ACT': 'amended',
+    'RESOURCE_LEGAL_CORRIGED_BY_ACT': 'corrected',
+    'RESOURCE_LEGAL_REPEALED_BY_ACT': 'repealed',
+    'REPEALS_ACT': 'repeals'
+}
+
+_CONSOLIDATED_TAG = 'RESOURCE_LEGAL_CONSOLIDATED_BY_ACT_CONSOLIDATED'
+
+# Elements whose VALUE child feeds the regulation's time series metadata
+_TIME_SERIES_TAGS = {
+    'RESOURCE_LEGAL_DATE_ENTRY_INTO_FORCE': 'entry_into_force',
+    'RESOURCE_LEGAL_DATE_APPLICATION': 'application',
+    'RESOURCE_LEGAL_DATE_END-OF-VALIDITY': 'end_of_validity',
+    _CONSOLIDATED_TAG: 'consolidated'
+}
+
 
 class AmendmentParser:
     """Parse amendment history from EUR-Lex XML files."""
@@ -20,204 +99,226 @@ class AmendmentParser:
 
     def _extract_celex_from_uri(self, uri: str) -> Optional[str]:
         """Extract CELEX ID from URI."""
-        if 'celex/' in uri:
-            return uri.split('celex/')[-1].split('?')[0]
-        return None
+        return _uri_identifiers(uri)[0]
 
     def _extract_eli_from_uri(self, uri: str) -> Optional[str]:
         """Extract ELI from URI."""
-        if 'eli/' in uri:
-            return uri.split('eli/')[-1].split('?')[0]
-        return None
+        return _uri_identifiers(uri)[1]
 
     def _parse_date(self, date_str: str) -> Optional[datetime]:
         """Parse date string to datetime."""
         if not date_str:
             return None
-        try:
-            return datetime.strptime(date_str, "%Y-%m-%d")
-        except ValueError:
-            logger.warning(f"Failed to parse date: {date_str}")
-            return None
+        return _parse_date(date_str)
 
     def _extract_consolidated_version_id(self, uri: str) -> Optional[str]:
         """Extract consolidated version ID from URI like '01995L0046-20180525'."""
-        pattern = r'(\d{5}[LR]\d{4}-\d{8})'
-        match = re.search(pattern, uri)
-        return match.group(1) if match else None
+        return _consolidated_version_id(uri)
 
     def extract_amendment_history(self, xml_content: str, celex_id: str) -> Dict[str, int]:
-        """Extract amendment history from XML content."""
+        """Extract amendment history from XML content.
+        
+        The XML is streamed in a single pass: each element of interest is handled
+        when its end tag is read, and finished subtrees are cleared to keep memory flat.
+        """
         try:
-            root = ET.fromstring(xml_content)
-            amendments_created = 0
-            versions_created = 0
-            
-            # Find amendment relationships
-            amendment_types = [
-                ('RESOURCE_LEGAL_AMENDED_BY_ACT', 'amended'),
-                ('RESOURCE_LEGAL_CORRIGED_BY_ACT', 'corrected'),
-                ('RESOURCE_LEGAL_REPEALED_BY_ACT', 'repealed'),
-                ('REPEALS_ACT', 'repeals')
-            ]
+            # Rows are collected as plain dicts and bulk-inserted; bulk inserts skip
+            # model defaults, so created_at is filled in explicitly
+            created_at = datetime.utcnow()
+            amendments_by_type: Dict[str, List[Dict[str, Any]]] = {
+                amendment_type: [] for amendment_type in _AMENDMENT_TAGS.values()
+            }
+            versions: List[Dict[str, Any]] = []
+            time_series: Dict[str, Optional[str]] = {}
             
-            for xml_tag, amendment_type in amendment_types:
-                elements = root.findall(f'.//{xml_tag}')
-                for element in elements:
+            open_elements = 0  # Handled elements still open; their subtrees must be kept
+            for event, element in _iter_xml_events(xml_content):
+                tag = element.tag
+                handled = tag in _AMENDMENT_TAGS or tag in _TIME_SERIES_TAGS
+                if event == 'start':
+                    open_elements += handled
+                    continue
+                
+                if tag in _AMENDMENT_TAGS:
                     try:
-                        # Extract amending act CELEX
-                        amending_celex = None
-                        amending_eli = None
-                        
-                        # Look for CELEX in VALUE or IDENTIFIER
-                        value_elem = element.find('.//VALUE')
-                        if value_elem is not None:
-                            amending_celex = self._extract_celex_from_uri(value_elem.text or '')
-                        
-                        # Look for ELI
-                        for sameas in element.findall('.//SAMEAS'):
-                            if 'eli/' in (sameas.get('rdf:resource') or ''):
-                                amending_eli = self._extract_eli_from_uri(sameas.get('rdf:resource') or '')
-                                break
-                        
-                        # Extract date
-                        date_elem = element.find('.//DATE')
-                        amendment_date = self._parse_date(date_elem.text) if date_elem is not None else None
-                        
-                        # Extract article reference from annotations
-                        article_ref = None
-                        ref_elem = element.find('.//REFERENCE_TO_MODIFIED_LOCATION')
-                        if ref_elem is not None:
-                            article_ref = ref_elem.text
-                        
-                        # Extract OJ reference
-                        oj_ref = None
-                        for sameas in element.findall('.//SAMEAS'):
-                            if 'oj/' in (sameas.get('rdf:resource') or ''):
-                                oj_ref = sameas.get('rdf:resource', '').split('/')[-1]
-                                break
-                        
-                        # Create amendment record
-                        if amending_celex or amending_eli:
-                            amendment = AmendmentHistory(
-                                celex_id=celex_id,
-                                amending_act_celex=amending_celex,
-                                amending_act_eli=amending_eli,
-                                amendment_type=amendment_type,
-                                amendment_date=amendment_date,
-                                article_reference=article_ref,
-                                oj_reference=oj_ref
-                            )
-                            
-                            self.session.add(amendment)
-                            amendments_created += 1
-                            logger.info(f"Created amendment record: {celex_id} {amendment_type} by {amending_celex or amending_eli}")
-                    
+                        amendment = self._amendment_row(element, celex_id, _AMENDMENT_TAGS[tag], created_at)
+                        if amendment:
+                            amendments_by_type[amendment['amendment_type']].append(amendment)
                     except Exception as e:
-                        logger.error(f"Failed to process amendment element: {e}")
-            
-            # Find consolidated versions
-            consolidated_elements = root.findall('.//RESOURCE_LEGAL_CONSOLIDATED_BY_ACT_CONSOLIDATED')
-            for element in consolidated_elements:
-                try:
-                    value_elem = element.find('.//VALUE')
+                        logger.error("Failed to process amendment element: %s", e)
+                elif tag == _CONSOLIDATED_TAG:
+                    try:
+                        version = self._version_row(element, celex_id, created_at)
+                        if version:
+                            versions.append(version)
+                    except Exception as e:
+                        logger.error("Failed to process consolidated version: %s", e)
+                
+                # Time series values come from the first such element with a direct VALUE child
+                if tag in _TIME_SERIES_TAGS and _TIME_SERIES_TAGS[tag] not in time_series:
+                    value_elem = element.find('VALUE')
                     if value_elem is not None:
-                        version_id = self._extract_consolidated_version_id(value_elem.text or '')
-                        if version_id:
-                            # Extract date from version ID (last 8 digits)
-                            date_str = version_id[-8:]
-                            consolidated_date = datetime.strptime(date_str, "%Y%m%d")
-                            
-                            version = ConsolidatedVersion(
-                                version_id=version_id,
-                                base_celex_id=celex_id,
-                                consolidated_date=consolidated_date,
-                                version_uri=value_elem.text,
-                                is_current=True  # We'll update this logic later
-                            )
-                            
-                            self.session.add(version)
-                            versions_created += 1
-                            logger.info(f"Created consolidated version: {version_id}")
+                        time_series[_TIME_SERIES_TAGS[tag]] = value_elem.text
                 
-                except Exception as e:
-                    logger.error(f"Failed to process consolidated version: {e}")
+                open_elements -= handled
+                if not open_elements:
+                    element.clear()
+            
+            # Keep the previous row order: grouped by amendment type, then document order
+            amendments = [row for rows in amendments_by_type.values() for row in rows]
+            self.session.bulk_insert_mappings(AmendmentHistory, amendments)
+            self.session.bulk_insert_mappings(ConsolidatedVersion, versions)
             
             # Extract time series metadata
-            self._extract_time_series_metadata(root, celex_id)
+            self._extract_time_series_metadata(time_series, celex_id)
             
             self.session.commit()
             
             return {
-                'amendments_created': amendments_created,
-                'versions_created': versions_created
+                'amendments_created': len(amendments),
+                'versions_created': len(versions)
             }
             
         except Exception as e:
-            logger.error(f"Failed to extract amendment history: {e}")
+            logger.error("Failed to extract amendment history: %s", e)
             self.session.rollback()
             return {'amendments_created': 0, 'versions_created': 0}
 
-    def _extract_time_series_metadata(self, root: ET.Element, celex_id: str) -> None:
-        """Extract and update time series metadata in regulation table."""
+    def _amendment_row(self, element: LET._Element, celex_id: str, amendment_type: str,
+                       created_at: datetime) -> Optional[Dict[str, Any]]:
+        """Build an AmendmentHistory row from an amendment element, if it names the amending act."""
+        # Extract amending act CELEX
+        amending_celex = None
+        amending_eli = None
+        
+        # Look for CELEX in VALUE or IDENTIFIER
+        value_elem = element.find('.//VALUE')
+        if value_elem is not None:
+            amending_celex = self._extract_celex_from_uri(value_elem.text or '')
+        
+        # Look for ELI and OJ reference in one pass over the SAMEAS links (first of each wins);
+        # RDF files carry the link as rdf:resource, NOTICE files as a URI/VALUE child
+        oj_ref = None
+        eli_found = oj_found = False
+        for sameas in element.iterfind('.//SAMEAS'):
+            resource = sameas.get(_RDF_RESOURCE) or sameas.findtext('URI/VALUE') or ''
+            _, eli, oj = _uri_identifiers(resource)
+            if eli is not None and not eli_found:
+                amending_eli, eli_found = eli, True
+            if oj is not None and not oj_found:
+                oj_ref, oj_found = oj, True
+            if eli_found and oj_found:
+                break
+        
+        # Extract date
+        date_elem = element.find('.//DATE')
+        amendment_date = self._parse_date(date_elem.text) if date_elem is not None else None
+        
+        # Extract article reference from annotations
+        article_ref = None
+        ref_elem = element.find('.//REFERENCE_TO_MODIFIED_LOCATION')
+        if ref_elem is not None:
+            article_ref = ref_elem.text
+        
+        if not (amending_celex or amending_eli):
+            return None
+        
+        logger.debug("Created amendment record: %s %s by %s", celex_id, amendment_type, amending_celex or amending_eli)
+        return {
+            'celex_id': celex_id,
+            'amending_act_celex': amending_celex,
+            'amending_act_eli': amending_eli,
+            'amendment_type': amendment_type,
+            'amendment_date': amendment_date,
+            'article_reference': article_ref,
+            'oj_reference': oj_ref,
+            'created_at': created_at
+        }
+
+    def _version_row(self, element: LET._Element, celex_id: str,
+                     created_at: datetime) -> Optional[Dict[str, Any]]:
+        """Build a ConsolidatedVersion row from a consolidated-by element, if it has a version ID."""
+        value_elem = element.find('.//VALUE')
+        if value_elem is None:
+            return None
+        version_id = self._extract_consolidated_version_id(value_elem.text or '')
+        if not version_id:
+            return None
+        
+        # Extract date from version ID (last 8 digits)
+        consolidated_date = _version_date(version_id)
+        
+        logger.debug("Created consolidated version: %s", version_id)
+        return {
+            'version_id': version_id,
+            'base_celex_id': celex_id,
+            'consolidated_date': consolidated_date,
+            'version_uri': value_elem.text,
+            'is_current': True,  # We'll update this logic later
+            'created_at': created_at
+        }
+
+    def _extract_time_series_metadata(self, time_series: Dict[str, Optional[str]], celex_id: str) -> None:
+        """Update time series metadata in regulation table from the values found while parsing."""
         try:
             regulation = self.session.exec(
                 select(Regulation).where(Regulation.celex_id == celex_id)
             ).first()
             
             if not regulation:
-                logger.warning(f"Regulation {celex_id} not found for time series update")
+                logger.warning("Regulation %s not found for time series update", celex_id)
                 return
             
             # Extract entry into force date
-            entry_force_elem = root.find('.//RESOURCE_LEGAL_DATE_ENTRY_INTO_FORCE/VALUE')
-            if entry_force_elem is not None:
-                regulation.entry_into_force_date = self._parse_date(entry_force_elem.text)
+            if 'entry_into_force' in time_series:
+                regulation.entry_into_force_date = self._parse_date(time_series['entry_into_force'])
             
             # Extract application date
-            application_elem = root.find('.//RESOURCE_LEGAL_DATE_APPLICATION/VALUE')
-            if application_elem is not None:
-                regulation.application_date = self._parse_date(application_elem.text)
+            if 'application' in time_series:
+                regulation.application_date = self._parse_date(time_series['application'])
             
             # Extract end of validity date
-            end_validity_elem = root.find('.//RESOURCE_LEGAL_DATE_END-OF-VALIDITY/VALUE')
-            if end_validity_elem is not None:
-                regulation.end_of_validity_date = self._parse_date(end_validity_elem.text)
+            if 'end_of_validity' in time_series:
+                regulation.end_of_validity_date = self._parse_date(time_series['end_of_validity'])
             
             # Find current consolidated version
-            consolidated_elem = root.find('.//RESOURCE_LEGAL_CONSOLIDATED_BY_ACT_CONSOLIDATED/VALUE')
-            if consolidated_elem is not None:
-                version_id = self._extract_consolidated_version_id(consolidated_elem.text or '')
+            if 'consolidated' in time_series:
+                version_id = self._extract_consolidated_version_id(time_series['consolidated'] or '')
                 if version_id:
                     regulation.consolidated_version_id = version_id
-                    regulation.consolidated_as_of_date = datetime.strptime(version_id[-8:], "%Y%m%d")
+                    regulation.consolidated_as_of_date = _version_date(version_id)
             
-            logger.info(f"Updated time series metadata for {celex_id}")
+            logger.info("Updated time series metadata for %s", celex_id)
             
         except Exception as e:
-            logger.error(f"Failed to extract time series metadata: {e}")
+            logger.error("Failed to extract time series metadata: %s", e)
 
     def get_amendment_stats(self, celex_id: str) -> Dict[str, Any]:
         """Get amendment statistics for a regulation."""
-        amendments = self.session.exec(
-            select(AmendmentHistory).where(AmendmentHistory.celex_id == celex_id)
-        ).all()
+        # Let the database count rows instead of loading every record
+        type_counts = dict(self.session.exec(
+            select(AmendmentHistory.amendment_type, func.count())
+            .where(AmendmentHistory.celex_id == celex_id)
+            .group_by(AmendmentHistory.amendment_type)
+        ).all())
         
-        versions = self.session.exec(
-            select(ConsolidatedVersion).where(ConsolidatedVersion.base_celex_id == celex_id)
-        ).all()
+        total_versions = self.session.exec(
+            select(func.count())
+            .select_from(ConsolidatedVersion)
+            .where(ConsolidatedVersion.base_celex_id == celex_id)
+        ).one()
         
         regulation = self.session.exec(
             select(Regulation).where(Regulation.celex_id == celex_id)
         ).first()
         
         return {
-            'total_amendments': len(amendments),
+            'total_amendments': sum(type_counts.values()),
             'amendments_by_type': {
-                amendment_type: len([a for a in amendments if a.amendment_type == amendment_type])
+                amendment_type: type_counts.get(amendment_type, 0)
                 for amendment_type in ['amended', 'corrected', 'repealed', 'repeals']
             },
-            'total_versions': len(versions),
+            'total_versions': total_versions,
             'current_version': regulation.consolidated_version_id if regulation else None,
             'time_series': {
                 'adoption_date': regulation.adoption_date.isoformat() if regulation and regulation.adoption_date else None,
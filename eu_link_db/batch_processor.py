@@ -1,10 +1,18 @@
 """Batch processor for multiple regulations and their CELLAR data."""
 
+import contextlib
+import io
 import logging
+import mmap
+import multiprocessing
+import os
+from functools import lru_cache
+from concurrent.futures import ProcessPoolExecutor, as_completed
 from pathlib import Path
-from typing import Dict, List, Optional
+from typing import Dict, List, Optional, Tuple, Union
 from rich.console import Console
 from rich.progress import Progress, SpinnerColumn, TextColumn, BarColumn, TimeRemainingColumn
+from rich.text import Text
 
 from .models_hierarchical import get_session
 from .ingest_structured_json import ingest_structured_json_file
@@ -14,6 +22,49 @@ from .eurlex_notice_parser import EurLexNoticeParser
 logger = logging.getLogger(__name__)
 console = Console()
 
+# The root element of a regulation XML file appears within its first few KB
+_FORMAT_SNIFF_BYTES = 4096
+
+# CELEX IDs of the regulations known by normalized name
+_CELEX_MAP = {
+    'gdpr': '32016R0679',
+    'ai_act': '32024R1689',
+}
+
+
+@lru_cache(maxsize=256)
+def _normalize_regulation_name(name: str) -> str:
+    """Normalize regulation names for consistent matching."""
+    # Convert to lowercase and replace spaces/underscores
+    normalized = name.lower().replace(' ', '_').replace('-', '_')
+    
+    # Handle specific mappings
+    if normalized in ['ai_act', 'aiact']:
+        return 'ai_act'
+    elif normalized == 'gdpr':
+        return 'gdpr'
+    
+    return normalized
+
+
+def _process_regulation_in_worker(db_url: str, regulation_name: str, json_file: Optional[Path],
+                                  xml_file: Optional[Path]) -> Tuple[Dict[str, int], str]:
+    """Process one regulation in a worker process with its own database session.
+    
+    The worker's console output, and warnings logged to stderr, are captured and
+    returned with the results so the parent can print them above its progress display.
+    """
+    global console
+    output = io.StringIO()
+    console = Console(file=output, force_terminal=True, soft_wrap=True)
+    processor = EURegulationBatchProcessor(db_url)
+    try:
+        with contextlib.redirect_stderr(output):
+            results = processor.process_single_regulation(regulation_name, json_file, xml_file)
+    finally:
+        processor.session.close()
+    return results, output.getvalue()
+
 
 class EURegulationBatchProcessor:
     """Batch processor for EU regulations and their citation data."""
@@ -23,50 +74,37 @@ class EURegulationBatchProcessor:
         self.session = get_session(db_url)
         
     def discover_files(self, data_dir: Path) -> Dict[str, Dict[str, Optional[Path]]]:
-        """Discover structured JSON and XML files for regulations."""
+        """Discover structured JSON and XML files for regulations (one directory scan)."""
         files = {}
+        json_files = []
+        xml_files = []
+        with os.scandir(data_dir) as entries:
+            for entry in entries:
+                if entry.name.endswith("_structured.json") and entry.is_file():
+                    json_files.append(entry)
+                elif entry.name.endswith(".xml") and entry.is_file():
+                    xml_files.append(entry)
         
         # Look for structured JSON files
-        for json_file in data_dir.glob("*_structured.json"):
-            regulation_name = json_file.stem.replace("_structured", "")
+        for entry in json_files:
+            regulation_name = entry.name[:-len(".json")].replace("_structured", "")
             # Normalize regulation names
-            normalized_name = self._normalize_regulation_name(regulation_name)
+            normalized_name = _normalize_regulation_name(regulation_name)
             if normalized_name not in files:
                 files[normalized_name] = {"json": None, "xml": None}
-            files[normalized_name]["json"] = json_file
+            files[normalized_name]["json"] = Path(entry.path)
             
         # Look for XML files
-        for xml_file in data_dir.glob("*.xml"):
-            regulation_name = xml_file.stem
+        for entry in xml_files:
+            regulation_name = entry.name[:-len(".xml")]
             # Normalize regulation names
-            normalized_name = self._normalize_regulation_name(regulation_name)
+            normalized_name = _normalize_regulation_name(regulation_name)
             if normalized_name not in files:
                 files[normalized_name] = {"json": None, "xml": None}
-            files[normalized_name]["xml"] = xml_file
+            files[normalized_name]["xml"] = Path(entry.path)
             
         return files
     
-    def _normalize_regulation_name(self, name: str) -> str:
-        """Normalize regulation names for consistent matching."""
-        # Convert to lowercase and replace spaces/underscores
-        normalized = name.lower().replace(' ', '_').replace('-', '_')
-        
-        # Handle specific mappings
-        if normalized in ['ai_act', 'aiact']:
-            return 'ai_act'
-        elif normalized == 'gdpr':
-            return 'gdpr'
-        
-        return normalized
-    
-    def _get_celex_id(self, regulation_name: str) -> Optional[str]:
-        """Get CELEX ID for a regulation name."""
-        name_mapping = {
-            'gdpr': '32016R0679',
-            'ai_act': '32024R1689',
-        }
-        return name_mapping.get(regulation_name)
-    
     def process_single_regulation(self, regulation_name: str, json_file: Path, xml_file: Optional[Path] = None) -> Dict[str, int]:
         """Process a single regulation with its JSON and optional XML data."""
         results = {"json_success": 0, "cellar_success": 0, "total_citations": 0, "total_caselaw": 0}
@@ -82,43 +120,8 @@ class EURegulationBatchProcessor:
             # Process XML if available (detect format and use appropriate parser)
             if xml_file and xml_file.exists():
                 console.print(f"⚖️  Processing XML: {xml_file.name}")
-                with open(xml_file, 'r', encoding='utf-8') as f:
-                    xml_content = f.read()
-                
-                # Detect XML format
-                if '<rdf:RDF' in xml_content:
-                    # RDF/XML format - use CELLAR ingester
-                    console.print("🔍 Detected RDF/XML format")
-                    cellar_ingester = CellarCitationIngester(self.session)
-                    cellar_result = cellar_ingester.ingest_cellar_data(xml_content)
-                    
-                    results["cellar_success"] = 1
-                    results["total_citations"] = cellar_result.get("successful", 0)
-                    results["total_caselaw"] = cellar_result.get("caselaw_created", 0)
-                    
-                    console.print(f"✅ RDF/XML ingested: {results['total_citations']} citations, {results['total_caselaw']} caselaw")
-                    
-                elif '<NOTICE' in xml_content:
-                    # NOTICE format - use EUR-Lex parser
-                    console.print("🔍 Detected EUR-Lex NOTICE format")
-                    
-                    # Extract regulation CELEX ID from normalized regulation name
-                    regulation_celex = self._get_celex_id(regulation_name)
-                    
-                    if regulation_celex:
-                        eurlex_parser = EurLexNoticeParser(self.session)
-                        eurlex_result = eurlex_parser.ingest_eurlex_notice_data(xml_content, regulation_celex)
-                        
-                        results["cellar_success"] = 1
-                        results["total_citations"] = eurlex_result.get("citations_created", 0)
-                        results["total_caselaw"] = eurlex_result.get("caselaw_created", 0)
-                        
-                        console.print(f"✅ EUR-Lex NOTICE ingested: {results['total_citations']} citations, {results['total_caselaw']} caselaw")
-                    else:
-                        console.print(f"⚠️  Could not determine regulation CELEX ID for {regulation_name}")
-                        
-                else:
-                    console.print(f"⚠️  Unknown XML format in {xml_file.name}")
+                with open(xml_file, 'rb') as f, self._map_file(f) as xml_data:
+                    self._process_xml(regulation_name, xml_file, xml_data, results)
             
         except Exception as e:
             console.print(f"❌ Error processing {regulation_name}: {e}", style="red")
@@ -126,8 +129,57 @@ class EURegulationBatchProcessor:
             
         return results
     
-    def process_batch(self, data_dir: Path) -> Dict[str, Dict[str, int]]:
-        """Process all regulations found in the data directory."""
+    @staticmethod
+    def _map_file(f):
+        """Memory-map a file read-only (an empty file cannot be mapped, so it yields empty bytes)."""
+        if os.fstat(f.fileno()).st_size == 0:
+            return contextlib.nullcontext(b'')
+        return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    
+    def _process_xml(self, regulation_name: str, xml_file: Path, xml_data: Union[bytes, mmap.mmap],
+                     results: Dict[str, int]) -> None:
+        """Detect the format of memory-mapped XML and ingest it with the matching parser."""
+        # Detect XML format from the root element near the start of the file
+        if xml_data.find(b'<rdf:RDF', 0, _FORMAT_SNIFF_BYTES) != -1:
+            # RDF/XML format - use CELLAR ingester (it also runs regexes over the text, so decode it)
+            console.print("🔍 Detected RDF/XML format")
+            cellar_ingester = CellarCitationIngester(self.session)
+            cellar_result = cellar_ingester.ingest_cellar_data(str(xml_data, 'utf-8'))
+            
+            results["cellar_success"] = 1
+            results["total_citations"] = cellar_result.get("successful", 0)
+            results["total_caselaw"] = cellar_result.get("caselaw_created", 0)
+            
+            console.print(f"✅ RDF/XML ingested: {results['total_citations']} citations, {results['total_caselaw']} caselaw")
+            
+        elif xml_data.find(b'<NOTICE', 0, _FORMAT_SNIFF_BYTES) != -1:
+            # NOTICE format - use EUR-Lex parser (parses the mapped bytes without decoding)
+            console.print("🔍 Detected EUR-Lex NOTICE format")
+            
+            # Extract regulation CELEX ID from normalized regulation name
+            regulation_celex = _CELEX_MAP.get(regulation_name)
+            
+            if regulation_celex:
+                eurlex_parser = EurLexNoticeParser(self.session)
+                eurlex_result = eurlex_parser.ingest_eurlex_notice_data(xml_data, regulation_celex)
+                
+                results["cellar_success"] = 1
+                results["total_citations"] = eurlex_result.get("citations_created", 0)
+                results["total_caselaw"] = eurlex_result.get("caselaw_created", 0)
+                
+                console.print(f"✅ EUR-Lex NOTICE ingested: {results['total_citations']} citations, {results['total_caselaw']} caselaw")
+            else:
+                console.print(f"⚠️  Could not determine regulation CELEX ID for {regulation_name}")
+                
+        else:
+            console.print(f"⚠️  Unknown XML format in {xml_file.name}")
+    
+    def process_batch(self, data_dir: Path, max_workers: Optional[int] = None) -> Dict[str, Dict[str, int]]:
+        """Process all regulations found in the data directory.
+        
+        Regulations are independent, so they are processed in parallel worker processes
+        (one per CPU by default); max_workers=1 processes them one by one in this process.
+        """
         console.print(f"🔍 Discovering files in {data_dir}")
         
         discovered_files = self.discover_files(data_dir)
@@ -143,6 +195,9 @@ class EURegulationBatchProcessor:
             console.print(f"  • {name}: JSON {json_status}, XML {xml_status}")
         
         results = {}
+        if max_workers is None:
+            max_workers = os.cpu_count() or 1
+        max_workers = min(max_workers, len(discovered_files))
         
         with Progress(
             SpinnerColumn(),
@@ -154,17 +209,46 @@ class EURegulationBatchProcessor:
         ) as progress:
             task = progress.add_task("Processing regulations...", total=len(discovered_files))
             
-            for regulation_name, files in discovered_files.items():
-                progress.update(task, description=f"Processing {regulation_name}...")
-                
-                result = self.process_single_regulation(
-                    regulation_name, 
-                    files["json"], 
-                    files["xml"]
-                )
-                results[regulation_name] = result
-                
-                progress.advance(task)
+            if max_workers <= 1:
+                for regulation_name, files in discovered_files.items():
+                    progress.update(task, description=f"Processing {regulation_name}...")
+                    
+                    result = self.process_single_regulation(
+                        regulation_name, 
+                        files["json"], 
+                        files["xml"]
+                    )
+                    results[regulation_name] = result
+                    
+                    progress.advance(task)
+            else:
+                # Workers are spawned rather than forked so they inherit neither the live progress
+                # display nor this process's open database connections. The schema already exists
+                # (this processor's get_session created it), so workers never race to create it.
+                with ProcessPoolExecutor(max_workers=max_workers,
+                                         mp_context=multiprocessing.get_context("spawn")) as executor:
+                    futures = {
+                        executor.submit(_process_regulation_in_worker, self.db_url, regulation_name,
+                                        files["json"], files["xml"]): regulation_name
+                        for regulation_name, files in discovered_files.items()
+                    }
+                    for future in as_completed(futures):
+                        regulation_name = futures[future]
+                        try:
+                            results[regulation_name], output = future.result()
+                        except Exception as e:
+                            console.print(f"❌ Error processing {regulation_name}: {e}", style="red")
+                            logger.error(f"Failed to process {regulation_name}: {e}")
+                            results[regulation_name] = {"json_success": 0, "cellar_success": 0,
+                                                        "total_citations": 0, "total_caselaw": 0}
+                            output = ""
+                        if output:
+                            console.print(Text.from_ansi(output.rstrip("\n")))
+                        progress.update(task, description=f"Processed {regulation_name}")
+                        progress.advance(task)
+            
+            # Report in discovery order regardless of completion order
+            results = {name: results[name] for name in discovered_files}
         
         return results
     
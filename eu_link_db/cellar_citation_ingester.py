@@ -12,7 +12,8 @@ import requests  # HTTP fetch for CELLAR
 from sqlmodel import Session, select
 from .models_hierarchical import (
     Regulation, Caselaw, Citation, 
-    Chapter, Recital, Article, Paragraph, SubParagraph, Annex
+    Chapter, Recital, Article, Paragraph, SubParagraph, Annex,
+    insert_ignore
 )
 
 logger = logging.getLogger(__name__)
@@ -211,10 +212,12 @@ class CellarCitationIngester:
         )
         
         try:
-            self.session.add(caselaw)
+            # Another batch worker may create the same case concurrently, so ignore conflicts
+            created = insert_ignore(self.session, caselaw)
             self.session.commit()
             self._caselaw_cache[ecli] = caselaw
-            logger.info(f"Created caselaw record for {ecli}")
+            if created:
+                logger.info(f"Created caselaw record for {ecli}")
             return True
         except Exception as e:
             logger.error(f"Failed to create caselaw record for {ecli}: {e}")
@@ -242,10 +245,12 @@ class CellarCitationIngester:
         )
         
         try:
-            self.session.add(caselaw)
+            # Another batch worker may create the same case concurrently, so ignore conflicts
+            created = insert_ignore(self.session, caselaw)
             self.session.commit()
             self._caselaw_cache[ecli] = caselaw
-            logger.info(f"Created caselaw record for {ecli} using provided metadata")
+            if created:
+                logger.info(f"Created caselaw record for {ecli} using provided metadata")
             return True
         except Exception as e:
             logger.error(f"Failed to create caselaw record for {ecli}: {e}")
@@ -366,14 +366,17 @@ def ingest_eurlex(xml_file, regulation_celex_id, db_url):
 @click.option(
     "--db-url", help="Database URL (default: sqlite:///eu_hierarchical.db)"
 )
-def batch_process(data_dir, db_url):
+@click.option(
+    "--workers", type=click.IntRange(min=1), help="Parallel worker processes (default: number of CPUs)"
+)
+def batch_process(data_dir, db_url, workers):
     """Process all regulation files (JSON + XML) in a directory."""
     database_url = db_url or "sqlite:///eu_hierarchical.db"
     data_path = Path(data_dir)
     
     try:
         processor = EURegulationBatchProcessor(database_url)
-        results = processor.process_batch(data_path)
+        results = processor.process_batch(data_path, max_workers=workers)
         processor.print_batch_summary(results)
         
     except Exception as e:
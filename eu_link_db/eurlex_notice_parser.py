@@ -3,7 +3,7 @@
 import xml.etree.ElementTree as ET
 import logging
 import re
-from typing import Dict, List, Optional, Tuple, Any, Set
+from typing import Dict, List, Optional, Tuple, Any, Set, Union
 from datetime import datetime
 from urllib.parse import unquote
 import requests
@@ -11,7 +11,8 @@ import requests
 from sqlmodel import Session, select
 from .models_hierarchical import (
     Regulation, Caselaw, Citation, 
-    Chapter, Recital, Article, Paragraph, SubParagraph, Annex
+    Chapter, Recital, Article, Paragraph, SubParagraph, Annex,
+    insert_ignore
 )
 
 logger = logging.getLogger(__name__)
@@ -216,10 +217,12 @@ class EurLexNoticeParser:
         )
         
         try:
-            self.session.add(caselaw)
+            # Another batch worker may create the same case concurrently, so ignore conflicts
+            created = insert_ignore(self.session, caselaw)
             self.session.commit()
             self._caselaw_cache[ecli] = caselaw
-            logger.info(f"Created caselaw record for {ecli}")
+            if created:
+                logger.info(f"Created caselaw record for {ecli}")
             return True
         except Exception as e:
             logger.error(f"Failed to create caselaw record for {ecli}: {e}")
@@ -313,8 +316,8 @@ class EurLexNoticeParser:
             self.session.rollback()
             return False
 
-    def parse_notice_xml(self, xml_content: str, regulation_celex_id: str) -> Dict[str, int]:
-        """Parse EUR-Lex NOTICE XML and extract caselaw references."""
+    def parse_notice_xml(self, xml_content: Union[str, bytes], regulation_celex_id: str) -> Dict[str, int]:
+        """Parse EUR-Lex NOTICE XML (text or bytes-like, e.g. an mmap) and extract caselaw references."""
         try:
             root = ET.fromstring(xml_content)
             
@@ -397,7 +400,7 @@ class EurLexNoticeParser:
             logger.error(f"Failed to parse NOTICE XML: {e}")
             return {'caselaw_created': 0, 'citations_created': 0, 'failed': 1}
 
-    def ingest_eurlex_notice_data(self, xml_content: str, regulation_celex_id: str) -> Dict[str, int]:
+    def ingest_eurlex_notice_data(self, xml_content: Union[str, bytes], regulation_celex_id: str) -> Dict[str, int]:
         """Ingest EUR-Lex NOTICE XML data into the database."""
         logger.info("Starting EUR-Lex NOTICE data ingestion...")
         
@@ -3,6 +3,8 @@
 from datetime import datetime
 from typing import Optional
 
+from sqlalchemy import event
+from sqlalchemy.dialects import postgresql, sqlite
 from sqlmodel import Field, Session, SQLModel, create_engine
 
 
@@ -197,6 +199,57 @@ class Caselaw(SQLModel, table=True):
     source_url: Optional[str] = Field(default=None, max_length=500)
 
 
+# Applied to every new SQLite connection: WAL lets readers and the writer coexist
+# (also across batch worker processes), busy_timeout makes a writer wait for another
+# process's write to finish instead of failing, and the rest trade durability on
+# power loss and memory for much faster bulk writes
+SQLITE_PRAGMAS = (
+    "PRAGMA journal_mode=WAL",
+    "PRAGMA busy_timeout=30000",
+    "PRAGMA synchronous=NORMAL",
+    "PRAGMA temp_store=MEMORY",
+    "PRAGMA mmap_size=268435456",
+    "PRAGMA cache_size=-65536",
+)
+
+
+def _apply_sqlite_pragmas(dbapi_connection, connection_record) -> None:
+    """Run SQLITE_PRAGMAS on a newly opened SQLite connection."""
+    cursor = dbapi_connection.cursor()
+    try:
+        for pragma in SQLITE_PRAGMAS:
+            cursor.execute(pragma)
+    finally:
+        cursor.close()
+
+
+def insert_ignore(session: Session, row: SQLModel) -> bool:
+    """
+    INSERT a row unless one with the same primary key already exists.
+    
+    Unlike looking the key up first and then adding the row, this cannot fail
+    with an IntegrityError when another process inserts the same key at the
+    same time (e.g. batch worker processes sharing one SQLite file).
+    
+    Returns:
+        bool: True if the row was inserted, False if it already existed
+    """
+    values = row.model_dump()
+    dialect = session.get_bind().dialect.name
+    if dialect == "sqlite":
+        statement = sqlite.insert(type(row)).values(**values).on_conflict_do_nothing()
+    elif dialect == "postgresql":
+        statement = postgresql.insert(type(row)).values(**values).on_conflict_do_nothing()
+    else:
+        # No ON CONFLICT support: fall back to looking the key up (not safe across processes)
+        primary_key = tuple(values[column.name] for column in type(row).__table__.primary_key)
+        if session.get(type(row), primary_key) is not None:
+            return False
+        session.add(row)
+        return True
+    return session.execute(statement).rowcount > 0
+
+
 def get_session(db_url: str = "sqlite:///eu_hierarchical.db") -> Session:
     """
     Create database session for hierarchical schema.
@@ -208,6 +261,8 @@ def get_session(db_url: str = "sqlite:///eu_hierarchical.db") -> Session:
         Session: SQLModel database session
     """
     engine = create_engine(db_url, echo=False)
+    if engine.dialect.name == "sqlite":
+        event.listen(engine, "connect", _apply_sqlite_pragmas)
     SQLModel.metadata.create_all(engine)
     
     return Session(engine)
\ No newline at end of file
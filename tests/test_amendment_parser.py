@@ -0,0 +1,159 @@
+"""Test amendment history extraction from EUR-Lex NOTICE XML."""
+
+import pytest
+from datetime import datetime
+from sqlmodel import select
+
+from eu_link_db.models_hierarchical import get_session, Regulation, AmendmentHistory, ConsolidatedVersion
+from eu_link_db.amendment_parser import AmendmentParser, _iter_xml_events
+
+
+@pytest.fixture
+def test_session(tmp_path):
+    """Create test database session with the amended regulation."""
+    db_path = tmp_path / "test.db"
+    session = get_session(f"sqlite:///{db_path}")
+    session.add(Regulation(celex_id="32016R0679", title="General Data Protection Regulation"))
+    session.commit()
+    return session
+
+
+@pytest.fixture
+def sample_notice_xml():
+    """Sample NOTICE XML with each amendment type, consolidated versions and dates."""
+    return '''<?xml version="1.0" encoding="UTF-8"?>
+<NOTICE xmlns:rdf="http://www.w3.org/1999/02/22-rdf-syntax-ns#">
+  <WORK>
+    <!-- comments and processing instructions are ignored -->
+    <RESOURCE_LEGAL_AMENDED_BY_ACT type="link">
+      <VALUE>http://publications.europa.eu/resource/celex/32018R1725?lang=en</VALUE>
+      <SAMEAS rdf:resource="http://publications.europa.eu/resource/eli/reg/2018/1725/oj"/>
+      <SAMEAS rdf:resource="http://publications.europa.eu/resource/eli/reg/2018/9999/oj"/>
+      <SAMEAS rdf:resource="http://publications.europa.eu/resource/oj/JOL_2018_295_R_0003"/>
+      <DATE>2018-11-21</DATE>
+      <REFERENCE_TO_MODIFIED_LOCATION>AR 58 PA 2</REFERENCE_TO_MODIFIED_LOCATION>
+    </RESOURCE_LEGAL_AMENDED_BY_ACT>
+    <RESOURCE_LEGAL_AMENDED_BY_ACT type="link">
+      <VALUE>no identifier</VALUE>
+      <SAMEAS><URI><VALUE>http://publications.europa.eu/resource/eli/reg/2020/1/oj</VALUE></URI></SAMEAS>
+      <DATE>not-a-date</DATE>
+    </RESOURCE_LEGAL_AMENDED_BY_ACT>
+    <RESOURCE_LEGAL_AMENDED_BY_ACT type="link"><VALUE>nothing to record</VALUE></RESOURCE_LEGAL_AMENDED_BY_ACT>
+    <RESOURCE_LEGAL_CORRIGED_BY_ACT type="link">
+      <VALUE>http://publications.europa.eu/resource/celex/32016R0679R(02)</VALUE>
+      <DATE>2018-05-23</DATE>
+    </RESOURCE_LEGAL_CORRIGED_BY_ACT>
+    <?pi ignored?>
+    <REPEALS_ACT type="link">
+      <VALUE>http://publications.europa.eu/resource/celex/31995L0046</VALUE>
+      <SAMEAS rdf:resource="http://publications.europa.eu/resource/oj/JOL_1995_281_R_0031"/>
+    </REPEALS_ACT>
+    <RESOURCE_LEGAL_CONSOLIDATED_BY_ACT_CONSOLIDATED>
+      <VALUE>http://publications.europa.eu/resource/celex/02016R0679-20160504</VALUE>
+    </RESOURCE_LEGAL_CONSOLIDATED_BY_ACT_CONSOLIDATED>
+    <RESOURCE_LEGAL_CONSOLIDATED_BY_ACT_CONSOLIDATED>
+      <VALUE>http://publications.europa.eu/resource/celex/02016R0679-20180525</VALUE>
+    </RESOURCE_LEGAL_CONSOLIDATED_BY_ACT_CONSOLIDATED>
+    <RESOURCE_LEGAL_CONSOLIDATED_BY_ACT_CONSOLIDATED><VALUE>no version</VALUE></RESOURCE_LEGAL_CONSOLIDATED_BY_ACT_CONSOLIDATED>
+    <RESOURCE_LEGAL_DATE_END-OF-VALIDITY><VALUE>9999-12-31</VALUE></RESOURCE_LEGAL_DATE_END-OF-VALIDITY>
+  </WORK>
+</NOTICE>'''
+
+
+def amendment_rows(session):
+    """Stored amendments as (type, celex, eli, oj, date, article) tuples in insertion order."""
+    amendments = session.exec(select(AmendmentHistory).order_by(AmendmentHistory.amendment_id)).all()
+    return [
+        (a.amendment_type, a.amending_act_celex, a.amending_act_eli, a.oj_reference,
+         a.amendment_date, a.article_reference)
+        for a in amendments
+    ]
+
+
+def test_extract_amendment_history_counts(test_session, sample_notice_xml):
+    """Test that only elements naming an amending act or a version ID create rows."""
+    parser = AmendmentParser(test_session)
+    result = parser.extract_amendment_history(sample_notice_xml, "32016R0679")
+
+    assert result == {'amendments_created': 4, 'versions_created': 2}
+
+
+def test_extract_amendment_history_rows(test_session, sample_notice_xml):
+    """Test the identifiers, dates and references recorded for each amendment."""
+    AmendmentParser(test_session).extract_amendment_history(sample_notice_xml, "32016R0679")
+
+    assert amendment_rows(test_session) == [
+        # First ELI and first OJ reference win; the query string is dropped from the CELEX ID
+        ("amended", "32018R1725", "reg/2018/1725/oj", "JOL_2018_295_R_0003", datetime(2018, 11, 21), "AR 58 PA 2"),
+        # NOTICE files carry SAMEAS links as URI/VALUE; an unparseable date is stored as NULL
+        ("amended", None, "reg/2020/1/oj", None, None, None),
+        ("corrected", "32016R0679R(02)", None, None, datetime(2018, 5, 23), None),
+        ("repeals", "31995L0046", None, "JOL_1995_281_R_0031", None, None),
+    ]
+
+
+def test_extract_amendment_history_versions_and_time_series(test_session, sample_notice_xml):
+    """Test consolidated versions and the regulation's time series metadata."""
+    AmendmentParser(test_session).extract_amendment_history(sample_notice_xml, "32016R0679")
+
+    versions = test_session.exec(select(ConsolidatedVersion).order_by(ConsolidatedVersion.version_id)).all()
+    assert [(v.version_id, v.consolidated_date) for v in versions] == [
+        ("02016R0679-20160504", datetime(2016, 5, 4)),
+        ("02016R0679-20180525", datetime(2018, 5, 25)),
+    ]
+    assert all(v.base_celex_id == "32016R0679" and v.created_at for v in versions)
+
+    regulation = test_session.exec(select(Regulation)).one()
+    # The first consolidated element is the current version
+    assert regulation.consolidated_version_id == "02016R0679-20160504"
+    assert regulation.consolidated_as_of_date == datetime(2016, 5, 4)
+    assert regulation.end_of_validity_date == datetime(9999, 12, 31)
+
+
+def test_stream_events_independent_of_feed_size(sample_notice_xml):
+    """Test that feeding the parser in small slices yields the same events as one slice."""
+    def events(chunk_size):
+        return [(event, element.tag) for event, element in _iter_xml_events(sample_notice_xml, chunk_size)]
+
+    assert events(7) == events(1 << 16)
+
+
+def test_extract_amendment_history_large_document(test_session):
+    """Test a document spanning many feed slices, with finished subtrees cleared as it streams."""
+    amendment = '''<RESOURCE_LEGAL_AMENDED_BY_ACT type="link">
+      <VALUE>http://publications.europa.eu/resource/celex/3{:04d}R0001</VALUE><DATE>2020-01-01</DATE>
+    </RESOURCE_LEGAL_AMENDED_BY_ACT>'''
+    xml = '<NOTICE><WORK>' + ''.join(amendment.format(i) for i in range(2000)) + '</WORK></NOTICE>'
+    assert len(xml) > 3 * (1 << 16)
+
+    result = AmendmentParser(test_session).extract_amendment_history(xml, "32016R0679")
+
+    assert result == {'amendments_created': 2000, 'versions_created': 0}
+    celex_ids = [row[1] for row in amendment_rows(test_session)]
+    assert celex_ids == [f"3{i:04d}R0001" for i in range(2000)]
+
+
+def test_extract_amendment_history_malformed_xml(test_session):
+    """Test that malformed XML creates no rows."""
+    xml = '<NOTICE><RESOURCE_LEGAL_AMENDED_BY_ACT><VALUE>http://x/celex/32018R1725</VALUE></NOTICE>'
+
+    result = AmendmentParser(test_session).extract_amendment_history(xml, "32016R0679")
+
+    assert result == {'amendments_created': 0, 'versions_created': 0}
+    assert amendment_rows(test_session) == []
+
+
+def test_get_amendment_stats(test_session, sample_notice_xml):
+    """Test that the statistics count the stored rows of a regulation not in the database."""
+    parser = AmendmentParser(test_session)
+    parser.extract_amendment_history(sample_notice_xml, "32016R0680")
+
+    stats = parser.get_amendment_stats("32016R0680")
+
+    assert stats == {
+        'total_amendments': 4,
+        'amendments_by_type': {'amended': 2, 'corrected': 1, 'repealed': 0, 'repeals': 1},
+        'total_versions': 2,
+        'current_version': None,
+        'time_series': {},
+    }
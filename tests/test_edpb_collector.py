@@ -0,0 +1,123 @@
+"""Test EDPB listing and Article 29 page parsing."""
+
+import os
+import sys
+
+import pytest
+
+# Add the parent directory to the path to import the main module
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from edpb_guideline_collector import EDPBGuidelineCollector
+
+XML_PROLOG = '<?xml version="1.0" encoding="UTF-8"?>\n'
+
+
+class FakeResponse:
+    """Minimal requests.Response stand-in serving fixed bytes."""
+
+    def __init__(self, content, content_type='text/html'):
+        self.content = content
+        self.headers = {'Content-Type': content_type}
+
+    def raise_for_status(self):
+        pass
+
+
+class FakeSession:
+    """Session stand-in returning one response for every GET."""
+
+    def __init__(self, response):
+        self.response = response
+
+    def get(self, url, **kwargs):
+        return self.response
+
+
+@pytest.fixture
+def collector(tmp_path):
+    """Collector downloading into a temporary directory."""
+    return EDPBGuidelineCollector(download_dir=str(tmp_path / "downloads"))
+
+
+@pytest.fixture
+def listing_page():
+    """Guidelines listing page with one current and one obsolete entry."""
+    return '''<html><head><meta charset="utf-8"/></head><body>
+<div class="views-row">
+  <h4 class="node__title"><span class="field--name-title">Guidelines 01/2025 on pseudonymisation – données</span></h4>
+  <a href="/our-work-tools/documents/public-consultations/2025/guidelines-012025_en">Public consultation</a>
+  <a href="/system/files/2025-01/guidelines_012025_fr.pdf">FR</a>
+  <a href="/system/files/2025-01/guidelines_012025_en.pdf">EN</a>
+</div>
+<div class="views-row">
+  <h4 class="node__title">Guidelines 02/2018 on derogations</h4>
+  <span>Obsolete</span>
+  <a href="/system/files/2018/guidelines_022018_en.pdf">EN</a>
+</div>
+</body></html>'''
+
+
+def test_fetch_guidelines_page_returns_bytes(collector):
+    """Test that the listing page is handed on undecoded."""
+    collector.session = FakeSession(FakeResponse(b'<html></html>'))
+    assert collector.fetch_guidelines_page(0) == b'<html></html>'
+
+
+@pytest.mark.parametrize("prolog", ["", XML_PROLOG], ids=["html", "xml-prolog"])
+def test_extract_all_document_links(collector, listing_page, prolog):
+    """Test listing links, including pages that start with an XML encoding declaration."""
+    collector.session = FakeSession(FakeResponse((prolog + listing_page).encode('utf-8')))
+    documents = collector.extract_all_document_links(collector.fetch_guidelines_page(0))
+
+    assert len(documents) == 1
+    document = documents[0]
+    assert document.title == "Guidelines 01/2025 on pseudonymisation – données"
+    assert document.doc_type == "Guidelines"
+    assert document.consultation_url == (
+        "https://www.edpb.europa.eu/our-work-tools/documents/public-consultations/2025/guidelines-012025_en"
+    )
+    assert document.direct_pdf_url == "https://www.edpb.europa.eu/system/files/2025-01/guidelines_012025_en.pdf"
+
+
+@pytest.fixture
+def article29_page():
+    """Old-style XHTML Article 29 page, starting with an XML prolog."""
+    return (XML_PROLOG + '''<!DOCTYPE html PUBLIC "-//W3C//DTD XHTML 1.0 Transitional//EN"
+  "http://www.w3.org/TR/xhtml1/DTD/xhtml1-transitional.dtd">
+<html xmlns="http://www.w3.org/1999/xhtml"><head><title>Article 29</title></head><body>
+<div class="page-header">Article 29 Working Party newsroom</div>
+<h2>Article 29 Working Party - Guidelines on consent under Regulation 2016/679 (wp259rev.01)</h2>
+<a href="/newsroom/document.cfm?doc_id=51030">Document</a>
+<a href="docs/wp259rev01_fr.pdf">FR</a>
+<a href="docs/wp259rev01_en.pdf">EN</a>
+</body></html>''').encode('utf-8')
+
+
+def test_find_article29_pdf_link_with_xml_prolog(collector, article29_page):
+    """Test that the English PDF and title are found on a page with an XML prolog."""
+    collector.session = FakeSession(FakeResponse(article29_page))
+
+    pdf_url, title = collector.find_article29_pdf_link("https://ec.europa.eu/newsroom/article29/item-detail.cfm?item_id=623051")
+
+    assert pdf_url == "https://ec.europa.eu/newsroom/article29/docs/wp259rev01_en.pdf"
+    assert title == "WP29 - Guidelines on consent under Regulation 2016/679"
+
+
+def test_get_article29_title_with_xml_prolog(collector, article29_page):
+    """Test that the title is found on a page with an XML prolog."""
+    collector.session = FakeSession(FakeResponse(article29_page))
+
+    title = collector.get_article29_title("https://ec.europa.eu/newsroom/article29/item-detail.cfm?item_id=623051")
+
+    assert title == "WP29 - Guidelines on consent under Regulation 2016/679"
+
+
+def test_get_article29_title_uses_header_charset(collector):
+    """Test that a Content-Type charset decodes a page that declares none."""
+    page = '<html><body><h1>Article 29 Working Party - Opinion on données biométriques</h1></body></html>'
+    collector.session = FakeSession(FakeResponse(page.encode('utf-8'), 'text/html; charset=UTF-8'))
+
+    title = collector.get_article29_title("https://ec.europa.eu/newsroom/article29/item-detail.cfm?item_id=1")
+
+    assert "données biométriques" in title
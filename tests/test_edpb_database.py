@@ -0,0 +1,105 @@
+"""Test the EDPB database handler: schema migration and full text storage."""
+
+import os
+import sqlite3
+import sys
+import threading
+import time
+from pathlib import Path
+
+import pytest
+
+# Add the parent directory to the path to import the main module
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from edpb_processor import EDPBDatabaseHandler
+
+
+class SlowTableInfoConnection(sqlite3.Connection):
+    """Connection that pauses after reading table columns, widening the check-then-ALTER window."""
+
+    def execute(self, sql, *args):
+        cursor = super().execute(sql, *args)
+        if sql.startswith("PRAGMA table_info"):
+            time.sleep(0.05)
+        return cursor
+
+
+@pytest.fixture
+def legacy_db(tmp_path):
+    """Database created before the content_sha256/full_text_path columns existed."""
+    db_path = tmp_path / "edpb.db"
+    conn = sqlite3.connect(db_path)
+    conn.execute("CREATE TABLE edpb_guidelines (guideline_id INTEGER PRIMARY KEY, filename TEXT UNIQUE)")
+    conn.close()
+    return str(db_path)
+
+
+def test_concurrent_handlers_migrate_once(legacy_db, monkeypatch):
+    """Test that handlers opening the same database at once each add the columns without errors."""
+    monkeypatch.setattr(sqlite3, 'Connection', SlowTableInfoConnection)
+    handlers = [EDPBDatabaseHandler(legacy_db) for _ in range(4)]
+    barrier = threading.Barrier(len(handlers))
+    errors = []
+
+    def open_connection(handler):
+        barrier.wait()
+        try:
+            with handler._get_connection() as conn:
+                conn.execute("SELECT content_sha256, full_text_path FROM edpb_guidelines").fetchall()
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=open_connection, args=(handler,)) for handler in handlers]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    for handler in handlers:
+        handler.close()
+
+    assert errors == []
+    conn = sqlite3.connect(legacy_db)
+    columns = [row[1] for row in conn.execute("PRAGMA table_info(edpb_guidelines)")]
+    conn.close()
+    assert columns == ['guideline_id', 'filename', 'content_sha256', 'full_text_path']
+
+
+@pytest.fixture
+def db_handler(tmp_path):
+    """Database handler with one guideline row."""
+    db_path = tmp_path / "edpb.db"
+    conn = sqlite3.connect(db_path)
+    conn.executescript("""
+        CREATE TABLE edpb_guidelines (
+            guideline_id INTEGER PRIMARY KEY, filename TEXT UNIQUE, summary TEXT, full_text TEXT,
+            updated_at TIMESTAMP
+        );
+        INSERT INTO edpb_guidelines (guideline_id, filename, full_text) VALUES (1, 'test.pdf', 'old text');
+    """)
+    conn.close()
+    handler = EDPBDatabaseHandler(str(db_path))
+    yield handler
+    handler.close()
+
+
+def test_full_text_path_is_stored_absolute(db_handler, tmp_path, monkeypatch):
+    """Test that a relative text path still resolves from another working directory."""
+    (tmp_path / "guidelines").mkdir()
+    (tmp_path / "guidelines" / "test.txt").write_text("full text", encoding='utf-8')
+    monkeypatch.chdir(tmp_path)
+    db_handler.update_guideline_content(1, "summary", "full text", Path("guidelines/test.txt"))
+
+    monkeypatch.chdir(tmp_path / "guidelines")
+    assert db_handler.get_full_text(1) == "full text"
+    with db_handler._get_connection() as conn:
+        row = conn.execute("SELECT full_text, full_text_path FROM edpb_guidelines").fetchone()
+    assert row['full_text'] is None
+    assert row['full_text_path'] == str((tmp_path / "guidelines" / "test.txt").resolve())
+
+
+def test_full_text_kept_in_database_without_text_file(db_handler):
+    """Test that the full text goes to the database when no text file could be written."""
+    db_handler.update_guideline_content(1, "summary", "full text", None)
+
+    assert db_handler.get_full_text(1) == "full text"
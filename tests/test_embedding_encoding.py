@@ -0,0 +1,95 @@
+"""Test the float32 BLOB encoding of chunk and summary embeddings."""
+
+import json
+import os
+import sqlite3
+import sys
+
+import numpy as np
+import pytest
+
+# Add the parent directory to the path to import the main module
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from edpb_processor import EDPBDatabaseHandler, decode_embedding, encode_embedding
+
+
+@pytest.fixture
+def embedding():
+    """A 768-dimensional embedding like text-embedding-004 returns."""
+    return np.random.default_rng(0).uniform(-1, 1, 768).tolist()
+
+
+@pytest.fixture
+def db_handler(tmp_path):
+    """Database handler on the edpb tables (embedding columns declared TEXT, as in existing databases)."""
+    db_path = tmp_path / "edpb.db"
+    conn = sqlite3.connect(db_path)
+    conn.executescript("""
+        CREATE TABLE edpb_guidelines (guideline_id INTEGER PRIMARY KEY, filename TEXT UNIQUE);
+        CREATE TABLE edpb_chunks (
+            chunk_id INTEGER PRIMARY KEY, guideline_id INTEGER, chunk_index INTEGER, content TEXT,
+            token_count INTEGER, embedding_vector TEXT, embedding_status TEXT
+        );
+        CREATE TABLE edpb_summary_embeddings (
+            embedding_id INTEGER PRIMARY KEY, guideline_id INTEGER, embedding_vector TEXT
+        );
+        INSERT INTO edpb_guidelines (guideline_id, filename) VALUES (1, 'test.pdf');
+    """)
+    conn.close()
+    handler = EDPBDatabaseHandler(str(db_path))
+    yield handler
+    handler.close()
+
+
+def test_encode_embedding_is_float32_bytes(embedding):
+    """Test that a 768-dimensional embedding is stored in 3072 bytes."""
+    encoded = encode_embedding(embedding)
+    assert isinstance(encoded, bytes)
+    assert len(encoded) == 768 * 4
+
+
+def test_decode_embedding_round_trips(embedding):
+    """Test that decoding returns the float32 values that were encoded."""
+    decoded = decode_embedding(encode_embedding(embedding))
+    assert decoded.dtype == np.float32
+    np.testing.assert_array_equal(decoded, np.asarray(embedding, dtype=np.float32))
+
+
+def test_decode_embedding_accepts_legacy_json(embedding):
+    """Test that rows written in the old JSON text format still decode."""
+    decoded = decode_embedding(json.dumps(embedding))
+    np.testing.assert_array_equal(decoded, np.asarray(embedding, dtype=np.float32))
+
+
+def test_save_chunks_stores_blobs(db_handler, embedding):
+    """Test that chunk embeddings are stored as BLOBs and failed chunks as NULL."""
+    chunks = [
+        {'chunk_index': 0, 'content': 'a', 'token_count': 1, 'embedding_vector': embedding,
+         'embedding_status': 'completed'},
+        {'chunk_index': 1, 'content': 'b', 'token_count': 1, 'embedding_vector': None,
+         'embedding_status': 'failed'},
+    ]
+    assert db_handler.save_chunks(1, chunks)
+
+    conn = sqlite3.connect(db_handler.db_path)
+    rows = conn.execute("""
+        SELECT embedding_vector, typeof(embedding_vector) FROM edpb_chunks ORDER BY chunk_index
+    """).fetchall()
+    conn.close()
+    assert rows[0][1] == 'blob'
+    np.testing.assert_array_equal(decode_embedding(rows[0][0]), np.asarray(embedding, dtype=np.float32))
+    assert rows[1] == (None, 'null')
+
+
+def test_save_summary_embedding_stores_blob(db_handler, embedding):
+    """Test that the summary embedding is stored as a BLOB."""
+    assert db_handler.save_summary_embedding(1, embedding)
+
+    conn = sqlite3.connect(db_handler.db_path)
+    value, value_type = conn.execute(
+        "SELECT embedding_vector, typeof(embedding_vector) FROM edpb_summary_embeddings"
+    ).fetchone()
+    conn.close()
+    assert value_type == 'blob'
+    np.testing.assert_array_equal(decode_embedding(value), np.asarray(embedding, dtype=np.float32))
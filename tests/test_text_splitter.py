@@ -0,0 +1,81 @@
+"""Test that the native recursive splitter matches LangChain's RecursiveCharacterTextSplitter."""
+
+import os
+import random
+import sys
+
+import pytest
+from langchain_text_splitters import RecursiveCharacterTextSplitter
+
+# Add the parent directory to the path to import the main module
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from edpb_processor import EDPBChunkProcessor, recursive_split
+
+WORDS = ["data", "controller", "processor", "Article", "6(1)(f)", "GDPR", "consent", "the", "a",
+         "legitimate", "interest", "pseudonymisation", "EDPB", "guidelines", "§", "—"]
+SEPARATORS = [" ", " ", " ", "  ", "\n", "\n\n", "\n \n", "\t"]
+
+
+def langchain_split(text, chunk_size, chunk_overlap):
+    """Split text the way EDPBChunkProcessor did before the native splitter."""
+    splitter = RecursiveCharacterTextSplitter(
+        chunk_size=chunk_size,
+        chunk_overlap=chunk_overlap,
+        length_function=len,
+        separators=["\n\n", "\n", " ", ""]
+    )
+    return splitter.split_text(text)
+
+
+def random_text(rng):
+    """Random text mixing words, every separator, and unbreakable runs longer than a chunk."""
+    parts = []
+    for _ in range(rng.randint(0, 400)):
+        if rng.random() < 0.02:
+            parts.append("x" * rng.randint(20, 300))
+        else:
+            parts.append(rng.choice(WORDS))
+        parts.append(rng.choice(SEPARATORS))
+    return "".join(parts)
+
+
+@pytest.mark.parametrize("chunk_size,chunk_overlap", [
+    (20, 0),
+    (50, 10),
+    (100, 100),
+    (200, 30),
+    (1000, 100),
+])
+def test_recursive_split_matches_langchain_on_random_text(chunk_size, chunk_overlap):
+    """Test that random texts are split exactly as LangChain splits them."""
+    rng = random.Random(chunk_size * 1000 + chunk_overlap)
+    for _ in range(80):
+        text = random_text(rng)
+        assert recursive_split(text, chunk_size, chunk_overlap) == langchain_split(text, chunk_size, chunk_overlap)
+
+
+@pytest.mark.parametrize("text", [
+    "",
+    "   \n\n  ",
+    "short",
+    "x" * 250,
+    "first paragraph\n\nsecond paragraph\n\n\n\nthird",
+    "line one\nline two\nline three " * 20,
+], ids=["empty", "whitespace", "short", "unbreakable", "paragraphs", "lines"])
+def test_recursive_split_matches_langchain_on_edge_cases(text):
+    """Test empty, whitespace-only, unbreakable and separator-heavy texts."""
+    assert recursive_split(text, 40, 10) == langchain_split(text, 40, 10)
+
+
+def test_recursive_split_respects_chunk_size():
+    """Test that chunks only exceed chunk_size when a single piece cannot be split."""
+    text = random_text(random.Random(0))
+    assert all(len(chunk) <= 100 for chunk in recursive_split(text.replace("x", "y "), 100, 20))
+
+
+@pytest.mark.parametrize("chunk_size,chunk_overlap", [(0, 0), (100, -1), (100, 101)])
+def test_chunk_processor_rejects_invalid_sizes(chunk_size, chunk_overlap):
+    """Test that invalid chunk settings are rejected up front."""
+    with pytest.raises(ValueError):
+        EDPBChunkProcessor(None, chunk_size=chunk_size, chunk_overlap=chunk_overlap)